@@ -1,54 +1,330 @@
 # app/api/charts.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+import copy
 
-from app.database import get_db
-from app.schemas.chart import Chart, ChartCreate, ChartUpdate
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Optional, Union
+
+from app import lod
+from app.columnar import MEDIA_TYPE, accepts_columnar, encode_chart
+from app.config import settings
+from app.database import DBSession, get_db, run_db
+from app.etag import chart_version, charts_version, is_not_modified, make_etag
+from app.pagination import NEXT_CURSOR_HEADER, InvalidCursor, split_page
+from app.patch import PatchError, PatchTestFailed
+from app.serialization import JSONBytesResponse
+from app.schemas.chart import (
+    Chart, ChartBatch, ChartBatchResult, ChartCreate, ChartPatch, ChartPatchResult, ChartUpdate, PatchOperation,
+)
+from app.websocket.charts import chart_patch_message, charts_batch_message
+from app.crud import cached
 from app.crud import chart as crud
 
 router = APIRouter(prefix="/api", tags=["charts"])
 
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if fields is None:
+        return None
+    selected = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in crud.CHART_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown chart fields: {', '.join(unknown)}")
+    # id always comes back so projected rows can be told apart
+    return ["id"] + [name for name in selected if name != "id"]
+
 @router.get("/workspaces/{workspace_id}/charts", response_model=List[Chart])
-def list_charts(workspace_id: str, db: Session = Depends(get_db)):
-    """Get all charts in a workspace"""
-    return crud.get_charts_by_workspace(db, workspace_id)
+async def list_charts(
+    workspace_id: str,
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=settings.page_size_max),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated chart fields, e.g. id,name,type,updated_at"),
+    if_none_match: Optional[str] = Header(None),
+    db: DBSession = Depends(get_db)
+):
+    """Get charts in a workspace, including edits not yet written to the database
+
+    With limit (and cursor) a page is returned, newest first, and the next
+    page's cursor is in X-Next-Cursor. With fields only those columns are
+    read and returned; leave data out for metadata-only listings.
+    """
+    chart_state = request.app.state.chart_state
+    if limit is not None or cursor is not None or fields is not None:
+        return await _list_charts_page(db, chart_state, workspace_id, limit, cursor, fields, if_none_match)
+
+    # The narrow ETag query cannot see live edits; with any, build the list first
+    if if_none_match and not chart_state.workspace_charts(workspace_id):
+        etag = await cached.get_charts_etag(db, workspace_id)
+        if is_not_modified(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+    # Live edits are overlaid on models; without any the encoded list is sent as is
+    if settings.fast_serialization and not chart_state.workspace_charts(workspace_id):
+        encoded = await cached.get_charts_json(db, workspace_id)
+        etag = make_etag(encoded.version)
+        if is_not_modified(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return JSONBytesResponse(encoded.body, headers={"ETag": etag})
+
+    charts = chart_state.overlay(await cached.get_charts_by_workspace(db, workspace_id))
+    etag = make_etag(charts_version(charts))
+    if is_not_modified(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return charts
+
+async def _list_charts_page(db, chart_state, workspace_id, limit, cursor, fields, if_none_match):
+    """A page and/or projection, read straight from the database (the cache holds whole lists)"""
+    selected = _parse_fields(fields)
+    try:
+        rows = await run_db(db, crud.get_charts_page, workspace_id, cursor, limit, selected)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rows, next_cursor = split_page(rows, limit)
+    charts = chart_state.overlay(rows)
+
+    headers = {"ETag": make_etag(charts_version(charts) + (tuple(selected or ()), next_cursor))}
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    if is_not_modified(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if selected is None:
+        content = [Chart.model_validate(chart).model_dump(mode="json") for chart in charts]
+    else:
+        content = jsonable_encoder([{name: getattr(chart, name) for name in selected} for chart in charts])
+    return JSONResponse(content=content, headers=headers)
 
 @router.post("/workspaces/{workspace_id}/charts", response_model=Chart, status_code=201)
-def create_chart(
+async def create_chart(
     workspace_id: str,
     chart: ChartCreate,
     user_id: str = "user-1",
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_db)
 ):
     """Create a new chart"""
     # Ensure workspace_id matches
     chart.workspace_id = workspace_id
-    return crud.create_chart(db, chart, user_id)
+    return await run_db(db, crud.create_chart, chart, user_id)
 
-@router.get("/charts/{chart_id}", response_model=Chart)
-def get_chart(chart_id: str, db: Session = Depends(get_db)):
-    """Get a specific chart"""
+BATCH_ERROR_STATUS = {"not_found": 404, "conflict": 409, "duplicate": 422}
+
+@router.post("/workspaces/{workspace_id}/charts:batch", response_model=ChartBatchResult)
+async def batch_charts(
+    workspace_id: str,
+    batch: ChartBatch,
+    request: Request,
+    user_id: str = "user-1",
+    db: DBSession = Depends(get_db)
+):
+    """Create, update and delete charts in one transaction, all or nothing
+
+    Subscribers get a single charts_batch message. An operation that cannot
+    be applied fails the whole batch; the error names its index.
+    """
+    if len(batch.operations) > settings.chart_batch_max_operations:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.chart_batch_max_operations} operations per batch",
+        )
+    # Writes pending live edits first, so updates and base_version see them
+    await request.app.state.chart_state.discard(
+        [operation.id for operation in batch.operations if operation.op != "create"]
+    )
+    try:
+        results = await run_db(db, crud.apply_chart_batch, workspace_id, batch.operations, user_id)
+    except crud.ChartBatchError as e:
+        raise HTTPException(status_code=BATCH_ERROR_STATUS[e.reason], detail=str(e))
+
+    if results:
+        await request.app.state.manager.broadcast(workspace_id, charts_batch_message(workspace_id, results, user_id))
+    return {"results": [{"op": op, "id": chart_id, "chart": chart} for op, chart_id, chart in results]}
+
+# Distinguishes the binary representation's ETag from the JSON one
+COLUMNAR_VARIANT = "columnar"
+
+def _load_columnar(db, chart_id: str):
     chart = crud.get_chart(db, chart_id)
+    if not chart:
+        return None
+    return make_etag(chart_version(chart) + (COLUMNAR_VARIANT,)), encode_chart(chart)
+
+def _columnar_response(etag: str, frame) -> StreamingResponse:
+    return StreamingResponse(
+        iter(frame),
+        media_type=MEDIA_TYPE,
+        headers={"ETag": etag, "Vary": "Accept", "Content-Length": str(len(frame))},
+    )
+
+def _load_series(db, chart_id: str):
+    chart = crud.get_chart(db, chart_id)
+    if chart is not None:
+        chart.series  # loaded here, inside the session, not by lod in the threadpool
+    return chart
+
+async def _get_chart_lod(
+    chart_id: str,
+    request: Request,
+    response: Response,
+    if_none_match: Optional[str],
+    db: DBSession,
+    max_points: int,
+    window: lod.Window,
+):
+    if not lod.available():
+        raise HTTPException(status_code=501, detail="Downsampling needs numpy (the lod extra)")
+    variant = ("lod", max_points, window)
+
+    live = request.app.state.chart_state.get(chart_id)
+    if live is not None:
+        version = chart_version(live)
+    else:
+        version = await run_db(db, crud.get_chart_version, chart_id)
+        if not version:
+            raise HTTPException(status_code=404, detail="Chart not found")
+    etag = make_etag(version + variant)
+    if is_not_modified(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept"})
+    response.headers["ETag"] = etag
+
+    if live is not None:
+        # A shallow copy: edits replace the layout and series objects rather than mutating them
+        return await run_in_threadpool(lod.chart_lod, copy.copy(live), max_points, window)
+    cached = lod.cached(version, max_points, window)
+    if cached is not None:
+        return cached
+    # Loads the full series only on a cache miss; NumPy then runs on the threadpool, not the DB worker
+    chart = await run_db(db, _load_series, chart_id)
+    if chart is None:
+        raise HTTPException(status_code=404, detail="Chart not found")
+    return await run_in_threadpool(lod.chart_lod, chart, max_points, window)
+
+@router.get("/charts/{chart_id}", response_model=Chart)
+async def get_chart(
+    chart_id: str,
+    request: Request,
+    response: Response,
+    max_points: Optional[int] = Query(None, ge=10, le=settings.lod_max_points),
+    positions: Optional[str] = Query(None, alias="range"),
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    db: DBSession = Depends(get_db)
+):
+    """Get a specific chart; `Accept: application/octet-stream` gets the binary columnar form
+
+    With max_points and/or range=start:end, the series are downsampled for
+    display (see app.lod); that response is always JSON.
+    """
+    if max_points is not None or positions is not None:
+        try:
+            window = lod.parse_range(positions)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return await _get_chart_lod(
+            chart_id, request, response, if_none_match, db, max_points or settings.lod_max_points, window
+        )
+
+    columnar = accepts_columnar(accept)
+    variant = COLUMNAR_VARIANT if columnar else None
+    response.headers["Vary"] = "Accept"
+
+    # A chart under live editing is served from memory
+    live = request.app.state.chart_state.get(chart_id)
+    if live is not None:
+        version = chart_version(live)
+        etag = make_etag(version + (variant,) if variant else version)
+        if is_not_modified(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept"})
+        if columnar:
+            return _columnar_response(etag, encode_chart(live))
+        response.headers["ETag"] = etag
+        return live
+
+    if if_none_match:
+        etag = await cached.get_chart_etag(db, chart_id, variant)
+        if is_not_modified(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept"})
+
+    if columnar:
+        # Bypasses the read cache, which holds data as lists; the stored buffers are sent as-is
+        loaded = await run_db(db, _load_columnar, chart_id)
+        if not loaded:
+            raise HTTPException(status_code=404, detail="Chart not found")
+        return _columnar_response(*loaded)
+
+    if settings.fast_serialization:
+        encoded = await cached.get_chart_json(db, chart_id)
+        if not encoded:
+            raise HTTPException(status_code=404, detail="Chart not found")
+        return JSONBytesResponse(encoded.body, headers={"ETag": make_etag(encoded.version), "Vary": "Accept"})
+
+    chart = await cached.get_chart(db, chart_id)
     if not chart:
         raise HTTPException(status_code=404, detail="Chart not found")
+    response.headers["ETag"] = make_etag(chart_version(chart))
     return chart
 
 @router.put("/charts/{chart_id}", response_model=Chart)
-def update_chart(
+async def update_chart(
     chart_id: str,
     chart_update: ChartUpdate,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: DBSession = Depends(get_db)
+):
+    """Update chart configuration; with If-Match, only if nobody changed it since"""
+    # Writes pending live edits first, so If-Match and the version see them
+    await request.app.state.chart_state.discard([chart_id])
+    try:
+        chart = await run_db(db, crud.update_chart, chart_id, chart_update, if_match)
+    except crud.ChartVersionConflict:
+        raise HTTPException(status_code=412, detail="Chart was modified by someone else")
+    if not chart:
+        raise HTTPException(status_code=404, detail="Chart not found")
+    response.headers["ETag"] = make_etag(chart_version(chart))
+    return chart
+
+@router.patch("/charts/{chart_id}", response_model=ChartPatchResult)
+async def patch_chart(
+    chart_id: str,
+    patch: Union[ChartPatch, List[PatchOperation]],
+    request: Request,
+    response: Response,
+    user_id: str = "user-1",
+    if_match: Optional[str] = Header(None),
 ):
-    """Update chart configuration"""
-    chart = crud.update_chart(db, chart_id, chart_update)
+    """Apply JSON-Patch operations (or bare path/value deltas) and broadcast them as chart_patch
+
+    Like WebSocket edits, the patch lands in the live chart state and is
+    written to the database behind.
+    """
+    if isinstance(patch, list):
+        patch = ChartPatch(ops=patch)
+    ops = [op.to_dict() for op in patch.ops]
+    try:
+        chart = await request.app.state.chart_state.apply(chart_id, ops, patch.base_version, if_match)
+    except crud.ChartVersionConflict:
+        if patch.base_version is not None:
+            raise HTTPException(status_code=409, detail="Chart is no longer at base_version")
+        raise HTTPException(status_code=412, detail="Chart was modified by someone else")
+    except PatchTestFailed as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except PatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     if not chart:
         raise HTTPException(status_code=404, detail="Chart not found")
+
+    await request.app.state.manager.broadcast(chart.workspace_id, chart_patch_message(chart, ops, user_id))
+    response.headers["ETag"] = make_etag(chart_version(chart))
     return chart
 
 @router.delete("/charts/{chart_id}", status_code=204)
-def delete_chart(chart_id: str, db: Session = Depends(get_db)):
+async def delete_chart(chart_id: str, request: Request, db: DBSession = Depends(get_db)):
     """Delete a chart"""
-    if not crud.delete_chart(db, chart_id):
+    await request.app.state.chart_state.discard([chart_id])
+    if not await run_db(db, crud.delete_chart, chart_id):
         raise HTTPException(status_code=404, detail="Chart not found")
     return None
\ No newline at end of file
@@ -1,51 +1,133 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+import itertools
 
-from app.database import get_db
-from app.schemas.workspace import Workspace, WorkspaceList, WorkspaceCreate, WorkspaceUpdate
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+
+from app.config import settings
+from app.database import DBSession, get_db, run_db
+from app.etag import is_not_modified, make_etag, workspace_version
+from app.pagination import NEXT_CURSOR_HEADER, InvalidCursor, split_page
+from app.serialization import JSONBytesResponse, encode_workspace_list
+from app.schemas.workspace import Workspace, WorkspaceList, WorkspaceCreate, WorkspaceImportResult, WorkspaceUpdate
+from app.crud import cached
 from app.crud import workspace as crud
+from app import transfer
 
 router = APIRouter(prefix="/api/workspaces", tags=["workspaces"])
 
 @router.get("/", response_model=List[WorkspaceList])
-def list_workspaces(user_id: str = "user-1", db: Session = Depends(get_db)):
-    """Get all workspaces for a user"""
-    workspaces = crud.get_workspaces_by_user(db, user_id)
+async def list_workspaces(
+    response: Response,
+    user_id: str = "user-1",
+    limit: Optional[int] = Query(None, ge=1, le=settings.page_size_max),
+    cursor: Optional[str] = None,
+    db: DBSession = Depends(get_db)
+):
+    """Get workspaces for a user, newest first; with limit, the next page's cursor is in X-Next-Cursor"""
+    try:
+        workspaces = await run_db(db, crud.get_workspaces_by_user, user_id, cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    workspaces, next_cursor = split_page(workspaces, limit)
+    if settings.fast_serialization:
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+        return JSONBytesResponse(encode_workspace_list(workspaces), headers=headers)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return workspaces
 
 @router.get("/{workspace_id}", response_model=Workspace)
-def get_workspace(workspace_id: str, db: Session = Depends(get_db)):
+async def get_workspace(
+    workspace_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: DBSession = Depends(get_db)
+):
     """Get a specific workspace with all details"""
-    workspace = crud.get_workspace(db, workspace_id)
+    if if_none_match:
+        etag = await cached.get_workspace_etag(db, workspace_id)
+        if is_not_modified(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+    if settings.fast_serialization:
+        encoded = await cached.get_workspace_json(db, workspace_id)
+        if not encoded:
+            raise HTTPException(status_code=404, detail="Workspace not found")
+        return JSONBytesResponse(encoded.body, headers={"ETag": make_etag(encoded.version)})
+
+    workspace = await cached.get_workspace(db, workspace_id)
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
+    response.headers["ETag"] = make_etag(workspace_version(workspace))
     return workspace
 
 @router.post("/", response_model=Workspace, status_code=201)
-def create_workspace(
+async def create_workspace(
     workspace: WorkspaceCreate,
     user_id: str = "user-1",
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_db)
 ):
     """Create a new workspace"""
-    return crud.create_workspace(db, workspace, user_id)
+    return await run_db(db, crud.create_workspace, workspace, user_id)
+
+# Body chunks handed to the importer at once, so it is not called per network read
+IMPORT_FEED_BYTES = 1024 * 1024
+
+@router.post("/import", response_model=WorkspaceImportResult, status_code=201)
+async def import_workspace(request: Request, db: DBSession = Depends(get_db)):
+    """Create a workspace from an NDJSON export, read and inserted as the body streams in"""
+    importer = await run_in_threadpool(transfer.WorkspaceImport)
+    try:
+        buffered, size = [], 0
+        async for chunk in request.stream():
+            buffered.append(chunk)
+            size += len(chunk)
+            if size >= IMPORT_FEED_BYTES:
+                await run_in_threadpool(importer.feed, b"".join(buffered))
+                buffered, size = [], 0
+        await run_in_threadpool(importer.feed, b"".join(buffered))
+        workspace_id = await run_in_threadpool(importer.finish)
+    except transfer.InvalidImport as e:
+        await run_in_threadpool(importer.abort)
+        raise HTTPException(status_code=422, detail=str(e))
+    except BaseException:
+        await run_in_threadpool(importer.abort)
+        raise
+    return {"workspace": await cached.get_workspace(db, workspace_id), **importer.counts}
+
+@router.get("/{workspace_id}/export")
+async def export_workspace(workspace_id: str, request: Request):
+    """Stream a workspace with its members and charts as NDJSON (see app.transfer)"""
+    await request.app.state.chart_state.flush()
+    lines = transfer.iter_export(workspace_id)
+    first = await run_in_threadpool(next, lines, None)
+    if first is None:
+        raise HTTPException(status_code=404, detail="Workspace not found")
+    return StreamingResponse(
+        itertools.chain([first], lines),
+        media_type=transfer.MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="workspace-{workspace_id}.ndjson"'},
+    )
 
 @router.put("/{workspace_id}", response_model=Workspace)
-def update_workspace(
+async def update_workspace(
     workspace_id: str,
     workspace_update: WorkspaceUpdate,
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_db)
 ):
     """Update workspace details"""
-    workspace = crud.update_workspace(db, workspace_id, workspace_update)
+    workspace = await run_db(db, crud.update_workspace, workspace_id, workspace_update)
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
     return workspace
 
 @router.delete("/{workspace_id}", status_code=204)
-def delete_workspace(workspace_id: str, db: Session = Depends(get_db)):
+async def delete_workspace(workspace_id: str, request: Request, db: DBSession = Depends(get_db)):
     """Delete a workspace"""
-    if not crud.delete_workspace(db, workspace_id):
+    chart_state = request.app.state.chart_state
+    await chart_state.discard([chart.id for chart in chart_state.workspace_charts(workspace_id)])
+    if not await run_db(db, crud.delete_workspace, workspace_id):
         raise HTTPException(status_code=404, detail="Workspace not found")
     return None
\ No newline at end of file
@@ -0,0 +1,175 @@
+# app/cache.py
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Hashable, Iterable, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.config import settings
+
+
+class TTLLRUCache:
+    """Thread-safe LRU cache with per-entry TTL and a total size bound
+
+    A reader records the generation (a clock invalidate() advances) before
+    loading from the database, and set() drops the value if its key was
+    invalidated since, so a slow read can never re-cache data a write
+    replaced. Only the latest max_entries invalidations are remembered; a
+    read that started before the oldest one forgotten is not cached either.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl: float,
+        sizeof: Callable[[Any], int],
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._clock = 0
+        self._invalidated: "OrderedDict[Hashable, int]" = OrderedDict()  # key -> clock when invalidated
+        self._floor = 0  # reads that started before this clock are not cached
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires_at = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def generation(self, key: Hashable) -> int:
+        with self._lock:
+            return self._clock
+
+    def set(self, key: Hashable, value: Any, generation: int):
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation < self._floor or self._invalidated.get(key, -1) > generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + self.ttl)
+            self.total_bytes += size
+            while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, keys: Iterable[Hashable]):
+        with self._lock:
+            for key in keys:
+                self._clock += 1
+                self._invalidated.pop(key, None)
+                self._invalidated[key] = self._clock
+                if key in self._entries:
+                    self._remove(key)
+                    self.invalidations += 1
+            while len(self._invalidated) > self.max_entries:
+                _, self._floor = self._invalidated.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._clock += 1
+            self._floor = self._clock
+            self._invalidated.clear()
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self.total_bytes -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+def _json_size(value: Any) -> int:
+    """Approximate JSON size of a cached model (or list of them), or the length of an encoded body
+
+    Lists are sized from their first item, so a chart with a million points
+    costs as much to size as one with ten; serializing it would cost as much
+    as the read the cache saves.
+    """
+    body = getattr(value, "body", None)
+    if isinstance(body, bytes):
+        return len(body)
+    if isinstance(value, BaseModel):
+        return sum(len(name) + 4 + _json_size(item) for name, item in value.__dict__.items())
+    if isinstance(value, dict):
+        return sum(len(str(name)) + 4 + _json_size(item) for name, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return 2 + len(value) * (_json_size(value[0]) + 1) if value else 2
+    if isinstance(value, (str, bytes)):
+        return len(value) + 2
+    if isinstance(value, date):
+        return 28
+    return 8
+
+
+# Keys for the cached reads in app.crud.cached
+def workspace_key(workspace_id: str) -> tuple:
+    return ("workspace", workspace_id)
+
+
+def workspace_charts_key(workspace_id: str) -> tuple:
+    return ("workspace_charts", workspace_id)
+
+
+def chart_key(chart_id: str) -> tuple:
+    return ("chart", chart_id)
+
+
+def json_key(key: tuple) -> tuple:
+    """Key of the response body app.serialization encodes for the read under key"""
+    return ("json",) + key
+
+
+# Per-process, so with several workers TTL bounds how stale another worker can be
+read_cache = TTLLRUCache(
+    max_entries=settings.cache_max_entries,
+    max_bytes=settings.cache_max_bytes,
+    ttl=settings.cache_ttl_seconds,
+    sizeof=_json_size,
+)
+
+
+def invalidate(keys: Iterable[Hashable]):
+    """Drop cached reads, and the response bodies encoded from them"""
+    keys = list(keys)
+    read_cache.invalidate(keys + [json_key(key) for key in keys])
@@ -0,0 +1,311 @@
+# app/chart_state.py
+"""Server-authoritative state for charts under live editing, written behind to the database.
+
+The first edit to a chart loads it into a LiveChart. Edits (chart_patch and
+chart_update messages, PATCH requests) then only touch that copy and bump its
+version; a background task writes every dirty chart in one transaction per
+flush, every chart_flush_interval_seconds, sooner once chart_flush_max_dirty
+charts are dirty, and on shutdown. Reads overlay live copies on what the
+database returns, so nobody sees state older than the last edit.
+
+Each process has its own store, so write-behind only holds with one
+worker, which is what the memory backplane (ws_backplane) implies. With a
+shared backplane (ipc, redis), workers would each ack edits to the same
+chart, and the loser's flush would drop edits that were already acked.
+There the store writes through instead: every edit is applied to a copy
+loaded from the database, which the store never holds, and committed
+before it is acked. A version conflict with another worker is answered
+like any other (409/412, chart_patch_rejected "conflict"), a row the
+database refuses as an invalid edit (422, "invalid"), and an edit that
+fails to commit is gone: nothing reads or flushes it later.
+
+A write-behind flush that finds the row changed underneath (another
+process wrote it) drops the live copy and tells clients to resync,
+as does one the database refuses; that is written in its own savepoint, so
+it does not hold back the other charts.
+"""
+import asyncio
+import copy
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.crud import chart as chart_crud
+from app.database import open_db, run_db
+from app.etag import chart_version, is_precondition_met, make_etag
+from app.patch import PatchError, apply_chart_patch, check_chart
+from app.series import PackedSeries, join_series, split_series
+
+logger = logging.getLogger(__name__)
+
+
+class LiveChart:
+    """In-memory copy of a chart; has the attributes of a Chart row that
+    apply_chart_patch, encode_chart and the Chart schema read"""
+
+    def __init__(self, chart):
+        self.id = chart.id
+        self.workspace_id = chart.workspace_id
+        self.name = chart.name
+        self.type = chart.type
+        self.config = copy.deepcopy(chart.config)
+        self.data_layout = copy.deepcopy(chart.data_layout)
+        self.series = [PackedSeries(item.dtype, list(item.shape), item.values) for item in chart.series]
+        self.created_by = chart.created_by
+        self.created_at = chart.created_at
+        self.updated_at = chart.updated_at
+        self.version = chart.version
+        self.last_edit = time.monotonic()
+        self._mark_saved(self.version, self.series)
+
+    @property
+    def data(self):
+        return join_series(self.data_layout, self.series)
+
+    @data.setter
+    def data(self, value):
+        self.data_layout, self.series = split_series(value)
+
+    @property
+    def dirty(self) -> bool:
+        return self.version != self.saved_version
+
+    def _mark_saved(self, version: int, series: List[PackedSeries]):
+        self.saved_version = version
+        # The bytes objects as stored; edits replace them, so identity tells what changed
+        self._saved_series = [(item.dtype, item.shape, item.values) for item in series]
+
+    def apply(self, operations: List[dict]):
+        """Apply patch operations all-or-nothing, then bump the version"""
+        draft = copy.copy(self)
+        draft.config = copy.deepcopy(self.config)
+        draft.data_layout = copy.deepcopy(self.data_layout)
+        draft.series = [PackedSeries(item.dtype, item.shape, item.values) for item in self.series]
+        apply_chart_patch(draft, operations)  # PatchError leaves self untouched
+        check_chart(draft)  # whatever is acked here must be writable by the flush
+
+        for field in ("name", "type", "config", "data_layout", "series"):
+            setattr(self, field, getattr(draft, field))
+        self.version += 1
+        self.updated_at = datetime.utcnow()
+        self.last_edit = time.monotonic()
+
+    def snapshot(self) -> "ChartSnapshot":
+        return ChartSnapshot(self)
+
+
+class ChartSnapshot:
+    """What a flush writes for one LiveChart, copied so edits can continue meanwhile"""
+
+    def __init__(self, live: LiveChart):
+        self.id = live.id
+        self.workspace_id = live.workspace_id
+        self.base_version = live.saved_version
+        self.version = live.version
+        self.name = live.name
+        self.type = live.type
+        self.config = copy.deepcopy(live.config)
+        self.data_layout = copy.deepcopy(live.data_layout)
+        self.updated_at = live.updated_at
+        self.series = list(live.series)
+
+        saved = live._saved_series
+        # Same dtypes and shapes: only buffers that changed are rewritten, in place
+        self.rewrite_series = [(item.dtype, item.shape) for item in self.series] != [
+            (dtype, shape) for dtype, shape, _ in saved
+        ]
+        self.changed_series = [
+            position for position, item in enumerate(self.series)
+            if self.rewrite_series or item.values is not saved[position][2]
+        ]
+
+
+def _load_live(db, chart_id: str) -> Optional[LiveChart]:
+    chart = chart_crud.get_chart(db, chart_id)
+    return LiveChart(chart) if chart else None
+
+
+class ChartStateStore:
+    def __init__(
+        self, flush_interval: float, max_dirty: int, idle_seconds: float, manager=None, write_through: bool = False,
+    ):
+        self.flush_interval = flush_interval
+        self.max_dirty = max_dirty
+        self.idle_seconds = idle_seconds
+        self.manager = manager
+        self.write_through = write_through
+        self.flushes = 0
+        self.flushed_charts = 0
+        self.conflicts = 0
+        self.rejected = 0
+        self.failures = 0
+        self._charts: Dict[str, LiveChart] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            # Shutdown goes on; the edits since the last flush are lost
+            self.failures += 1
+            logger.exception("Final chart flush failed; %d charts not saved", self.stats()["dirty_charts"])
+
+    def get(self, chart_id: str) -> Optional[LiveChart]:
+        return self._charts.get(chart_id)
+
+    def workspace_charts(self, workspace_id: str) -> List[LiveChart]:
+        return [live for live in self._charts.values() if live.workspace_id == workspace_id]
+
+    def overlay(self, charts: list) -> list:
+        """Charts as read from the database/cache, with live copies in their place"""
+        return [self._charts.get(chart.id, chart) for chart in charts]
+
+    async def load(self, chart_id: str) -> Optional[LiveChart]:
+        live = self._charts.get(chart_id)
+        if live is not None:
+            return live
+        async with open_db() as db:
+            live = await run_db(db, _load_live, chart_id)
+        if live is None:
+            return None
+        # Another edit may have loaded it while we waited on the database
+        return self._charts.setdefault(chart_id, live)
+
+    async def apply(
+        self,
+        chart_id: str,
+        operations: List[dict],
+        base_version: Optional[int] = None,
+        expected_etag: Optional[str] = None,
+        workspace_id: Optional[str] = None,
+    ) -> Optional[LiveChart]:
+        """Apply operations to the live copy; raises ChartVersionConflict or PatchError"""
+        if self.write_through:
+            live = await self._load_unheld(chart_id)
+        else:
+            live = await self.load(chart_id)
+        if live is None or (workspace_id is not None and live.workspace_id != workspace_id):
+            return None
+        if base_version is not None and live.version != base_version:
+            raise chart_crud.ChartVersionConflict(chart_id)
+        if expected_etag is not None and not is_precondition_met(expected_etag, make_etag(chart_version(live))):
+            raise chart_crud.ChartVersionConflict(chart_id)
+
+        live.apply(operations)
+        if self.write_through:
+            await self._write_through(live)
+        elif sum(1 for item in self._charts.values() if item.dirty) >= self.max_dirty:
+            self._wakeup.set()
+        return live
+
+    async def _load_unheld(self, chart_id: str) -> Optional[LiveChart]:
+        """A copy of the row for one write-through edit, which the store never holds"""
+        async with open_db() as db:
+            return await run_db(db, _load_live, chart_id)
+
+    async def _write_through(self, live: LiveChart):
+        """Commit one edited copy; it is only acked, and seen by readers, once this returns"""
+        snapshot = live.snapshot()
+        async with open_db() as db:
+            conflicts, failed = await run_db(db, chart_crud.save_chart_snapshots, [snapshot])
+        if conflicts:
+            # Another worker (or edit) wrote the row since it was loaded
+            self.conflicts += 1
+            raise chart_crud.ChartVersionConflict(live.id)
+        if failed:
+            self.rejected += 1
+            raise PatchError("The database refused the edited chart")
+        self.flushes += 1
+        self.flushed_charts += 1
+        live._mark_saved(snapshot.version, snapshot.series)
+
+    async def discard(self, chart_ids: List[str]):
+        """Flush and forget charts, before a write that bypasses the store (PUT, DELETE)"""
+        if not any(chart_id in self._charts for chart_id in chart_ids):
+            return
+        await self.flush()
+        for chart_id in chart_ids:
+            self._charts.pop(chart_id, None)
+
+    async def flush(self):
+        """Write every dirty chart in one transaction"""
+        async with self._flush_lock:
+            snapshots = [live.snapshot() for live in self._charts.values() if live.dirty]
+            if snapshots:
+                async with open_db() as db:
+                    conflicts, failed = await run_db(db, chart_crud.save_chart_snapshots, snapshots)
+                conflicts, failed = set(conflicts), set(failed)
+                self.flushes += 1
+                self.flushed_charts += len(snapshots) - len(conflicts) - len(failed)
+                self.conflicts += len(conflicts)
+                self.rejected += len(failed)
+
+                for snapshot in snapshots:
+                    live = self._charts.get(snapshot.id)
+                    if snapshot.id in conflicts:
+                        logger.warning("Chart %s changed in the database; dropping live state", snapshot.id)
+                        self._charts.pop(snapshot.id, None)
+                        await self._notify_dropped(snapshot, "conflict")
+                    elif snapshot.id in failed:
+                        # Retrying would fail the same way; the database copy stands
+                        logger.error("Chart %s was refused by the database; dropping live state", snapshot.id)
+                        self._charts.pop(snapshot.id, None)
+                        await self._notify_dropped(snapshot, "invalid")
+                    elif live is not None:
+                        live._mark_saved(snapshot.version, snapshot.series)
+
+            now = time.monotonic()
+            for chart_id, live in list(self._charts.items()):
+                if not live.dirty and now - live.last_edit > self.idle_seconds:
+                    del self._charts[chart_id]
+
+    async def _notify_dropped(self, snapshot: ChartSnapshot, reason: str):
+        """Tell the workspace its edits since the last save are gone, so clients resync"""
+        if self.manager is None:
+            return
+        await self.manager.broadcast(snapshot.workspace_id, {
+            "type": "chart_patch_rejected",
+            "payload": {"chartId": snapshot.id, "reason": reason, "version": None},
+            "userId": "system",
+            "workspaceId": snapshot.workspace_id,
+            "timestamp": int(datetime.now().timestamp() * 1000),
+        })
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                # Not about one chart (see save_chart_snapshots): retried on the next tick
+                self.failures += 1
+                logger.error("Chart flush failed: %s", e)
+
+    def stats(self) -> dict:
+        return {
+            "live_charts": len(self._charts),
+            "dirty_charts": sum(1 for live in self._charts.values() if live.dirty),
+            "flushes": self.flushes,
+            "flushed_charts": self.flushed_charts,
+            "conflicts": self.conflicts,
+            "rejected": self.rejected,
+            "failures": self.failures,
+        }
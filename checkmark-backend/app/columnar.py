@@ -0,0 +1,104 @@
+# app/columnar.py
+"""Binary columnar encoding of a chart for `Accept: application/octet-stream`.
+
+Frame layout (all integers little-endian):
+
+    0   4 bytes   magic b"CMKC"
+    4   uint32    header length n, a multiple of 8
+    8   n bytes   UTF-8 JSON header, padded with spaces
+    8+n ...       series buffers, back to back
+
+The header is the usual chart JSON with "data" replaced by "layout" (the data
+with {"$series": i} placeholders) and a "series" list of
+{dtype, shape, offset, length}, offsets counted from the end of the header.
+Every buffer is 8-byte aligned so clients can view it as a Float64Array (or
+BigInt64Array for "<i8") without copying.
+"""
+import struct
+from typing import Iterator, List, Optional
+
+from app.schemas.chart import ChartColumnarHeader, SeriesInfo
+from app.series import PackedSeries, split_series
+
+MEDIA_TYPE = "application/octet-stream"
+MAGIC = b"CMKC"
+ALIGNMENT = 8
+
+
+def _media_ranges(accept: str):
+    for item in accept.split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        yield media_type.lower(), quality
+
+
+def accepts_columnar(accept: Optional[str]) -> bool:
+    """True when Accept names the binary form and does not prefer JSON over it"""
+    if not accept:
+        return False
+    binary = json = 0.0
+    for media_type, quality in _media_ranges(accept):
+        if media_type == MEDIA_TYPE:
+            binary = max(binary, quality)
+        elif media_type in ("application/json", "application/*", "*/*"):
+            json = max(json, quality)
+    return binary > 0 and binary >= json
+
+
+class ColumnarChart:
+    """Header bytes plus the stored series buffers, ready to stream"""
+
+    __slots__ = ("header", "buffers")
+
+    def __init__(self, header: bytes, buffers: List[bytes]):
+        self.header = header
+        self.buffers = buffers
+
+    def __len__(self) -> int:
+        return len(self.header) + sum(len(buffer) for buffer in self.buffers)
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self.header
+        yield from self.buffers
+
+
+def encode_chart(chart) -> ColumnarChart:
+    """Frame a Chart row; its series bytes are passed through as stored"""
+    layout = chart.data_layout
+    series: List[PackedSeries] = list(chart.series)
+    if not series and layout is not None:
+        # Rows written before chart_series existed still hold their arrays inline
+        layout, series = split_series(layout)
+
+    infos = []
+    offset = 0
+    for item in series:
+        infos.append(SeriesInfo(dtype=item.dtype, shape=item.shape, offset=offset, length=len(item.values)))
+        offset += len(item.values)
+
+    header = ChartColumnarHeader(
+        id=chart.id,
+        name=chart.name,
+        type=chart.type,
+        workspace_id=chart.workspace_id,
+        created_by=chart.created_by,
+        created_at=chart.created_at,
+        updated_at=chart.updated_at,
+        version=chart.version,
+        config=chart.config,
+        layout=layout,
+        series=infos,
+    ).model_dump_json().encode()
+    header += b" " * (-len(header) % ALIGNMENT)
+
+    return ColumnarChart(
+        MAGIC + struct.pack("<I", len(header)) + header,
+        [item.values for item in series],
+    )
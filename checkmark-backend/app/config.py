@@ -0,0 +1,119 @@
+# app/config.py
+from typing import Dict, List
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Runtime configuration, overridable with CHECKMARK_* environment variables"""
+
+    model_config = SettingsConfigDict(env_prefix="CHECKMARK_", env_file=".env", extra="ignore")
+
+    # Database: async mode uses AsyncSession on aiosqlite/asyncpg instead of the threadpool
+    database_url: str = "sqlite:///./checkmark.db"
+    db_async: bool = False
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_pre_ping: bool = False
+    db_pool_recycle: int = -1  # seconds, -1 never recycles
+    db_echo: bool = False
+    # What each worker does to the schema on startup (app.schema): check | upgrade | create | off
+    db_schema_startup: str = "check"
+
+    # Connect-time PRAGMAs, applied only when the engine is SQLite
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -64000  # negative means KiB, so 64 MiB
+
+    # Read-through cache for workspace and chart reads
+    cache_enabled: bool = True
+    cache_ttl_seconds: float = 30.0
+    cache_max_entries: int = 2048
+    cache_max_bytes: int = 64 * 1024 * 1024
+
+    # Read routes encode rows straight to JSON bytes instead of through the schemas (app.serialization)
+    fast_serialization: bool = False
+
+    # Largest `limit` a list endpoint accepts, and most operations in one chart batch
+    page_size_max: int = 500
+    chart_batch_max_operations: int = 500
+
+    # Level-of-detail chart reads (app.lod): largest max_points, and the cache of downsampled charts
+    lod_max_points: int = 100_000
+    lod_cache_max_entries: int = 512
+    lod_cache_max_bytes: int = 64 * 1024 * 1024
+    lod_cache_ttl_seconds: float = 300.0
+
+    # Workspace export/import (app.transfer): rows per cursor fetch, insert chunks, longest line
+    transfer_yield_rows: int = 100
+    transfer_chunk_charts: int = 200
+    transfer_chunk_bytes: int = 16 * 1024 * 1024
+    transfer_max_line_bytes: int = 256 * 1024 * 1024
+
+    # Logging (app.logs): level, text | json, formatted and written on a background thread
+    log_level: str = "INFO"
+    log_format: str = "text"
+    log_async: bool = True
+
+    # Received WebSocket messages: share logged one by one, per type (others use the default),
+    # and how often the per-workspace counts are logged
+    log_message_sample_rates: Dict[str, float] = {"cursor_move": 0.0}
+    log_message_sample_rate: float = 0.01
+    log_message_counts_interval_seconds: float = 60.0
+
+    # Per-request latency and database query timing for /metrics (WebSocket counters are always on)
+    metrics_enabled: bool = True
+
+    # WebSocket outbound queues
+    ws_send_queue_size: int = 256
+    ws_overflow_policy: str = "drop_oldest"  # drop_oldest | coalesce | disconnect
+
+    # WebSocket frame encoding
+    ws_json_encoder: str = "auto"  # auto | orjson | json
+    ws_relay_only_types: List[str] = ["cursor_move"]
+
+    # Inbound admission (app.websocket.limits): token buckets per message type as
+    # {"type": [per second, burst]}, "*" for the types not listed, per connection and per workspace
+    ws_rate_limits: Dict[str, List[float]] = {"cursor_move": [120, 240], "*": [30, 60]}
+    ws_workspace_rate_limits: Dict[str, List[float]] = {"cursor_move": [2400, 4800], "*": [300, 600]}
+    # Dropped frames a client may send (refilled per second) before it is closed
+    ws_throttle_strikes: int = 500
+    ws_throttle_strikes_per_second: float = 50.0
+    # Largest received frame, and open connections per workspace and per process (0 = no cap)
+    ws_max_frame_bytes: int = 8 * 1024 * 1024
+    ws_max_connections: int = 10000
+    ws_max_connections_per_workspace: int = 500
+
+    # cursor_move batching rate per workspace, 0 relays every frame
+    ws_cursor_tick_hz: float = 25.0
+
+    # Replay log for late joiners: sequenced frame types, ring size (0 = off), snapshot reuse
+    ws_replay_size: int = 1024
+    ws_replay_types: List[str] = ["chart_patch", "chart_update", "charts_batch"]
+    ws_snapshot_max_age_seconds: float = 30.0
+    ws_replay_idle_seconds: float = 300.0
+
+    # permessage-deflate, applied when uvicorn runs with
+    # --ws app.websocket.compression:DeflateWebSocketProtocol; messages under min_size stay plain
+    ws_deflate: bool = True
+    ws_deflate_level: int = 1
+    ws_deflate_window_bits: int = 15
+    ws_deflate_mem_level: int = 5
+    ws_deflate_min_size: int = 256
+
+    # Cross-process fan-out: memory (single worker) | ipc (workers on one host) | redis
+    ws_backplane: str = "memory"
+    ws_backplane_path: str = "/tmp/checkmark-backplane.sock"
+    ws_backplane_url: str = "redis://localhost:6379/0"
+
+    # Live chart state: WebSocket/PATCH edits apply in memory and are written behind,
+    # or written through before the ack when ws_backplane is not memory (app.chart_state)
+    chart_flush_interval_seconds: float = 1.0
+    chart_flush_max_dirty: int = 64  # flush early once this many charts are dirty
+    chart_idle_seconds: float = 300.0  # drop clean charts nobody edited for this long
+
+
+settings = Settings()
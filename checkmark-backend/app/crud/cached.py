@@ -0,0 +1,109 @@
+# app/crud/cached.py
+from typing import List, Optional
+
+from app import serialization
+from app.cache import chart_key, json_key, read_cache, workspace_charts_key, workspace_key
+from app.config import settings
+from app.crud import chart as chart_crud
+from app.crud import workspace as workspace_crud
+from app.database import DBSession, run_db
+from app.etag import chart_version, charts_version, make_etag, workspace_version
+from app.schemas.chart import Chart
+from app.schemas.workspace import Workspace
+
+
+def _load_workspace(db, workspace_id: str) -> Optional[Workspace]:
+    workspace = workspace_crud.get_workspace(db, workspace_id)
+    return Workspace.model_validate(workspace) if workspace else None
+
+
+def _load_charts(db, workspace_id: str) -> List[Chart]:
+    return [Chart.model_validate(chart) for chart in chart_crud.get_charts_by_workspace(db, workspace_id)]
+
+
+def _load_chart(db, chart_id: str) -> Optional[Chart]:
+    chart = chart_crud.get_chart(db, chart_id)
+    return Chart.model_validate(chart) if chart else None
+
+
+async def _read_through(db: DBSession, key: tuple, loader, *args):
+    if not settings.cache_enabled:
+        return await run_db(db, loader, *args)
+
+    value = read_cache.get(key)
+    if value is not None:
+        return value
+
+    generation = read_cache.generation(key)
+    value = await run_db(db, loader, *args)
+    if value is not None:
+        read_cache.set(key, value, generation)
+    return value
+
+
+async def get_workspace(db: DBSession, workspace_id: str) -> Optional[Workspace]:
+    """Get workspace with all related data, served from the read cache when fresh"""
+    return await _read_through(db, workspace_key(workspace_id), _load_workspace, workspace_id)
+
+
+async def get_charts_by_workspace(db: DBSession, workspace_id: str) -> List[Chart]:
+    """Get all charts in a workspace, served from the read cache when fresh"""
+    return await _read_through(db, workspace_charts_key(workspace_id), _load_charts, workspace_id)
+
+
+async def get_chart(db: DBSession, chart_id: str) -> Optional[Chart]:
+    """Get a single chart by ID, served from the read cache when fresh"""
+    return await _read_through(db, chart_key(chart_id), _load_chart, chart_id)
+
+
+async def get_workspace_json(db: DBSession, workspace_id: str) -> Optional[serialization.Encoded]:
+    """Workspace response body (app.serialization), served from the read cache when fresh"""
+    return await _read_through(db, json_key(workspace_key(workspace_id)), serialization.load_workspace, workspace_id)
+
+
+async def get_charts_json(db: DBSession, workspace_id: str) -> serialization.Encoded:
+    """Chart list response body (app.serialization), served from the read cache when fresh"""
+    return await _read_through(db, json_key(workspace_charts_key(workspace_id)), serialization.load_charts, workspace_id)
+
+
+async def get_chart_json(db: DBSession, chart_id: str) -> Optional[serialization.Encoded]:
+    """Chart response body (app.serialization), served from the read cache when fresh"""
+    return await _read_through(db, json_key(chart_key(chart_id)), serialization.load_chart, chart_id)
+
+
+def _peek_version(key: tuple, version) -> Optional[tuple]:
+    """Version of the cached snapshot under key, or of the response body encoded from it"""
+    if not settings.cache_enabled:
+        return None
+    cached_value = read_cache.get(key)
+    if cached_value is not None:
+        return version(cached_value)
+    encoded = read_cache.get(json_key(key))
+    return encoded.version if encoded is not None else None
+
+
+async def get_workspace_etag(db: DBSession, workspace_id: str) -> Optional[str]:
+    """ETag of a workspace from its cached snapshot, or a query that skips the heavy columns"""
+    version = _peek_version(workspace_key(workspace_id), workspace_version)
+    if version is not None:
+        return make_etag(version)
+    version = await run_db(db, workspace_crud.get_workspace_version, workspace_id)
+    return make_etag(version) if version else None
+
+
+async def get_charts_etag(db: DBSession, workspace_id: str) -> str:
+    """ETag of a workspace's chart list without loading chart config/data"""
+    version = _peek_version(workspace_charts_key(workspace_id), charts_version)
+    if version is not None:
+        return make_etag(version)
+    return make_etag(await run_db(db, chart_crud.get_charts_version, workspace_id))
+
+
+async def get_chart_etag(db: DBSession, chart_id: str, variant: Optional[str] = None) -> Optional[str]:
+    """ETag of a chart without loading its config/data; variant tags other representations"""
+    version = _peek_version(chart_key(chart_id), chart_version)
+    if version is None:
+        version = await run_db(db, chart_crud.get_chart_version, chart_id)
+        if not version:
+            return None
+    return make_etag(version + (variant,) if variant else version)
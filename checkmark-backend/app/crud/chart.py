@@ -1,15 +1,96 @@
-from sqlalchemy.orm import Session
-from app.models import Chart
+import logging
+from collections import defaultdict
+from sqlalchemy import Text, cast, exc
+from sqlalchemy.orm import Session, selectinload
+from app.cache import chart_key, invalidate, workspace_charts_key
+from app.etag import chart_version, charts_version, is_precondition_met, make_etag
+from app.models import Chart, ChartSeries
+from app.pagination import keyset
 from app.schemas.chart import ChartCreate, ChartUpdate
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class ChartVersionConflict(Exception):
+    """The chart changed since the version the client based its write on (If-Match or base_version)"""
+
+class ChartBatchError(Exception):
+    """Operation `index` of a batch cannot be applied (reason: not_found, conflict, duplicate); nothing was written"""
+
+    def __init__(self, index: int, reason: str):
+        super().__init__(f"Operation {index}: {reason}")
+        self.index = index
+        self.reason = reason
 
 def get_chart(db: Session, chart_id: str) -> Optional[Chart]:
     """Get a single chart by ID"""
-    return db.query(Chart).filter(Chart.id == chart_id).first()
+    return db.query(Chart).options(selectinload(Chart.series)).filter(Chart.id == chart_id).first()
 
 def get_charts_by_workspace(db: Session, workspace_id: str) -> List[Chart]:
-    """Get all charts in a workspace"""
-    return db.query(Chart).filter(Chart.workspace_id == workspace_id).all()
+    """Get all charts in a workspace, with their series in one extra query"""
+    return db.query(Chart).options(selectinload(Chart.series)).filter(Chart.workspace_id == workspace_id).all()
+
+def get_chart_rows(
+    db: Session, workspace_id: Optional[str] = None, chart_id: Optional[str] = None
+) -> Tuple[list, Dict[str, list]]:
+    """Charts of a workspace (or one chart) as row tuples, and their series rows by chart id
+
+    config and data (the layout) come back as the stored JSON text, unparsed,
+    for app.serialization to pass through.
+    """
+    condition = Chart.id == chart_id if chart_id is not None else Chart.workspace_id == workspace_id
+    charts = db.query(
+        Chart.id, Chart.name, Chart.type, Chart.workspace_id, Chart.created_by,
+        Chart.created_at, Chart.updated_at, Chart.version,
+        cast(Chart.config, Text).label("config"), cast(Chart.data_layout, Text).label("data"),
+    ).filter(condition).all()
+
+    series = defaultdict(list)
+    if charts:
+        chart_ids = db.query(Chart.id).filter(condition).scalar_subquery()
+        for row in db.query(
+            ChartSeries.chart_id, ChartSeries.position, ChartSeries.dtype, ChartSeries.shape, ChartSeries.values
+        ).filter(ChartSeries.chart_id.in_(chart_ids)).order_by(ChartSeries.chart_id, ChartSeries.position):
+            series[row.chart_id].append(row)
+    return charts, series
+
+# Chart fields a list request can project to; id and updated_at are always read (cursor, ETag)
+CHART_FIELDS = (
+    "id", "name", "type", "workspace_id", "created_by", "created_at", "updated_at", "version", "config", "data",
+)
+
+def get_charts_page(
+    db: Session,
+    workspace_id: str,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+) -> list:
+    """A page of a workspace's charts, newest first (limit + 1 rows, see app.pagination)
+
+    With fields and no data among them only those columns are selected and
+    rows come back as named tuples; data needs the chart and its series.
+    """
+    if fields is None or "data" in fields:
+        query = db.query(Chart).options(selectinload(Chart.series))
+    else:
+        columns = [name for name in CHART_FIELDS if name in fields or name in ("id", "updated_at")]
+        query = db.query(*[getattr(Chart, name) for name in columns])
+    query = query.filter(Chart.workspace_id == workspace_id)
+    return keyset(query, Chart.updated_at, Chart.id, cursor, limit).all()
+
+def get_chart_version(db: Session, chart_id: str) -> Optional[tuple]:
+    """Version of a chart, read without touching the config/data columns"""
+    row = db.query(Chart.id, Chart.updated_at).filter(Chart.id == chart_id).first()
+    return chart_version(row) if row else None
+
+def get_charts_version(db: Session, workspace_id: str) -> tuple:
+    """Version of a workspace's chart list, read without touching the config/data columns"""
+    return charts_version(
+        db.query(Chart.id, Chart.updated_at).filter(Chart.workspace_id == workspace_id).all()
+    )
 
 def create_chart(db: Session, chart: ChartCreate, created_by: str) -> Chart:
     """Create a new chart"""
@@ -23,31 +104,203 @@ def create_chart(db: Session, chart: ChartCreate, created_by: str) -> Chart:
     )
     db.add(db_chart)
     db.commit()
+    invalidate([workspace_charts_key(db_chart.workspace_id)])
     db.refresh(db_chart)
+    # Load series while still in the session's context; an async caller serializes later
+    db.refresh(db_chart, ["series"])
     return db_chart
 
+def _bump_version(db: Session, db_chart: Chart, expected_version: Optional[int] = None) -> bool:
+    """Advance version and updated_at in SQL; with expected_version only while it still holds"""
+    query = db.query(Chart).filter(Chart.id == db_chart.id)
+    if expected_version is not None:
+        query = query.filter(Chart.version == expected_version)
+    return bool(query.update(
+        {Chart.version: Chart.version + 1, Chart.updated_at: datetime.utcnow()},
+        synchronize_session=False,
+    ))
+
 def update_chart(
-    db: Session, chart_id: str, chart_update: ChartUpdate
+    db: Session, chart_id: str, chart_update: ChartUpdate, expected_etag: Optional[str] = None
 ) -> Optional[Chart]:
-    """Update chart configuration"""
+    """Update chart configuration, optionally only if it still matches expected_etag"""
     db_chart = db.query(Chart).filter(Chart.id == chart_id).first()
     if not db_chart:
         return None
+
+    expected_version = None
+    if expected_etag is not None:
+        if not is_precondition_met(expected_etag, make_etag(chart_version(db_chart))):
+            raise ChartVersionConflict(chart_id)
+        # Compare-and-bump so a writer that committed after our read wins the race
+        expected_version = db_chart.version
+    if not _bump_version(db, db_chart, expected_version):
+        db.rollback()
+        raise ChartVersionConflict(chart_id)
     
     update_data = chart_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_chart, field, value)
     
     db.commit()
+    invalidate([chart_key(chart_id), workspace_charts_key(db_chart.workspace_id)])
     db.refresh(db_chart)
+    db.refresh(db_chart, ["series"])
     return db_chart
 
+def _save_snapshot(db: Session, snapshot) -> bool:
+    """Write one snapshot; False when the row is no longer at snapshot.base_version"""
+    claimed = db.query(Chart).filter(
+        Chart.id == snapshot.id, Chart.version == snapshot.base_version
+    ).update({
+        Chart.name: snapshot.name,
+        Chart.type: snapshot.type,
+        Chart.config: snapshot.config,
+        Chart.data_layout: snapshot.data_layout,
+        Chart.version: snapshot.version,
+        Chart.updated_at: snapshot.updated_at,
+    }, synchronize_session=False)
+    if not claimed:
+        return False
+
+    if snapshot.rewrite_series:
+        db.query(ChartSeries).filter(ChartSeries.chart_id == snapshot.id).delete(synchronize_session=False)
+        db.add_all([
+            ChartSeries(
+                chart_id=snapshot.id, position=position,
+                dtype=series.dtype, shape=series.shape, values=series.values,
+            )
+            for position, series in enumerate(snapshot.series)
+        ])
+        db.flush()
+    else:
+        for position in snapshot.changed_series:
+            db.query(ChartSeries).filter(
+                ChartSeries.chart_id == snapshot.id, ChartSeries.position == position
+            ).update({ChartSeries.values: snapshot.series[position].values}, synchronize_session=False)
+    return True
+
+def save_chart_snapshots(db: Session, snapshots: list) -> Tuple[List[str], List[str]]:
+    """Write live chart state (app.chart_state.ChartSnapshot) in one transaction
+
+    Each row is only written if it is still at the version the live copy was
+    loaded or last saved at, and each in its own savepoint, so a snapshot the
+    database refuses is rolled back alone. Returns (ids that were not at
+    their version, ids that were refused); an OperationalError (connection,
+    locking) is not about one chart and fails the whole write.
+    """
+    conflicts = []
+    failed = []
+    saved = []
+    for snapshot in snapshots:
+        try:
+            with db.begin_nested():
+                claimed = _save_snapshot(db, snapshot)
+        except exc.OperationalError:
+            raise
+        except exc.SQLAlchemyError as e:
+            logger.warning("Chart %s could not be saved: %s", snapshot.id, e)
+            failed.append(snapshot.id)
+            continue
+        if claimed:
+            saved.append(snapshot)
+        else:
+            conflicts.append(snapshot.id)
+
+    db.commit()
+    invalidate(
+        [chart_key(snapshot.id) for snapshot in saved]
+        + [workspace_charts_key(snapshot.workspace_id) for snapshot in saved]
+    )
+    return conflicts, failed
+
+def apply_chart_batch(db: Session, workspace_id: str, operations: list, created_by: str) -> List[tuple]:
+    """Apply create/update/delete operations (app.schemas.ChartBatch) in one transaction
+
+    Returns (op, chart id, Chart or None for deletes) per operation, in
+    order. Targets are read in one query, new charts and their series go
+    out in one flush, deletes are two bulk statements and the results are
+    read back in one query. Raises ChartBatchError and writes nothing when
+    any operation cannot be applied.
+    """
+    target_ids = [operation.id for operation in operations if operation.op != "create"]
+    for index, operation in enumerate(operations):
+        if operation.op != "create" and target_ids.count(operation.id) > 1:
+            raise ChartBatchError(index, "duplicate")
+    # Series come along: replacing data orphans the old ones
+    targets = {
+        chart.id: chart
+        for chart in db.query(Chart).options(selectinload(Chart.series)).filter(
+            Chart.id.in_(target_ids), Chart.workspace_id == workspace_id
+        )
+    } if target_ids else {}
+
+    results = []
+    deleted_ids = []
+    try:
+        for index, operation in enumerate(operations):
+            if operation.op == "create":
+                db_chart = Chart(
+                    name=operation.chart.name,
+                    type=operation.chart.type,
+                    workspace_id=workspace_id,
+                    config=operation.chart.config,
+                    data=operation.chart.data,
+                    created_by=created_by,
+                )
+                db.add(db_chart)
+                results.append((operation.op, db_chart))
+                continue
+
+            db_chart = targets.get(operation.id)
+            if db_chart is None:
+                raise ChartBatchError(index, "not_found")
+            if operation.op == "delete":
+                deleted_ids.append(operation.id)
+                results.append((operation.op, operation.id))
+                continue
+
+            if not _bump_version(db, db_chart, operation.base_version):
+                raise ChartBatchError(index, "conflict")
+            for field, value in operation.chart.model_dump(exclude_unset=True).items():
+                setattr(db_chart, field, value)
+            results.append((operation.op, db_chart))
+
+        db.flush()  # client-side ids: the INSERTs go out as executemany batches
+        if deleted_ids:
+            for chart_id in deleted_ids:
+                db.expunge(targets[chart_id])
+            db.query(ChartSeries).filter(ChartSeries.chart_id.in_(deleted_ids)).delete(synchronize_session=False)
+            db.query(Chart).filter(Chart.id.in_(deleted_ids)).delete(synchronize_session=False)
+        written_ids = [item.id for op, item in results if op != "delete"]
+        db.commit()
+    except ChartBatchError:
+        db.rollback()
+        raise
+
+    invalidate(
+        [workspace_charts_key(workspace_id)] + [chart_key(chart_id) for chart_id in target_ids]
+    )
+    # populate_existing: sessions that keep objects across commit would hand back the stale versions
+    charts = {
+        chart.id: chart
+        for chart in db.query(Chart).options(selectinload(Chart.series)).populate_existing().filter(
+            Chart.id.in_(written_ids)
+        )
+    } if written_ids else {}
+    return [
+        (op, item, None) if op == "delete" else (op, item.id, charts[item.id])
+        for op, item in results
+    ]
+
 def delete_chart(db: Session, chart_id: str) -> bool:
     """Delete a chart"""
     db_chart = db.query(Chart).filter(Chart.id == chart_id).first()
     if not db_chart:
         return False
     
+    workspace_id = db_chart.workspace_id
     db.delete(db_chart)
     db.commit()
+    invalidate([chart_key(chart_id), workspace_charts_key(workspace_id)])
     return True
\ No newline at end of file
@@ -1,24 +1,74 @@
-from sqlalchemy.orm import Session, joinedload
-from app.models import Workspace, WorkspaceMember, WorkspaceRole
+from sqlalchemy import select, union
+from sqlalchemy.orm import Session, joinedload, selectinload
+from app.cache import chart_key, invalidate, workspace_charts_key, workspace_key
+from app.etag import build_workspace_version
+from app.models import User, Workspace, WorkspaceMember, WorkspaceRole
+from app.pagination import keyset
 from app.schemas.workspace import WorkspaceCreate, WorkspaceUpdate
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 def get_workspace(db: Session, workspace_id: str) -> Optional[Workspace]:
-    """Get workspace with all related data"""
+    """Get workspace with owner and members
+
+    Members come from a second query (selectinload): joining them in would
+    repeat the workspace row per member. Charts are not part of a workspace
+    response and are loaded through get_charts_by_workspace.
+    """
     return db.query(Workspace).options(
         joinedload(Workspace.owner),
-        joinedload(Workspace.members).joinedload(WorkspaceMember.user),
-        joinedload(Workspace.charts)
+        selectinload(Workspace.members).joinedload(WorkspaceMember.user),
     ).filter(Workspace.id == workspace_id).first()
 
-def get_workspaces_by_user(db: Session, user_id: str) -> List[Workspace]:
-    """Get all workspaces where user is owner or member"""
-    return db.query(Workspace).options(
-        joinedload(Workspace.owner)
-    ).filter(
-        (Workspace.owner_id == user_id) |
-        (Workspace.members.any(WorkspaceMember.user_id == user_id))
+def get_workspace_rows(db: Session, workspace_id: str) -> Optional[Tuple[tuple, list]]:
+    """Workspace joined to its owner, and members joined to their users, as row tuples (app.serialization)"""
+    workspace = db.query(
+        Workspace.id, Workspace.name, Workspace.description, Workspace.owner_id,
+        Workspace.created_at, Workspace.updated_at,
+        User.name.label("owner_name"), User.email.label("owner_email"),
+        User.avatar_url.label("owner_avatar_url"), User.created_at.label("owner_created_at"),
+        User.updated_at.label("owner_updated_at"),
+    ).join(User, Workspace.owner_id == User.id).filter(Workspace.id == workspace_id).first()
+    if not workspace:
+        return None
+
+    members = db.query(
+        WorkspaceMember.id, WorkspaceMember.user_id, WorkspaceMember.role, WorkspaceMember.joined_at,
+        User.name, User.email, User.avatar_url, User.created_at, User.updated_at,
+    ).join(User, WorkspaceMember.user_id == User.id).filter(
+        WorkspaceMember.workspace_id == workspace_id
     ).all()
+    return workspace, members
+
+def get_workspace_version(db: Session, workspace_id: str) -> Optional[tuple]:
+    """Version of a workspace response from narrow columns only"""
+    row = db.query(
+        Workspace.id, Workspace.updated_at, User.id, User.updated_at
+    ).join(User, Workspace.owner_id == User.id).filter(Workspace.id == workspace_id).first()
+    if not row:
+        return None
+
+    members = db.query(
+        WorkspaceMember.id, WorkspaceMember.role, WorkspaceMember.user_id, User.updated_at
+    ).join(User, WorkspaceMember.user_id == User.id).filter(
+        WorkspaceMember.workspace_id == workspace_id
+    ).all()
+    return build_workspace_version(*row, members)
+
+def get_workspaces_by_user(
+    db: Session, user_id: str, cursor: Optional[str] = None, limit: Optional[int] = None
+) -> List[Workspace]:
+    """Get workspaces where user is owner or member, newest first (limit + 1 rows, see app.pagination)"""
+    # Each branch is an index lookup (workspaces.owner_id, workspace_members
+    # (user_id, workspace_id)); an OR with members.any() is a correlated
+    # EXISTS evaluated for every workspace
+    workspace_ids = union(
+        select(Workspace.id).where(Workspace.owner_id == user_id),
+        select(WorkspaceMember.workspace_id).where(WorkspaceMember.user_id == user_id),
+    )
+    query = db.query(Workspace).options(
+        joinedload(Workspace.owner)
+    ).filter(Workspace.id.in_(workspace_ids))
+    return keyset(query, Workspace.updated_at, Workspace.id, cursor, limit).all()
 
 def create_workspace(db: Session, workspace: WorkspaceCreate, owner_id: str) -> Workspace:
     """Create a new workspace and add owner as member"""
@@ -55,6 +105,7 @@ def update_workspace(
         setattr(db_workspace, field, value)
     
     db.commit()
+    invalidate([workspace_key(workspace_id)])
     db.refresh(db_workspace)
     return get_workspace(db, workspace_id)
 
@@ -64,6 +115,11 @@ def delete_workspace(db: Session, workspace_id: str) -> bool:
     if not db_workspace:
         return False
     
+    # Charts go with the workspace (delete-orphan cascade)
+    stale_keys = [workspace_key(workspace_id), workspace_charts_key(workspace_id)]
+    stale_keys += [chart_key(chart.id) for chart in db_workspace.charts]
+
     db.delete(db_workspace)
     db.commit()
+    invalidate(stale_keys)
     return True
\ No newline at end of file
@@ -1,23 +1,174 @@
 # app/database.py
-from sqlalchemy import create_engine
+"""Engines and sessions, created on first use rather than on import.
+
+Importing this module (every worker start, every reload) touches no
+database and loads no driver: get_engine() and get_async_engine() build
+their engine the first time they are called, normally from the schema
+check in the lifespan (app.schema) or the first request, and on_engine()
+lets instrumentation hook engines whenever they appear.
+"""
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, List, Optional, Union
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+
+SQLALCHEMY_DATABASE_URL = settings.database_url
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def engine_options(url: str) -> dict:
+    """Pool and driver options for create_engine/create_async_engine from settings"""
+    options = {
+        "echo": settings.db_echo,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+    if is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}  # Needed for SQLite
+        if make_url(url).database in (None, "", ":memory:"):
+            return options  # in-memory databases use a single-connection pool
+    options.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+    )
+    return options
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./checkmark.db"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
+def apply_sqlite_pragmas(engine: Engine):
+    """Tune every new SQLite connection for concurrent readers and writers
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    WAL lets readers proceed while a write is in progress, and busy_timeout
+    makes writers wait for the lock instead of failing with "database is locked".
+    """
+    pragmas = {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": settings.sqlite_cache_size,
+    }
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+_engine: Optional[Engine] = None
+_async_engine: Optional[AsyncEngine] = None
+_engine_hooks: List[Callable[[Engine], None]] = []
+_engine_lock = threading.Lock()  # get_engine() runs on threadpool threads
+
+# Bound per session to the engine, so creating them connects to nothing
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
+
+def on_engine(hook: Callable[[Engine], None]):
+    """Call hook(engine) for every engine (an async one's sync_engine), created or yet to be"""
+    _engine_hooks.append(hook)
+    for engine in (_engine, _async_engine.sync_engine if _async_engine else None):
+        if engine is not None:
+            hook(engine)
+
+
+def get_engine() -> Engine:
+    """The sync engine, created on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
+                if is_sqlite(SQLALCHEMY_DATABASE_URL):
+                    apply_sqlite_pragmas(engine)
+                for hook in _engine_hooks:
+                    hook(engine)
+                _engine = engine
+    return _engine
+
+
+def to_async_url(url: str) -> str:
+    """Swap a sync driver URL for its async driver equivalent"""
+    for sync_prefix, async_prefix in (
+        ("sqlite://", "sqlite+aiosqlite://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+def get_async_engine() -> AsyncEngine:
+    """The async engine (db_async), created on first use along with its driver"""
+    global _async_engine
+    if _async_engine is None:
+        async_url = to_async_url(SQLALCHEMY_DATABASE_URL)
+        engine = create_async_engine(async_url, **engine_options(async_url))
+        if is_sqlite(async_url):
+            apply_sqlite_pragmas(engine.sync_engine)
+        for hook in _engine_hooks:
+            hook(engine.sync_engine)
+        _async_engine = engine
+    return _async_engine
+
+
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
+def get_sync_db():
+    db = SessionLocal(bind=get_engine())
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
+
+
+get_db = get_async_db if settings.db_async else get_sync_db
+
+
+@asynccontextmanager
+async def open_db() -> AsyncIterator["DBSession"]:
+    """A session outside request handling (e.g. for WebSocket messages), like get_db"""
+    if settings.db_async:
+        async with AsyncSessionLocal(bind=get_async_engine()) as db:
+            yield db
+    else:
+        db = SessionLocal(bind=get_engine())
+        try:
+            yield db
+        finally:
+            db.close()
+
+# What get_db yields in either mode
+DBSession = Union[Session, AsyncSession]
+
+
+async def run_db(db: DBSession, fn, *args, **kwargs):
+    """Run a crud function against either session flavour without blocking the event loop
+
+    An AsyncSession runs the function through run_sync on the async driver; a
+    sync Session runs it on the threadpool, as sync routes did before.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
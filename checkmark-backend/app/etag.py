@@ -0,0 +1,69 @@
+# app/etag.py
+"""Strong ETags built from row versions, never from the chart config/data blobs.
+
+The same version tuple can be produced from ORM rows, cached pydantic
+snapshots or a narrow (id, updated_at) query, so a conditional GET can be
+answered with a 304 without loading or serializing the JSON columns.
+"""
+import hashlib
+from typing import Iterable, Optional
+
+
+def _role(role) -> str:
+    return getattr(role, "value", role)
+
+
+def chart_version(chart) -> tuple:
+    return (chart.id, chart.updated_at)
+
+
+def charts_version(charts: Iterable) -> tuple:
+    return tuple(sorted(chart_version(chart) for chart in charts))
+
+
+def build_workspace_version(
+    workspace_id: str, updated_at, owner_id: str, owner_updated_at, members: Iterable
+) -> tuple:
+    """Version of a workspace response; members are (id, role, user_id, user.updated_at)"""
+    return (
+        workspace_id,
+        updated_at,
+        owner_id,
+        owner_updated_at,
+        tuple(sorted(
+            (member_id, _role(role), user_id, user_updated_at)
+            for member_id, role, user_id, user_updated_at in members
+        )),
+    )
+
+
+def workspace_version(workspace) -> tuple:
+    return build_workspace_version(
+        workspace.id,
+        workspace.updated_at,
+        workspace.owner.id,
+        workspace.owner.updated_at,
+        [(member.id, member.role, member.user_id, member.user.updated_at) for member in workspace.members],
+    )
+
+
+def make_etag(version: tuple) -> str:
+    return '"' + hashlib.sha1(repr(version).encode()).hexdigest() + '"'
+
+
+def _tags(header: str):
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def is_not_modified(header: Optional[str], etag: Optional[str]) -> bool:
+    """True when If-None-Match matches, i.e. the client copy is current (weak comparison)"""
+    if not header or not etag:
+        return False
+    return any(tag == "*" or tag.removeprefix("W/") == etag for tag in _tags(header))
+
+
+def is_precondition_met(header: Optional[str], etag: str) -> bool:
+    """True when If-Match allows the write (strong comparison)"""
+    if header is None:
+        return True
+    return any(tag == "*" or tag == etag for tag in _tags(header))
@@ -0,0 +1,272 @@
+# app/lod.py
+"""Level-of-detail reads: a chart with its large series downsampled for display.
+
+GET /api/charts/{id}?max_points=N[&range=start:end] returns the chart with
+every packed array (app.series) reduced to at most N points, by a
+shape-preserving method chosen by chart type:
+
+  line                LTTB (largest triangle three buckets)
+  bar                 min and max of each bucket, so peaks and dips survive
+  surface             grid decimation: every k-th row and column of a matrix
+  scatter3D, bar3D    voxel grid: the first point in each occupied cell
+
+Kept points are points of the data, in their original order, and inline
+arrays as long as a series (e.g. labels) keep the same positions, so a
+downsampled chart renders like the full one. Series of the same length are
+downsampled together, sharing N. range=start:end (positions, half-open,
+either side optional) first narrows every series to a window along its
+first axis: the x axis of a line or bar chart, the rows of a surface.
+
+The work runs on the stored buffers through NumPy views, never building
+the full lists, and results are cached per chart version and resolution.
+NumPy is the optional "lod" extra, imported on the first available()
+call; without it, available() is False.
+"""
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from app.cache import TTLLRUCache
+from app.config import settings
+from app.etag import chart_version
+from app.series import SERIES_REF, split_series
+from app.websocket.encoding import dumps
+
+# numpy, imported by the first available() call rather than with the app
+np = None
+
+Window = Optional[Tuple[Optional[int], Optional[int]]]
+
+
+def available() -> bool:
+    """Whether numpy is installed; call before anything that downsamples"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - optional dependency
+            return False
+        np = numpy
+    return True
+
+
+def parse_range(value: Optional[str]) -> Window:
+    """"start:end" -> (start, end); raises ValueError"""
+    if value is None:
+        return None
+    start, separator, end = value.partition(":")
+    if not separator:
+        raise ValueError(f"range must be start:end, got {value!r}")
+    try:
+        return (int(start) if start.strip() else None, int(end) if end.strip() else None)
+    except ValueError:
+        raise ValueError(f"range must be start:end with integer positions, got {value!r}")
+
+
+def minmax(y, target: int):
+    """Positions of the minimum and maximum of each of target // 2 equal buckets"""
+    n = len(y)
+    if n <= target:
+        return np.arange(n)
+    size = -(-n // max(1, target // 2))
+    buckets = -(-n // size)
+    offsets = np.arange(buckets) * size
+    padded = np.empty(buckets * size)
+    padded[:n] = y
+    padded[n:] = np.inf
+    lows = padded.reshape(buckets, size).argmin(axis=1) + offsets
+    padded[n:] = -np.inf
+    highs = padded.reshape(buckets, size).argmax(axis=1) + offsets
+    return np.union1d(lows, highs)
+
+
+def lttb(x, y, target: int):
+    """Positions of target points picked by largest-triangle-three-buckets
+
+    First and last points are kept; each bucket in between keeps the point
+    forming the largest triangle with the point kept before it and the
+    average of the next bucket. Bucket averages come from cumulative sums;
+    only the choice, which depends on the previous one, loops per bucket.
+    """
+    n = len(y)
+    if n <= target:
+        return np.arange(n)
+    if target < 3:
+        return np.array([0, n - 1])
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, target - 1).astype(np.int64)  # target - 2 buckets of the inner points
+    sum_x = np.concatenate(([0.0], np.cumsum(x)))
+    sum_y = np.concatenate(([0.0], np.cumsum(y)))
+    counts = edges[1:] - edges[:-1]
+    # Average of the bucket after each one; the last bucket looks at the last point
+    next_x = np.append(((sum_x[edges[1:]] - sum_x[edges[:-1]]) / counts)[1:], x[-1]).tolist()
+    next_y = np.append(((sum_y[edges[1:]] - sum_y[edges[:-1]]) / counts)[1:], y[-1]).tolist()
+    starts = edges.tolist()
+
+    selected = [0]
+    kept_x, kept_y = x[0], y[0]
+    for bucket in range(target - 2):
+        start, end = starts[bucket], starts[bucket + 1]
+        px, py = x[start:end], y[start:end]
+        area = np.abs((kept_x - next_x[bucket]) * (py - kept_y) - (kept_x - px) * (next_y[bucket] - kept_y))
+        chosen = start + int(area.argmax())
+        selected.append(chosen)
+        kept_x, kept_y = x[chosen], y[chosen]
+    selected.append(n - 1)
+    return np.array(selected)
+
+
+def voxels(points, target: int):
+    """Positions of the first point in each occupied cell of a g x g x g grid, g**3 <= target"""
+    n = len(points)
+    if n <= target:
+        return np.arange(n)
+    cells_per_axis = max(1, int(round(target ** (1 / 3))))
+    while cells_per_axis ** 3 > target and cells_per_axis > 1:
+        cells_per_axis -= 1
+    xyz = points[:, :3].astype(np.float64)
+    low = xyz.min(axis=0)
+    span = xyz.max(axis=0) - low
+    span[span == 0] = 1.0
+    cells = np.minimum(((xyz - low) / span * cells_per_axis).astype(np.int64), cells_per_axis - 1)
+    keys = (cells[:, 0] * cells_per_axis + cells[:, 1]) * cells_per_axis + cells[:, 2]
+    _, first = np.unique(keys, return_index=True)
+    return np.sort(first)
+
+
+def stride(n: int, target: int):
+    """target positions spread evenly, first and last included"""
+    if n <= target:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n - 1, max(target, 2)).round().astype(np.int64))
+
+
+def grid(matrix, target: int):
+    """Every k-th row and column (and the last ones) of a matrix, at most target cells"""
+    rows, columns = matrix.shape
+    step = max(1, math.ceil(math.sqrt(rows * columns / target)))
+    while True:
+        kept_rows = np.union1d(np.arange(0, rows, step), [rows - 1])
+        kept_columns = np.union1d(np.arange(0, columns, step), [columns - 1])
+        if len(kept_rows) * len(kept_columns) <= target or step >= max(rows, columns):
+            return matrix[np.ix_(kept_rows, kept_columns)]
+        step += 1
+
+
+def _positions(chart_type: str, array, target: int):
+    """Positions along the first axis to keep of one series"""
+    n = len(array)
+    if array.ndim == 1:
+        if chart_type == "line":
+            return lttb(np.arange(n), array, target)
+        if chart_type == "bar":
+            return minmax(array, target)
+        return stride(n, target)
+    if chart_type in ("scatter3D", "bar3D", "surface") and array.shape[1] >= 3:
+        return voxels(array, target)
+    if chart_type == "line":
+        return lttb(array[:, 0], array[:, 1], target)
+    if chart_type == "bar":
+        return minmax(array[:, -1], target)
+    return stride(n, target)
+
+
+def _is_surface_matrix(chart_type: str, array) -> bool:
+    return chart_type == "surface" and array.ndim == 2 and array.shape[1] > 3
+
+
+def downsample(chart, max_points: int, window: Window = None):
+    """The chart's data with every series cut to window and at most max_points points"""
+    layout, series = chart.data_layout, list(chart.series)
+    if not series:
+        if layout is None:
+            return None
+        # Rows written before chart_series existed still hold their arrays inline
+        layout, series = split_series(layout)
+    chart_type = getattr(chart.type, "value", chart.type)
+
+    arrays = [np.frombuffer(item.values, dtype=item.dtype).reshape(item.shape) for item in series]
+    if window is not None:
+        arrays = [array[window[0]:window[1]] for array in arrays]
+
+    # Series sharing a length are aligned (datasets over the same labels), so they keep the same positions
+    kept: Dict[int, object] = {}
+    by_length: Dict[int, List[int]] = defaultdict(list)
+    for index, array in enumerate(arrays):
+        if _is_surface_matrix(chart_type, array):
+            arrays[index] = grid(array, max_points) if array.size > max_points else array
+        else:
+            by_length[series[index].shape[0]].append(index)
+    for length, members in by_length.items():
+        n = len(arrays[members[0]])
+        if n <= max_points:
+            if window is not None:
+                kept[length] = np.arange(n)
+            continue
+        target = max(2, max_points // len(members))
+        positions = _positions(chart_type, arrays[members[0]], target)
+        for index in members[1:]:
+            positions = np.union1d(positions, _positions(chart_type, arrays[index], target))
+        kept[length] = positions
+        for index in members:
+            arrays[index] = arrays[index][positions]
+
+    def walk(value):
+        if isinstance(value, dict):
+            if len(value) == 1 and SERIES_REF in value:
+                return arrays[value[SERIES_REF]].tolist()
+            return {key: walk(item) for key, item in value.items()}
+        if isinstance(value, list):
+            positions = kept.get(len(value))
+            if positions is not None:
+                window_values = value[window[0]:window[1]] if window is not None else value
+                return [walk(window_values[position]) for position in positions.tolist()]
+            return [walk(item) for item in value]
+        return value
+
+    return walk(layout)
+
+
+def _size(entry: dict) -> int:
+    return len(dumps(entry["data"])) if entry["data"] is not None else 0
+
+
+# Keyed by chart version, so an edited chart misses instead of needing invalidation
+lod_cache = TTLLRUCache(
+    max_entries=settings.lod_cache_max_entries,
+    max_bytes=settings.lod_cache_max_bytes,
+    ttl=settings.lod_cache_ttl_seconds,
+    sizeof=_size,
+)
+
+
+def cache_key(version: tuple, max_points: int, window: Window) -> tuple:
+    return ("lod",) + version + (max_points, window)
+
+
+def cached(version: tuple, max_points: int, window: Window) -> Optional[dict]:
+    return lod_cache.get(cache_key(version, max_points, window))
+
+
+def chart_lod(chart, max_points: int, window: Window = None) -> dict:
+    """The chart, as the Chart schema reads it, with downsampled data; cached"""
+    key = cache_key(chart_version(chart), max_points, window)
+    entry = lod_cache.get(key)
+    if entry is not None:
+        return entry
+    generation = lod_cache.generation(key)
+    entry = {
+        "id": chart.id,
+        "name": chart.name,
+        "type": chart.type,
+        "workspace_id": chart.workspace_id,
+        "config": chart.config,
+        "data": downsample(chart, max_points, window),
+        "created_by": chart.created_by,
+        "created_at": chart.created_at,
+        "updated_at": chart.updated_at,
+        "version": chart.version,
+    }
+    lod_cache.set(key, entry, generation)
+    return entry
@@ -0,0 +1,155 @@
+# app/logs.py
+"""Logging setup, and sampled logging of received WebSocket messages.
+
+configure() gives the root logger one handler. With log_async it is a
+QueueHandler: the event loop only appends the record to a queue and a
+QueueListener thread formats and writes it. log_format "json" writes one
+JSON object per line, with the fields passed in extra= as keys.
+
+Received messages go through MessageLog instead of a log line each: they
+are counted per workspace and type, the counts are logged every
+log_message_counts_interval_seconds, and only a sampled share of each type
+(log_message_sample_rates) is logged individually. Logging calls pass
+%-style arguments behind an isEnabledFor check, so a record that will not
+be emitted is never built, and one that will is formatted on the listener
+thread.
+"""
+import asyncio
+import atexit
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from collections import Counter, defaultdict
+from typing import Dict, Optional
+
+from app.config import settings
+from app.websocket.encoding import dumps
+
+TEXT_FORMAT = "%(levelname)s:%(name)s:%(message)s"
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        try:
+            return dumps(entry)
+        except TypeError:
+            return dumps({key: str(value) for key, value in entry.items()})
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue records unformatted; the listener thread's handler formats them
+
+    QueueHandler formats in the calling thread so records can cross process
+    boundaries; these never leave the process. Pass immutable arguments, as
+    the record is formatted after the call returns.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure():
+    """Install the handler on the root logger, unless something configured logging already"""
+    global _listener
+    root = logging.getLogger()
+    root.setLevel(settings.log_level.upper())
+    if root.handlers:
+        return
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter() if settings.log_format == "json" else logging.Formatter(TEXT_FORMAT))
+    if not settings.log_async:
+        root.addHandler(handler)
+        return
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(DeferredQueueHandler(records))
+    _listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop)
+
+
+def stop():
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class MessageLog:
+    """Per-workspace counts of received messages, with sampled individual records"""
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        sample_rates: Dict[str, float],
+        default_sample_rate: float,
+        interval: float,
+    ):
+        self.logger = logger
+        self.sample_rates = sample_rates
+        self.default_sample_rate = default_sample_rate
+        self.interval = interval
+        self.counts: Dict[str, Counter] = defaultdict(Counter)
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
+
+    def received(self, workspace_id: str, user_id: str, message_type: Optional[str]):
+        self.counts[workspace_id][message_type] += 1
+        rate = self.sample_rates.get(message_type, self.default_sample_rate)
+        if rate <= 0 or not self.logger.isEnabledFor(logging.INFO):
+            return
+        if rate >= 1 or random.random() < rate:
+            self.logger.info(
+                "Received %s from %s in %s", message_type, user_id, workspace_id,
+                extra={"event": "ws_message", "type": message_type, "user_id": user_id,
+                       "workspace_id": workspace_id, "sample_rate": rate},
+            )
+
+    def flush(self):
+        """Log and reset the counts gathered since the last flush"""
+        counts, self.counts = self.counts, defaultdict(Counter)
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        for workspace_id, by_type in counts.items():
+            self.logger.info(
+                "Received %d messages in %s: %s", sum(by_type.values()), workspace_id,
+                ", ".join(f"{message_type} {count}" for message_type, count in by_type.most_common()),
+                extra={"event": "ws_message_counts", "workspace_id": workspace_id,
+                       "counts": {str(message_type): count for message_type, count in by_type.items()}},
+            )
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.flush()
@@ -0,0 +1,309 @@
+# app/metrics.py
+"""Counters, gauges and histograms served at /metrics in the Prometheus text format.
+
+A few dependency-free metric types, enough for what is recorded here:
+  - HTTP: request latency per route template, and the database queries and
+    time each request spent (engine events, attributed through a contextvar
+    that follows the request into the threadpool and the async driver)
+  - database: every query's duration by statement kind
+  - WebSocket: connections per workspace, messages in and out by type,
+    fan-out duration, send-queue depth and dropped frames
+
+Label values that come from clients (message types) are capped per metric:
+past max_series, new combinations are counted under "other".
+"""
+import bisect
+import contextvars
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OTHER = "other"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List["Metric"] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: "Metric"):
+        self._metrics.append(metric)
+
+    def on_collect(self, collector: Callable[[], None]):
+        """Call collector before each render, e.g. to set gauges read off live state"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        max_series: int = 256,
+        registry: Registry = registry,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.max_series = max_series
+        self._series: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """The series for these label values, created on first use"""
+        child = self._series.get(values)
+        if child is not None:
+            return child
+        with self._lock:
+            if values not in self._series and len(self._series) >= self.max_series:
+                values = (OTHER,) * len(self.labelnames)
+            child = self._series.get(values)
+            if child is None:
+                child = self._series[values] = self._new_child()
+            return child
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            series = list(self._series.items())
+        for values, child in series:
+            lines.extend(self._render_child(_format_labels(self.labelnames, values), child))
+        return lines
+
+    def _render_child(self, labels: str, child) -> List[str]:
+        return [f"{self.name}{labels} {_format_value(child.value)}"]
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self, lock: threading.Lock):
+        self.value = 0.0
+        self._lock = lock
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _Value(self._lock)
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def _new_child(self):
+        return _Value(self._lock)
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...], lock: threading.Lock):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.sum = 0.0
+        self._lock = lock
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, **kwargs)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets, self._lock)
+
+    def _render_child(self, labels: str, child: _HistogramValue) -> List[str]:
+        with self._lock:
+            counts, total = list(child.counts), child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            bucket_labels = labels[:-1] + "," + le + "}" if labels else "{" + le + "}"
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+# HTTP
+http_request_duration = Histogram(
+    "checkmark_http_request_duration_seconds", "Time to handle a request, until its body was sent",
+    ["method", "route", "status"],
+)
+http_request_db_queries = Histogram(
+    "checkmark_http_request_db_queries", "Database queries per request", ["route"], buckets=COUNT_BUCKETS,
+)
+http_request_db_seconds = Histogram(
+    "checkmark_http_request_db_seconds", "Time per request spent waiting on database queries", ["route"],
+)
+
+# Database
+db_query_duration = Histogram(
+    "checkmark_db_query_duration_seconds", "Database query execution time", ["statement"], buckets=QUERY_BUCKETS,
+)
+
+# WebSocket
+ws_connections = Gauge("checkmark_ws_connections", "Open WebSocket connections on this node", ["workspace"])
+ws_messages_received = Counter(
+    "checkmark_ws_messages_received_total", "WebSocket messages received from clients", ["type"], max_series=64,
+)
+ws_messages_sent = Counter(
+    "checkmark_ws_messages_sent_total", "WebSocket frames written to clients", ["type"], max_series=64,
+)
+ws_fanout_duration = Histogram(
+    "checkmark_ws_fanout_duration_seconds", "Time to queue one frame for every local peer of a workspace",
+    buckets=QUERY_BUCKETS,
+)
+ws_send_queue_frames = Gauge("checkmark_ws_send_queue_frames", "Frames waiting in all outbound queues")
+ws_send_queue_max_depth = Gauge("checkmark_ws_send_queue_max_depth", "Deepest outbound queue")
+ws_dropped_frames = Counter(
+    "checkmark_ws_dropped_frames_total", "Outbound frames dropped or superseded on a full queue, by policy",
+    ["policy"],
+)
+ws_throttled_messages = Counter(
+    "checkmark_ws_throttled_messages_total", "Inbound WebSocket messages dropped by a rate limit, by scope",
+    ["type", "scope"], max_series=128,
+)
+ws_rejected = Counter(
+    "checkmark_ws_rejected_total", "WebSocket connections refused or closed by admission control, by reason",
+    ["reason"],
+)
+
+
+class RequestDBTime:
+    """Queries run and seconds spent in them on behalf of one request"""
+
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+_request_db: contextvars.ContextVar[Optional[RequestDBTime]] = contextvars.ContextVar("request_db", default=None)
+
+_STATEMENT_KINDS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "BEGIN", "COMMIT", "ROLLBACK", "PRAGMA"}
+
+
+def _statement_kind(statement: str) -> str:
+    kind = statement.lstrip()[:8].split(None, 1)[0].upper() if statement.strip() else ""
+    return kind if kind in _STATEMENT_KINDS else OTHER
+
+
+def instrument_engine(engine: Engine):
+    """Time every query on a (sync, or an async engine's sync_engine) engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info["metrics_query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def end_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("metrics_query_started", time.perf_counter())
+        db_query_duration.labels(_statement_kind(statement)).observe(elapsed)
+        request = _request_db.get()
+        if request is not None:
+            request.queries += 1
+            request.seconds += elapsed
+
+
+class MetricsMiddleware:
+    """Record each HTTP request's latency and database use under its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        db = RequestDBTime()
+        token = _request_db.set(db)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_db.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            http_request_duration.labels(scope["method"], path, str(status)).observe(time.perf_counter() - started)
+            http_request_db_queries.labels(path).observe(db.queries)
+            http_request_db_seconds.labels(path).observe(db.seconds)
@@ -1,7 +1,7 @@
 # app/models/__init__.py
 from app.models.user import User
 from app.models.workspace import Workspace, WorkspaceMember, WorkspaceRole
-from app.models.chart import Chart, ChartType
+from app.models.chart import Chart, ChartSeries, ChartType
 
 __all__ = [
     "User",
@@ -9,5 +9,6 @@ __all__ = [
     "WorkspaceMember",
     "WorkspaceRole",
     "Chart",
+    "ChartSeries",
     "ChartType",
 ]
\ No newline at end of file
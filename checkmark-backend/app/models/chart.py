@@ -1,9 +1,11 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Enum
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Enum, Index, Integer, LargeBinary
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm.attributes import flag_modified
 from datetime import datetime
 import uuid
 import enum
 from app.database import Base
+from app.series import join_series, split_series
 
 class ChartType(str, enum.Enum):
     SCATTER_3D = "scatter3D"
@@ -14,17 +16,62 @@ class ChartType(str, enum.Enum):
 
 class Chart(Base):
     __tablename__ = "charts"
+    # Workspace lookups and keyset pages of a workspace (app.pagination) in one index
+    __table_args__ = (
+        Index("ix_charts_workspace_id_updated_at_id", "workspace_id", "updated_at", "id"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(200), nullable=False)
     type = Column(Enum(ChartType), nullable=False)
     workspace_id = Column(String(36), ForeignKey("workspaces.id"), nullable=False)
     config = Column(JSON)  # ECharts configuration
-    data = Column(JSON)    # Chart data
+    # Chart data with large numeric arrays moved to chart_series; rows written
+    # before that split simply hold the full data and no series
+    data_layout = Column("data", JSON)
     created_by = Column(String(36), ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped by every write; chart_patch messages carry it so clients can spot gaps
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     # Relationships
     workspace = relationship("Workspace", back_populates="charts")
-    creator = relationship("User", back_populates="created_charts")
\ No newline at end of file
+    creator = relationship("User", back_populates="created_charts")
+    # Loaded only when data is read
+    series = relationship(
+        "ChartSeries",
+        back_populates="chart",
+        cascade="all, delete-orphan",
+        order_by="ChartSeries.position",
+    )
+
+    @property
+    def data(self):
+        """Chart data, reassembled from the layout and its packed series"""
+        return join_series(self.data_layout, self.series)
+
+    @data.setter
+    def data(self, value):
+        layout, packed = split_series(value)
+        self.data_layout = layout
+        # Always emit an UPDATE so updated_at (and the ETag) move even when
+        # only packed numbers changed and the layout compares equal
+        flag_modified(self, "data_layout")
+        self.series = [
+            ChartSeries(position=position, dtype=series.dtype, shape=series.shape, values=series.values)
+            for position, series in enumerate(packed)
+        ]
+
+class ChartSeries(Base):
+    __tablename__ = "chart_series"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    chart_id = Column(String(36), ForeignKey("charts.id"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)  # n in the layout's {"$series": n}
+    dtype = Column(String(8), nullable=False)   # "<f8" or "<i8"
+    shape = Column(JSON, nullable=False)        # [n] or [n, k]
+    values = Column(LargeBinary, nullable=False)
+
+    # Relationships
+    chart = relationship("Chart", back_populates="series")
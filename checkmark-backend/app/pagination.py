@@ -0,0 +1,63 @@
+# app/pagination.py
+"""Keyset pagination on (updated_at, id), newest first.
+
+A page request carries `limit` and an opaque `cursor` naming the last row
+of the previous page. The next page is the rows strictly after it in
+(updated_at DESC, id DESC) order: one index range scan whatever the page
+number, where OFFSET would re-read every earlier row. The cursor for the
+following page is returned in the X-Next-Cursor header, absent on the last
+page. A row updated while a client pages moves to the front, so that pass
+may miss it; the next refresh picks it up.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import literal, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    """Cursor was not produced by encode_cursor"""
+
+
+def encode_cursor(updated_at: datetime, row_id: str) -> str:
+    raw = json.dumps([updated_at.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(updated_at), str(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+def keyset(query, updated_at_column, id_column, cursor: Optional[str], limit: Optional[int]):
+    """Order query newest first and restrict it to the page after cursor
+
+    Fetches one row more than limit, so split_page can tell whether another
+    page follows. Raises InvalidCursor.
+    """
+    query = query.order_by(updated_at_column.desc(), id_column.desc())
+    if cursor:
+        updated_at, row_id = decode_cursor(cursor)
+        # A row-value comparison, which the index range scan can seek on (an OR cannot)
+        query = query.filter(tuple_(updated_at_column, id_column) < tuple_(
+            literal(updated_at, updated_at_column.type), literal(row_id, id_column.type)
+        ))
+    if limit is not None:
+        query = query.limit(limit + 1)
+    return query
+
+
+def split_page(rows: list, limit: Optional[int]) -> Tuple[List, Optional[str]]:
+    """(rows of this page, cursor of the next page or None)"""
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].updated_at, rows[-1].id)
@@ -0,0 +1,255 @@
+# app/patch.py
+"""JSON-Patch style deltas (RFC 6902 add/remove/replace/test) for chart documents.
+
+Paths are JSON Pointers (RFC 6901) rooted at the chart: /name, /type,
+/config/..., /data/... . A number replaced inside a packed series is written
+straight into its buffer; any other change to data falls back to editing the
+reassembled data, which is split again on save.
+"""
+import copy
+import math
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.models.chart import ChartType
+from app.series import SERIES_REF
+
+OPERATIONS = ("add", "remove", "replace", "test")
+SCALAR_FIELDS = ("name", "type")
+
+# charts.name is a non-null String(200)
+NAME_MAX_LENGTH = 200
+
+_INT64_MIN = -(2 ** 63)
+_INT64_MAX = 2 ** 63 - 1
+
+_UNSET = object()
+
+
+class PatchError(ValueError):
+    """Operation is malformed or does not apply to the document"""
+
+
+class PatchTestFailed(PatchError):
+    """A "test" operation did not match"""
+
+
+def pointer_tokens(path: str) -> List[str]:
+    if path == "":
+        return []
+    if not path.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer: {path!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in path[1:].split("/")]
+
+
+def _index(token: str, length: int, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return length
+    if not token.isdigit() or (len(token) > 1 and token[0] == "0"):
+        raise PatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > length or (index == length and not allow_end):
+        raise PatchError(f"Array index out of range: {index}")
+    return index
+
+
+def _parent(document: Any, tokens: List[str]) -> Any:
+    node = document
+    for token in tokens[:-1]:
+        if isinstance(node, dict):
+            if token not in node:
+                raise PatchError(f"Path not found: {token!r}")
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_index(token, len(node))]
+        else:
+            raise PatchError(f"Cannot descend into {type(node).__name__}")
+    return node
+
+
+def _get(document: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        return document
+    parent = _parent(document, tokens)
+    token = tokens[-1]
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise PatchError(f"Path not found: {token!r}")
+        return parent[token]
+    if isinstance(parent, list):
+        return parent[_index(token, len(parent))]
+    raise PatchError(f"Cannot descend into {type(parent).__name__}")
+
+
+def apply_operation(document: Any, op: str, tokens: List[str], value: Any = None) -> Any:
+    """Apply one operation to a plain JSON document in place; returns the (new) root"""
+    if op == "test":
+        if _get(document, tokens) != value:
+            raise PatchTestFailed("Test operation failed")
+        return document
+    if not tokens:
+        if op == "remove":
+            return None
+        return copy.deepcopy(value)
+
+    parent = _parent(document, tokens)
+    token = tokens[-1]
+    if isinstance(parent, dict):
+        if op == "remove" or op == "replace":
+            if token not in parent:
+                raise PatchError(f"Path not found: {token!r}")
+        if op == "remove":
+            del parent[token]
+        else:
+            parent[token] = copy.deepcopy(value)
+    elif isinstance(parent, list):
+        index = _index(token, len(parent), allow_end=(op == "add"))
+        if op == "add":
+            parent.insert(index, copy.deepcopy(value))
+        elif op == "remove":
+            del parent[index]
+        else:
+            parent[index] = copy.deepcopy(value)
+    else:
+        raise PatchError(f"Cannot descend into {type(parent).__name__}")
+    return document
+
+
+def scalar_value(field: str, value: Any) -> Any:
+    """value checked as what the charts column for /name or /type holds"""
+    if field == "name":
+        if not isinstance(value, str) or not value.strip():
+            raise PatchError("/name must be a non-empty string")
+        if len(value) > NAME_MAX_LENGTH:
+            raise PatchError(f"/name is longer than {NAME_MAX_LENGTH} characters")
+        return value
+    if not isinstance(value, str) or value not in ChartType._value2member_map_:
+        raise PatchError(f"/type must be one of {', '.join(item.value for item in ChartType)}")
+    return ChartType(value)
+
+
+def _is_object(value: Any) -> bool:
+    return value is None or isinstance(value, dict)
+
+
+def check_chart(chart):
+    """Raise PatchError unless chart can be written to the charts table and read back as a Chart"""
+    for field in SCALAR_FIELDS:
+        scalar_value(field, getattr(chart, field))
+    if not _is_object(chart.config):
+        raise PatchError("/config must be an object or null")
+    # A layout that is a bare series reference is a packed top-level array
+    layout = chart.data_layout
+    if not _is_object(layout) or (isinstance(layout, dict) and len(layout) == 1 and SERIES_REF in layout):
+        raise PatchError("/data must be an object or null")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def locate_packed(layout: Any, tokens: List[str]) -> Optional[Tuple[int, List[str]]]:
+    """(series position, tokens inside the series) when tokens point into a packed series"""
+    node = layout
+    for position, token in enumerate(tokens):
+        if isinstance(node, dict) and len(node) == 1 and SERIES_REF in node:
+            return node[SERIES_REF], tokens[position:]
+        if isinstance(node, dict):
+            if token not in node:
+                return None
+            node = node[token]
+        elif isinstance(node, list):
+            if not token.isdigit() or int(token) >= len(node):
+                return None
+            node = node[int(token)]
+        else:
+            return None
+    return None
+
+
+def packed_element(series, tokens: List[str], value: Any) -> Optional[Tuple[str, int]]:
+    """(struct format, byte offset) for replacing one number of series in place
+
+    None when the write cannot be done in place (out of range, not a number,
+    or a float into an integer series).
+    """
+    if len(tokens) != len(series.shape) or not all(token.isdigit() for token in tokens):
+        return None
+    indices = [int(token) for token in tokens]
+    if any(index >= size for index, size in zip(indices, series.shape)):
+        return None
+    if not _is_number(value):
+        return None
+    if series.dtype == "<i8":
+        if not isinstance(value, int) or not _INT64_MIN <= value <= _INT64_MAX:
+            return None
+        fmt = "<q"
+    else:
+        if not math.isfinite(value):
+            return None
+        fmt = "<d"
+
+    flat = indices[0] if len(indices) == 1 else indices[0] * series.shape[1] + indices[1]
+    return fmt, flat * 8
+
+
+def apply_chart_patch(chart, operations: List[Dict[str, Any]]):
+    """Apply operations to a Chart row in place
+
+    Raises PatchError (nothing is guaranteed about the row then; roll back).
+    """
+    buffers: Dict[int, bytearray] = {}
+    config = _UNSET
+    data = _UNSET  # reassembled only once an operation cannot be done in place
+
+    for operation in operations:
+        op = operation["op"]
+        if op not in OPERATIONS:
+            raise PatchError(f"Unsupported operation: {op!r}")
+        tokens = pointer_tokens(operation["path"])
+        value = operation.get("value")
+        if not tokens:
+            raise PatchError("Cannot patch the chart root")
+        field, rest = tokens[0], tokens[1:]
+
+        if field in SCALAR_FIELDS:
+            if rest or op not in ("replace", "test"):
+                raise PatchError(f"Only replace/test apply to /{field}")
+            if op == "test":
+                if getattr(chart, field) != value:
+                    raise PatchTestFailed("Test operation failed")
+            else:
+                setattr(chart, field, scalar_value(field, value))
+        elif field == "config":
+            if config is _UNSET:
+                config = copy.deepcopy(chart.config)
+            if config is None and rest:
+                config = {}  # a chart without config gets one on its first keyed write
+            config = apply_operation(config, op, rest, value)
+        elif field == "data":
+            if data is _UNSET and op == "replace":
+                located = locate_packed(chart.data_layout, rest)
+                if located is not None and located[0] < len(chart.series):
+                    series = chart.series[located[0]]
+                    element = packed_element(series, located[1], value)
+                    if element is not None:
+                        buffer = buffers.setdefault(located[0], bytearray(series.values))
+                        struct.pack_into(element[0], buffer, element[1], value)
+                        continue
+            if data is _UNSET:
+                for position, buffer in buffers.items():
+                    chart.series[position].values = bytes(buffer)
+                buffers.clear()
+                data = chart.data
+            if data is None and rest:
+                data = {}
+            data = apply_operation(data, op, rest, value)
+        else:
+            raise PatchError(f"Unknown chart field: /{field}")
+
+    for position, buffer in buffers.items():
+        chart.series[position].values = bytes(buffer)
+    if config is not _UNSET:
+        chart.config = config
+    if data is not _UNSET:
+        chart.data = data
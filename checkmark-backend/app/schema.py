@@ -0,0 +1,140 @@
+# app/schema.py
+"""Database schema: migrated by Alembic as a separate step, checked at startup.
+
+Migrations (migrations/versions) are applied once per deploy, before any
+worker starts:
+
+    alembic upgrade head          # or: python -m app.schema upgrade
+
+and each worker's lifespan only runs startup(), which per db_schema_startup:
+  check    reads the revision in alembic_version (one query) and refuses to
+           start unless it is HEAD (the default)
+  upgrade  applies the migrations itself; for a single process, since
+           workers starting together would race
+  create   Base.metadata.create_all, for scratch databases (benchmarks);
+           leaves no revision behind, so check fails on them
+  off      nothing
+
+Importing Alembic and loading the scripts costs more than the rest of a
+worker's startup, so HEAD is kept here by hand: a new migration updates it,
+and `python -m app.schema check` (run by upgrade as well) fails when it
+does not name the latest script.
+"""
+import argparse
+import logging.config
+import os
+from typing import Optional
+
+from sqlalchemy import exc, text
+from sqlalchemy.engine import Connection
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import Base, get_async_engine, get_engine
+
+# The latest revision in migrations/versions
+HEAD = "0005_chart_keyset_index"
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+STARTUP_MODES = ("check", "upgrade", "create", "off")
+
+
+class SchemaError(RuntimeError):
+    """The database is not at the revision this code expects"""
+
+
+def current_revision(conn: Connection) -> Optional[str]:
+    """The revision in alembic_version, or None when Alembic never ran on the database"""
+    try:
+        return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except (exc.OperationalError, exc.ProgrammingError):
+        return None
+
+
+def verify(revision: Optional[str]):
+    if revision == HEAD:
+        return
+    if revision is None:
+        raise SchemaError(
+            f"The database has no schema revision, expected {HEAD}: run `alembic upgrade head`, "
+            "or `alembic stamp head` if create_all built its tables from the current models"
+        )
+    raise SchemaError(f"The database is at schema revision {revision}, expected {HEAD}: run `alembic upgrade head`")
+
+
+def _alembic_config():
+    from alembic.config import Config
+
+    cfg = Config(ALEMBIC_INI)
+    # env.py would otherwise fileConfig(alembic.ini), disabling the app's loggers
+    cfg.attributes["configure_logger"] = False
+    return cfg
+
+
+def script_head() -> str:
+    """The latest revision among the migration scripts (imports Alembic)"""
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(_alembic_config()).get_current_head()
+
+
+def check_head():
+    head = script_head()
+    if head != HEAD:
+        raise SchemaError(f"app.schema.HEAD is {HEAD} but the latest migration is {head}: update HEAD")
+
+
+def upgrade(revision: str = "head"):
+    """Apply the migrations up to revision, on settings.database_url"""
+    from alembic import command
+
+    check_head()
+    command.upgrade(_alembic_config(), revision)
+
+
+def create():
+    import app.models  # noqa: F401  (registers every table on Base.metadata)
+
+    Base.metadata.create_all(bind=get_engine())
+
+
+def check():
+    with get_engine().connect() as conn:
+        verify(current_revision(conn))
+
+
+async def startup(mode: str = settings.db_schema_startup):
+    """What the lifespan does to the schema before serving, per db_schema_startup"""
+    if mode not in STARTUP_MODES:
+        raise ValueError(f"db_schema_startup must be one of {', '.join(STARTUP_MODES)}, got {mode!r}")
+    if mode == "check":
+        # Through the engine requests will use, which this creates
+        if settings.db_async:
+            async with get_async_engine().connect() as conn:
+                verify(await conn.run_sync(current_revision))
+        else:
+            await run_in_threadpool(check)
+    elif mode == "upgrade":
+        await run_in_threadpool(upgrade)
+    elif mode == "create":
+        await run_in_threadpool(create)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate or check the database schema (settings.database_url)")
+    parser.add_argument("action", choices=["upgrade", "check"])
+    args = parser.parse_args()
+    # Alembic's progress lines, as the alembic command logs them
+    logging.config.fileConfig(ALEMBIC_INI, disable_existing_loggers=False)
+
+    if args.action == "upgrade":
+        upgrade()
+    else:
+        check_head()
+        check()
+    print(f"Database schema is at {HEAD}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,24 @@ from app.schemas.workspace import (
     WorkspaceCreate,
     WorkspaceUpdate,
     WorkspaceMemberInfo,
+    WorkspaceImportResult,
+)
+from app.schemas.chart import (
+    Chart,
+    ChartCreate,
+    ChartUpdate,
+    ChartColumnarHeader,
+    SeriesInfo,
+    PatchOperation,
+    ChartPatch,
+    ChartPatchResult,
+    ChartBatch,
+    ChartBatchCreate,
+    ChartBatchUpdate,
+    ChartBatchDelete,
+    ChartBatchItemResult,
+    ChartBatchResult,
 )
-from app.schemas.chart import Chart, ChartCreate, ChartUpdate
 
 __all__ = [
     "User",
@@ -16,7 +32,19 @@ __all__ = [
     "WorkspaceCreate",
     "WorkspaceUpdate",
     "WorkspaceMemberInfo",
+    "WorkspaceImportResult",
     "Chart",
     "ChartCreate",
     "ChartUpdate",
+    "ChartColumnarHeader",
+    "SeriesInfo",
+    "PatchOperation",
+    "ChartPatch",
+    "ChartPatchResult",
+    "ChartBatch",
+    "ChartBatchCreate",
+    "ChartBatchUpdate",
+    "ChartBatchDelete",
+    "ChartBatchItemResult",
+    "ChartBatchResult",
 ]
\ No newline at end of file
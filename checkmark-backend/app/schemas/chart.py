@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, Any, Dict
+from typing import Annotated, Optional, Any, Dict, List, Literal, Union
 
 class ChartBase(BaseModel):
     name: str
@@ -23,6 +23,81 @@ class Chart(ChartBase):
     created_by: str
     created_at: datetime
     updated_at: datetime
+    version: int = 1
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PatchOperation(BaseModel):
+    """One JSON-Patch operation; a bare {path, value} delta means replace"""
+    op: Literal["add", "remove", "replace", "test"] = "replace"
+    path: str
+    value: Any = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.op == "remove":
+            return {"op": self.op, "path": self.path}
+        return {"op": self.op, "path": self.path, "value": self.value}
+
+class ChartPatch(BaseModel):
+    ops: List[PatchOperation]
+    base_version: Optional[int] = None  # reject unless the chart is still at this version
+
+class ChartPatchResult(BaseModel):
+    id: str
+    workspace_id: str
+    version: int
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ChartBatchCreate(BaseModel):
+    op: Literal["create"]
+    chart: ChartBase
+
+class ChartBatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: str
+    chart: ChartUpdate
+    base_version: Optional[int] = None  # reject the whole batch unless the chart is still at this version
+
+class ChartBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: str
+
+ChartBatchOperation = Annotated[
+    Union[ChartBatchCreate, ChartBatchUpdate, ChartBatchDelete], Field(discriminator="op")
+]
+
+class ChartBatch(BaseModel):
+    operations: List[ChartBatchOperation]
+
+class ChartBatchItemResult(BaseModel):
+    op: str
+    id: str
+    chart: Optional[Chart] = None  # None for deletes
+
+class ChartBatchResult(BaseModel):
+    """One result per operation, in request order"""
+    results: List[ChartBatchItemResult]
+
+class SeriesInfo(BaseModel):
+    dtype: str  # "<f8" or "<i8"
+    shape: List[int]
+    offset: int  # bytes from the end of the header
+    length: int  # bytes
+
+class ChartColumnarHeader(BaseModel):
+    """JSON header of the binary chart form (see app.columnar)"""
+    id: str
+    name: str
+    type: str
+    workspace_id: str
+    created_by: str
+    created_at: datetime
+    updated_at: datetime
+    version: int
+    config: Optional[Dict[str, Any]] = None
+    layout: Optional[Dict[str, Any]] = None
+    series: List[SeriesInfo] = []
@@ -43,4 +43,10 @@ class WorkspaceList(WorkspaceBase):
     owner: User
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class WorkspaceImportResult(BaseModel):
+    workspace: Workspace
+    users: int  # created; the others already existed
+    members: int
+    charts: int
@@ -0,0 +1,159 @@
+# app/serialization.py
+"""Fast JSON responses: database rows straight to JSON bytes, skipping the schema round trips.
+
+By default a read validates ORM objects into schema models
+(from_attributes, walking owner -> members -> user), FastAPI validates the
+returned model against response_model again and dumps it to Python
+objects, and json.dumps encodes those. With fast_serialization the
+workspace, chart list and chart reads instead:
+  - select row tuples (no ORM objects) through app.crud
+  - build dicts laid out like the response schemas, key for key
+  - encode them once with orjson and send the bytes in a JSONBytesResponse
+
+Chart config and data layouts are selected as their stored JSON text and
+spliced into the output as is (orjson.Fragment), never parsed; only a
+layout with packed series is parsed, to put the arrays, decoded from their
+buffers, in place. Encoded bodies are cached with their version under
+app.cache.json_key(), and invalidated with the read they encode.
+
+Needs orjson, which ships with fastapi[all].
+"""
+from typing import Optional
+
+from fastapi.responses import Response
+
+from app.config import settings
+from app.crud import chart as chart_crud
+from app.crud import workspace as workspace_crud
+from app.etag import build_workspace_version, chart_version, charts_version
+from app.series import join_series
+from app.websocket.encoding import orjson
+
+if settings.fast_serialization and orjson is None:
+    raise RuntimeError("CHECKMARK_FAST_SERIALIZATION needs orjson, which is not installed")
+
+
+class JSONBytesResponse(Response):
+    """application/json from already encoded bytes (or anything orjson encodes)"""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content)
+
+
+class Encoded:
+    """A response body and the version (app.etag) of what it encodes"""
+
+    __slots__ = ("version", "body")
+
+    def __init__(self, version: tuple, body: bytes):
+        self.version = version
+        self.body = body
+
+
+def _user(name, email, avatar_url, user_id, created_at, updated_at) -> dict:
+    return {
+        "name": name,
+        "email": email,
+        "avatar_url": avatar_url,
+        "id": user_id,
+        "created_at": created_at,
+        "updated_at": updated_at,
+    }
+
+
+def load_workspace(db, workspace_id: str) -> Optional[Encoded]:
+    """A workspace as the Workspace schema serializes it"""
+    rows = workspace_crud.get_workspace_rows(db, workspace_id)
+    if rows is None:
+        return None
+    workspace, members = rows
+    body = orjson.dumps({
+        "name": workspace.name,
+        "description": workspace.description,
+        "id": workspace.id,
+        "owner_id": workspace.owner_id,
+        "created_at": workspace.created_at,
+        "updated_at": workspace.updated_at,
+        "owner": _user(
+            workspace.owner_name, workspace.owner_email, workspace.owner_avatar_url,
+            workspace.owner_id, workspace.owner_created_at, workspace.owner_updated_at,
+        ),
+        "members": [
+            {
+                "id": member.id,
+                "user_id": member.user_id,
+                "role": member.role,
+                "joined_at": member.joined_at,
+                "user": _user(
+                    member.name, member.email, member.avatar_url,
+                    member.user_id, member.created_at, member.updated_at,
+                ),
+            }
+            for member in members
+        ],
+    })
+    version = build_workspace_version(
+        workspace.id, workspace.updated_at, workspace.owner_id, workspace.owner_updated_at,
+        [(member.id, member.role, member.user_id, member.updated_at) for member in members],
+    )
+    return Encoded(version, body)
+
+
+def encode_workspace_list(workspaces: list) -> bytes:
+    """Workspaces (ORM objects with their owner loaded) as the WorkspaceList schema serializes them"""
+    return orjson.dumps([
+        {
+            "name": workspace.name,
+            "description": workspace.description,
+            "id": workspace.id,
+            "owner_id": workspace.owner_id,
+            "created_at": workspace.created_at,
+            "updated_at": workspace.updated_at,
+            "owner": _user(
+                workspace.owner.name, workspace.owner.email, workspace.owner.avatar_url,
+                workspace.owner.id, workspace.owner.created_at, workspace.owner.updated_at,
+            ),
+        }
+        for workspace in workspaces
+    ])
+
+
+def _raw(text: Optional[str]):
+    return orjson.Fragment(text) if text is not None else None
+
+
+def _chart(row, series: list) -> dict:
+    return {
+        "name": row.name,
+        "type": row.type,
+        "config": _raw(row.config),
+        # Without series the layout is the whole data; with them it has {"$series": n} to fill in
+        "data": join_series(orjson.loads(row.data), series) if series and row.data else _raw(row.data),
+        "id": row.id,
+        "workspace_id": row.workspace_id,
+        "created_by": row.created_by,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+        "version": row.version,
+    }
+
+
+def load_charts(db, workspace_id: str) -> Encoded:
+    """A workspace's charts as List[Chart] serializes them"""
+    charts, series = chart_crud.get_chart_rows(db, workspace_id=workspace_id)
+    body = orjson.dumps([_chart(row, series.get(row.id)) for row in charts])
+    return Encoded(charts_version(charts), body)
+
+
+def load_chart(db, chart_id: str) -> Optional[Encoded]:
+    """A chart as the Chart schema serializes it"""
+    charts, series = chart_crud.get_chart_rows(db, chart_id=chart_id)
+    if not charts:
+        return None
+    row = charts[0]
+    return Encoded(chart_version(row), orjson.dumps(_chart(row, series.get(row.id))))
+
@@ -0,0 +1,131 @@
+# app/series.py
+"""Packing of chart numeric arrays into compact binary blobs.
+
+Chart data is free-form JSON (labels, datasets, series, ...). Large arrays of
+numbers, flat or rectangular (e.g. [[x, y, z], ...]), are lifted out into
+packed little-endian buffers and replaced in the remaining "layout" by a
+{"$series": n} placeholder. Everything else stays inline as JSON.
+"""
+import math
+import sys
+from array import array
+from typing import Any, List, Optional, Sequence, Tuple
+
+SERIES_REF = "$series"
+
+# Arrays with fewer numbers than this are cheaper to keep inline
+MIN_PACKED_VALUES = 64
+
+_INT64_MIN = -(2 ** 63)
+_INT64_MAX = 2 ** 63 - 1
+
+# dtype -> array typecode; both are 8 bytes wide on every supported platform
+TYPECODES = {"<f8": "d", "<i8": "q"}
+
+
+class PackedSeries:
+    """One numeric array: dtype, shape and little-endian bytes"""
+
+    __slots__ = ("dtype", "shape", "values")
+
+    def __init__(self, dtype: str, shape: List[int], values: bytes):
+        self.dtype = dtype
+        self.shape = shape
+        self.values = values
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _numeric_shape(value: list) -> Optional[List[int]]:
+    """[n] or [n, k] when value is a flat or rectangular array of numbers"""
+    if not value:
+        return None
+    first = value[0]
+    if _is_number(first):
+        return [len(value)] if all(_is_number(v) for v in value) else None
+    if isinstance(first, list) and first and all(_is_number(v) for v in first):
+        width = len(first)
+        for row in value:
+            if not isinstance(row, list) or len(row) != width or not all(_is_number(v) for v in row):
+                return None
+        return [len(value), width]
+    return None
+
+
+def _flatten(value: list, shape: List[int]) -> list:
+    if len(shape) == 1:
+        return value
+    return [v for row in value for v in row]
+
+
+def _pack(flat: list, shape: List[int]) -> Optional[PackedSeries]:
+    if all(isinstance(v, int) for v in flat):
+        if not all(_INT64_MIN <= v <= _INT64_MAX for v in flat):
+            return None
+        dtype = "<i8"
+    else:
+        if not all(math.isfinite(v) for v in flat):
+            return None  # keep NaN/Infinity inline so they round-trip unchanged
+        dtype = "<f8"
+
+    buffer = array(TYPECODES[dtype], flat)
+    if sys.byteorder == "big":
+        buffer.byteswap()
+    return PackedSeries(dtype, shape, buffer.tobytes())
+
+
+def unpack_flat(dtype: str, values: bytes) -> array:
+    buffer = array(TYPECODES[dtype])
+    buffer.frombytes(values)
+    if sys.byteorder == "big":
+        buffer.byteswap()
+    return buffer
+
+
+def unpack(series: PackedSeries) -> list:
+    flat = unpack_flat(series.dtype, series.values).tolist()
+    if len(series.shape) == 1:
+        return flat
+    width = series.shape[1]
+    return [flat[i:i + width] for i in range(0, len(flat), width)]
+
+
+def split_series(data: Any) -> Tuple[Any, List[PackedSeries]]:
+    """Lift large numeric arrays out of data; returns (layout, packed series)"""
+    packed: List[PackedSeries] = []
+
+    def walk(value):
+        if isinstance(value, dict):
+            return {key: walk(item) for key, item in value.items()}
+        if isinstance(value, list):
+            shape = _numeric_shape(value)
+            if shape is not None and math.prod(shape) >= MIN_PACKED_VALUES:
+                series = _pack(_flatten(value, shape), shape)
+                if series is not None:
+                    packed.append(series)
+                    return {SERIES_REF: len(packed) - 1}
+            if shape is not None:
+                return value
+            return [walk(item) for item in value]
+        return value
+
+    return walk(data), packed
+
+
+def join_series(layout: Any, series: Sequence[PackedSeries]) -> Any:
+    """Inverse of split_series"""
+    if not series:
+        return layout
+
+    def walk(value):
+        if isinstance(value, dict):
+            if len(value) == 1 and SERIES_REF in value:
+                return unpack(series[value[SERIES_REF]])
+            return {key: walk(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [walk(item) for item in value]
+        return value
+
+    return walk(layout)
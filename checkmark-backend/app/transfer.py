@@ -0,0 +1,328 @@
+# app/transfer.py
+"""Workspace export and import as NDJSON (one JSON document per line) in bounded memory.
+
+Format 1, in this order:
+  {"kind": "workspace", "format": 1, "workspace": {...}}
+  {"kind": "user", "user": {...}}      owner, members and chart creators
+  {"kind": "member", "member": {...}}
+  {"kind": "chart", "chart": {..., "layout": ..., "series": [{"dtype", "shape", "values"}]}}
+
+Charts travel in their stored split (app.series): packed arrays as base64
+of their little-endian bytes, so neither side formats or parses floats and
+values round-trip exactly.
+
+Export reads charts joined to their series through one server-side cursor
+(stream_results/yield_per) and writes a line per chart, so memory is bounded
+by the largest chart, not the workspace. Import parses the body line by line
+and inserts charts and series in chunks with executemany, all in one
+transaction: a bad line leaves nothing behind. On SQLite that transaction
+holds the write lock for the whole import.
+
+Imported workspaces, members and charts get new ids, so a workspace can be
+imported next to its source. Users are matched by id, then by email, and
+created when neither exists. Both directions run on a sync engine
+connection from the threadpool, whichever DB mode the app uses.
+"""
+import base64
+import math
+import uuid
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import insert, or_, select, union
+
+from app.config import settings
+from app.database import get_engine
+from app.models import Chart, ChartSeries, ChartType, User, Workspace, WorkspaceMember, WorkspaceRole
+from app.series import SERIES_REF, TYPECODES
+from app.websocket import encoding
+
+FORMAT = 1
+MEDIA_TYPE = "application/x-ndjson"
+
+charts = Chart.__table__
+chart_series = ChartSeries.__table__
+users = User.__table__
+workspaces = Workspace.__table__
+workspace_members = WorkspaceMember.__table__
+
+
+class InvalidImport(ValueError):
+    """The import body is not a workspace export this version can read"""
+
+
+def _line(kind: str, body: dict, **extra) -> bytes:
+    return (encoding.dumps({"kind": kind, **extra, kind: body}) + "\n").encode()
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _enum_value(value):
+    return getattr(value, "value", value)
+
+
+def iter_export(workspace_id: str) -> Iterator[bytes]:
+    """NDJSON lines of a workspace; yields nothing when it does not exist"""
+    with get_engine().connect() as conn:
+        workspace = conn.execute(select(workspaces).where(workspaces.c.id == workspace_id)).first()
+        if workspace is None:
+            return
+        yield _line("workspace", {
+            "id": workspace.id,
+            "name": workspace.name,
+            "description": workspace.description,
+            "owner_id": workspace.owner_id,
+            "created_at": _iso(workspace.created_at),
+            "updated_at": _iso(workspace.updated_at),
+        }, format=FORMAT)
+
+        referenced = union(
+            select(workspace_members.c.user_id).where(workspace_members.c.workspace_id == workspace_id),
+            select(charts.c.created_by).where(charts.c.workspace_id == workspace_id),
+        )
+        for user in conn.execute(
+            select(users).where(or_(users.c.id == workspace.owner_id, users.c.id.in_(referenced)))
+        ):
+            yield _line("user", {
+                "id": user.id, "name": user.name, "email": user.email, "avatar_url": user.avatar_url,
+            })
+
+        for member in conn.execute(
+            select(workspace_members).where(workspace_members.c.workspace_id == workspace_id)
+        ):
+            yield _line("member", {
+                "user_id": member.user_id, "role": _enum_value(member.role), "joined_at": _iso(member.joined_at),
+            })
+
+        rows = conn.execution_options(stream_results=True, yield_per=settings.transfer_yield_rows).execute(
+            select(
+                charts.c.id, charts.c.name, charts.c.type, charts.c.config, charts.c.data,
+                charts.c.created_by, charts.c.created_at, charts.c.updated_at, charts.c.version,
+                chart_series.c.position, chart_series.c.dtype, chart_series.c.shape, chart_series.c["values"],
+            )
+            .select_from(charts.outerjoin(chart_series, chart_series.c.chart_id == charts.c.id))
+            .where(charts.c.workspace_id == workspace_id)
+            # Along ix_charts_workspace_id_updated_at_id: only each chart's series get sorted, not the blobs of all
+            .order_by(charts.c.updated_at, charts.c.id, chart_series.c.position)
+        )
+        chart = None
+        for row in rows:
+            if chart is None or row.id != chart["id"]:
+                if chart is not None:
+                    yield _line("chart", chart)
+                chart = {
+                    "id": row.id,
+                    "name": row.name,
+                    "type": _enum_value(row.type),
+                    "config": row.config,
+                    "layout": row.data,
+                    "series": [],
+                    "created_by": row.created_by,
+                    "created_at": _iso(row.created_at),
+                    "updated_at": _iso(row.updated_at),
+                    "version": row.version,
+                }
+            if row.position is not None:
+                chart["series"].append({
+                    "dtype": row.dtype,
+                    "shape": row.shape,
+                    "values": base64.b64encode(row.values).decode(),
+                })
+        if chart is not None:
+            yield _line("chart", chart)
+
+
+def _datetime(value: Optional[str]) -> datetime:
+    return datetime.fromisoformat(value) if value else datetime.utcnow()
+
+
+def _series_refs(layout) -> Iterator:
+    """Every series reference in a stored data layout (app.series), in any position"""
+    if isinstance(layout, dict):
+        if len(layout) == 1 and SERIES_REF in layout:
+            yield layout[SERIES_REF]
+        else:
+            for value in layout.values():
+                yield from _series_refs(value)
+    elif isinstance(layout, list):
+        for value in layout:
+            yield from _series_refs(value)
+
+
+class WorkspaceImport:
+    """Incremental import: feed() body chunks as they arrive, then finish() or abort()
+
+    Owns a connection and its transaction; call every method from the same
+    worker thread pool, one at a time.
+    """
+
+    def __init__(self):
+        self.conn = get_engine().connect()
+        self.transaction = self.conn.begin()
+        self.workspace_id: Optional[str] = None
+        self.counts = {"users": 0, "members": 0, "charts": 0}
+        self._pending = bytearray()
+        self._line_number = 0
+        self._workspace: Optional[dict] = None  # inserted once the users it references are
+        self._user_ids: Dict[str, str] = {}  # exported id -> id here
+        self._chart_rows: List[dict] = []
+        self._series_rows: List[dict] = []
+        self._chunk_bytes = 0
+
+    def feed(self, data: bytes):
+        start = 0
+        while True:
+            end = data.find(b"\n", start)
+            if end < 0:
+                break
+            self._pending += data[start:end]
+            self._read_line(bytes(self._pending))
+            self._pending.clear()
+            start = end + 1
+        self._pending += data[start:]
+        if len(self._pending) > settings.transfer_max_line_bytes:
+            raise InvalidImport(f"Line {self._line_number + 1} exceeds {settings.transfer_max_line_bytes} bytes")
+
+    def finish(self) -> str:
+        """Commit; returns the new workspace id"""
+        if self._pending.strip():
+            self._read_line(bytes(self._pending))
+        if self._workspace is None and self.workspace_id is None:
+            raise InvalidImport("No workspace in the import")
+        self._insert_workspace()
+        self._insert_charts()
+        self.transaction.commit()
+        self.conn.close()
+        return self.workspace_id
+
+    def abort(self):
+        self.transaction.rollback()
+        self.conn.close()
+
+    def _read_line(self, line: bytes):
+        self._line_number += 1
+        if not line.strip():
+            return
+        try:
+            document = encoding.loads(line)
+            kind = document["kind"]
+            body = document[kind]
+        except (ValueError, KeyError, TypeError):
+            raise InvalidImport(f"Line {self._line_number}: not an export line")
+
+        if self._line_number == 1:
+            if kind != "workspace" or document.get("format") != FORMAT:
+                raise InvalidImport(f"Line 1: expected a format {FORMAT} workspace line")
+            self._workspace = body
+            return
+        try:
+            if kind == "user":
+                self._read_user(body)
+            elif kind == "member":
+                self._read_member(body)
+            elif kind == "chart":
+                self._read_chart(body)
+            else:
+                raise InvalidImport(f"Line {self._line_number}: unknown kind {kind!r}")
+        except (KeyError, TypeError, ValueError) as e:
+            if isinstance(e, InvalidImport):
+                raise
+            raise InvalidImport(f"Line {self._line_number}: invalid {kind}: {e}")
+
+    def _read_user(self, user: dict):
+        existing = self.conn.execute(
+            select(users.c.id).where(or_(users.c.id == user["id"], users.c.email == user["email"]))
+            .order_by((users.c.id == user["id"]).desc())
+        ).scalar()
+        if existing is None:
+            existing = user["id"]
+            now = datetime.utcnow()
+            self.conn.execute(insert(users).values(
+                id=existing, name=user["name"], email=user["email"], avatar_url=user.get("avatar_url"),
+                created_at=now, updated_at=now,
+            ))
+            self.counts["users"] += 1
+        self._user_ids[user["id"]] = existing
+
+    def _user(self, exported_id: str) -> str:
+        if exported_id not in self._user_ids:
+            raise InvalidImport(f"Line {self._line_number}: user {exported_id!r} has no user line")
+        return self._user_ids[exported_id]
+
+    def _insert_workspace(self):
+        if self._workspace is None:
+            return
+        workspace, self._workspace = self._workspace, None
+        self.workspace_id = str(uuid.uuid4())
+        self.conn.execute(insert(workspaces).values(
+            id=self.workspace_id,
+            name=workspace["name"],
+            description=workspace.get("description"),
+            owner_id=self._user(workspace["owner_id"]),
+            created_at=_datetime(workspace.get("created_at")),
+            updated_at=_datetime(workspace.get("updated_at")),
+        ))
+
+    def _read_member(self, member: dict):
+        self._insert_workspace()
+        self.conn.execute(insert(workspace_members).values(
+            id=str(uuid.uuid4()),
+            workspace_id=self.workspace_id,
+            user_id=self._user(member["user_id"]),
+            role=WorkspaceRole(member["role"]),
+            joined_at=_datetime(member.get("joined_at")),
+        ))
+        self.counts["members"] += 1
+
+    def _read_chart(self, chart: dict):
+        self._insert_workspace()
+        chart_id = str(uuid.uuid4())
+        # What the Chart schema reads back: objects or null, refs only to series that came along
+        config, layout, series_count = chart.get("config"), chart.get("layout"), len(chart.get("series") or [])
+        if config is not None and not isinstance(config, dict):
+            raise InvalidImport(f"Line {self._line_number}: chart config is not an object")
+        if layout is not None and (not isinstance(layout, dict) or (len(layout) == 1 and SERIES_REF in layout)):
+            raise InvalidImport(f"Line {self._line_number}: chart layout is not an object")
+        for ref in _series_refs(layout):
+            if not isinstance(ref, int) or isinstance(ref, bool) or not 0 <= ref < series_count:
+                raise InvalidImport(f"Line {self._line_number}: chart layout refers to series {ref!r}, "
+                                    f"which is not among its {series_count}")
+        for position, series in enumerate(chart.get("series") or []):
+            values = base64.b64decode(series["values"], validate=True)
+            shape = [int(size) for size in series["shape"]]
+            if series["dtype"] not in TYPECODES or len(values) != math.prod(shape) * 8:
+                raise InvalidImport(f"Line {self._line_number}: series {position} does not match its dtype/shape")
+            self._series_rows.append({
+                "id": str(uuid.uuid4()), "chart_id": chart_id, "position": position,
+                "dtype": series["dtype"], "shape": shape, "values": values,
+            })
+            self._chunk_bytes += len(values)
+        self._chart_rows.append({
+            "id": chart_id,
+            "name": chart["name"],
+            "type": ChartType(chart["type"]),
+            "workspace_id": self.workspace_id,
+            "config": config,
+            "data": layout,
+            "created_by": self._user(chart["created_by"]),
+            "created_at": _datetime(chart.get("created_at")),
+            "updated_at": _datetime(chart.get("updated_at")),
+            "version": chart.get("version") or 1,
+        })
+        self.counts["charts"] += 1
+        if (
+            len(self._chart_rows) >= settings.transfer_chunk_charts
+            or self._chunk_bytes >= settings.transfer_chunk_bytes
+        ):
+            self._insert_charts()
+
+    def _insert_charts(self):
+        if self._chart_rows:
+            self.conn.execute(insert(charts), self._chart_rows)
+        if self._series_rows:
+            self.conn.execute(insert(chart_series), self._series_rows)
+        self._chart_rows = []
+        self._series_rows = []
+        self._chunk_bytes = 0
@@ -0,0 +1,24 @@
+# app/websocket/__init__.py
+from app.websocket.backplane import (
+    Backplane,
+    InMemoryBackplane,
+    InMemoryHub,
+    LocalIPCBackplane,
+    RedisBackplane,
+    create_backplane,
+)
+from app.websocket.encoding import Frame
+from app.websocket.manager import ClientConnection, ConnectionManager, OverflowPolicy
+
+__all__ = [
+    "Backplane",
+    "ClientConnection",
+    "ConnectionManager",
+    "Frame",
+    "InMemoryBackplane",
+    "InMemoryHub",
+    "LocalIPCBackplane",
+    "OverflowPolicy",
+    "RedisBackplane",
+    "create_backplane",
+]
@@ -0,0 +1,462 @@
+# app/websocket/backplane.py
+import abc
+import asyncio
+import fcntl
+import logging
+import os
+import struct
+import uuid
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from app.websocket.encoding import Frame, dumps, loads
+
+if TYPE_CHECKING:
+    from app.websocket.manager import ConnectionManager
+
+logger = logging.getLogger(__name__)
+
+# workspace_id -> node_id -> user_ids connected on that node
+Registry = Dict[str, Dict[str, Set[str]]]
+
+
+def _registry_add(registry: Registry, workspace_id: str, node_id: str, user_id: str):
+    registry.setdefault(workspace_id, {}).setdefault(node_id, set()).add(user_id)
+
+
+def _registry_remove(registry: Registry, workspace_id: str, node_id: str, user_id: str):
+    nodes = registry.get(workspace_id)
+    if not nodes or node_id not in nodes:
+        return
+    nodes[node_id].discard(user_id)
+    if not nodes[node_id]:
+        del nodes[node_id]
+    if not nodes:
+        del registry[workspace_id]
+
+
+def _registry_drop_node(registry: Registry, node_id: str):
+    for workspace_id in list(registry):
+        registry[workspace_id].pop(node_id, None)
+        if not registry[workspace_id]:
+            del registry[workspace_id]
+
+
+def _registry_users(registry: Registry, workspace_id: str) -> Dict[str, str]:
+    return {
+        user_id: node_id
+        for node_id, user_ids in registry.get(workspace_id, {}).items()
+        for user_id in user_ids
+    }
+
+
+class Backplane(abc.ABC):
+    """Shares broadcasts and presence between ConnectionManagers in different processes
+
+    A manager delivers to its own sockets and publishes the same frame here;
+    frames published by other nodes come back through manager.deliver_local.
+    """
+
+    def __init__(self):
+        self.node_id = uuid.uuid4().hex
+        self.manager: Optional["ConnectionManager"] = None
+        self.dropped = 0
+
+    def bind(self, manager: "ConnectionManager"):
+        self.manager = manager
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    @abc.abstractmethod
+    def publish(self, workspace_id: str, frame: Frame, exclude_user: Optional[str] = None):
+        """Send a frame to every other node, without waiting on delivery"""
+
+    @abc.abstractmethod
+    def join(self, workspace_id: str, user_id: str):
+        """Announce a user connected on this node"""
+
+    @abc.abstractmethod
+    def leave(self, workspace_id: str, user_id: str):
+        """Announce a user disconnected from this node"""
+
+    @abc.abstractmethod
+    async def presence(self, workspace_id: str) -> Dict[str, str]:
+        """Users connected to the workspace on any node, mapped to their node id"""
+
+    def stats(self) -> dict:
+        return {"backend": type(self).__name__, "node_id": self.node_id, "dropped": self.dropped}
+
+    def _local_members(self):
+        if self.manager is None:
+            return []
+        return [
+            (workspace_id, user_id)
+            for workspace_id, connections in self.manager.active_connections.items()
+            for user_id in connections
+        ]
+
+    def _deliver(self, envelope: dict):
+        if self.manager is None:
+            return
+        frame = Frame(envelope["text"], envelope.get("type"), envelope.get("sender"))
+        self.manager.deliver_local(envelope["workspace"], frame, envelope.get("exclude"))
+
+
+class InMemoryHub:
+    """Shared state for InMemoryBackplane nodes living in the same process"""
+
+    def __init__(self):
+        self.nodes: Dict[str, "InMemoryBackplane"] = {}
+        self.registry: Registry = {}
+
+
+class InMemoryBackplane(Backplane):
+    """Backplane for managers in a single process; the default for one worker"""
+
+    def __init__(self, hub: Optional[InMemoryHub] = None):
+        super().__init__()
+        self.hub = hub or InMemoryHub()
+
+    async def start(self):
+        self.hub.nodes[self.node_id] = self
+
+    async def stop(self):
+        self.hub.nodes.pop(self.node_id, None)
+        _registry_drop_node(self.hub.registry, self.node_id)
+
+    def publish(self, workspace_id: str, frame: Frame, exclude_user: Optional[str] = None):
+        if len(self.hub.nodes) < 2:
+            return
+        envelope = {
+            "workspace": workspace_id,
+            "text": frame.text,
+            "type": frame.type,
+            "sender": frame.sender,
+            "exclude": exclude_user,
+        }
+        for node_id, node in list(self.hub.nodes.items()):
+            if node_id != self.node_id:
+                node._deliver(envelope)
+
+    def join(self, workspace_id: str, user_id: str):
+        _registry_add(self.hub.registry, workspace_id, self.node_id, user_id)
+
+    def leave(self, workspace_id: str, user_id: str):
+        _registry_remove(self.hub.registry, workspace_id, self.node_id, user_id)
+
+    async def presence(self, workspace_id: str) -> Dict[str, str]:
+        return _registry_users(self.hub.registry, workspace_id)
+
+
+# Length-prefixed JSON envelopes over the Unix socket
+_HEADER = struct.Struct("!I")
+# Frames are dropped rather than buffered without bound for a stalled peer
+MAX_WRITE_BUFFER = 8 * 1024 * 1024
+
+
+def _write_envelope(writer: asyncio.StreamWriter, envelope: dict) -> bool:
+    if writer.is_closing() or writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+        return False
+    body = dumps(envelope).encode()
+    writer.write(_HEADER.pack(len(body)) + body)
+    return True
+
+
+async def _read_envelope(reader: asyncio.StreamReader) -> dict:
+    header = await reader.readexactly(_HEADER.size)
+    (length,) = _HEADER.unpack(header)
+    return loads(await reader.readexactly(length))
+
+
+class _IPCHub:
+    """Relay run by whichever worker holds the lock file; every node connects to it"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.registry: Registry = {}
+        self.clients: Dict[str, asyncio.StreamWriter] = {}
+        self.dropped = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # stale socket from a hub that died
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        logger.info("Backplane hub listening on %s", self.path)
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+        for writer in self.clients.values():
+            writer.close()
+        self.clients.clear()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _forward(self, envelope: dict, origin: str):
+        for node_id, writer in list(self.clients.items()):
+            if node_id != origin and not _write_envelope(writer, envelope):
+                self.dropped += 1
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        node_id = None
+        try:
+            hello = await _read_envelope(reader)
+            node_id = hello["node"]
+            self.clients[node_id] = writer
+            _write_envelope(writer, {
+                "op": "snapshot",
+                "registry": {
+                    workspace_id: {node: list(users) for node, users in nodes.items()}
+                    for workspace_id, nodes in self.registry.items()
+                },
+            })
+
+            while True:
+                envelope = await _read_envelope(reader)
+                op = envelope["op"]
+                if op == "join":
+                    _registry_add(self.registry, envelope["workspace"], node_id, envelope["user"])
+                elif op == "leave":
+                    _registry_remove(self.registry, envelope["workspace"], node_id, envelope["user"])
+                self._forward(envelope, origin=node_id)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if node_id is not None and self.clients.get(node_id) is writer:
+                del self.clients[node_id]
+                _registry_drop_node(self.registry, node_id)
+                self._forward({"op": "drop_node", "node": node_id}, origin=node_id)
+            writer.close()
+
+
+class LocalIPCBackplane(Backplane):
+    """Backplane for several workers on one host, over a Unix domain socket
+
+    The first worker to take an flock on ``<path>.lock`` hosts the relay; the
+    rest connect to it. When the hosting worker exits its lock is released and
+    the surviving workers elect a new host and replay their presence.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.registry: Registry = {}
+        self._hub: Optional[_IPCHub] = None
+        self._lock_fd: Optional[int] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self._connected = asyncio.Event()
+
+    async def start(self):
+        self._task = asyncio.create_task(self._maintain())
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            logger.warning("Backplane not connected to %s yet, retrying in background", self.path)
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        if self._writer:
+            self._writer.close()
+        if self._hub:
+            await self._hub.stop()
+            self._hub = None
+        self._release_lock()
+
+    def _try_become_hub(self) -> bool:
+        if self._lock_fd is not None:
+            return True
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def _release_lock(self):
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    async def _maintain(self):
+        while True:
+            try:
+                if self._hub is None and self._try_become_hub():
+                    self._hub = _IPCHub(self.path)
+                    await self._hub.start()
+
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except (FileNotFoundError, ConnectionError):
+                await asyncio.sleep(0.1)
+                continue
+
+            self._writer = writer
+            try:
+                _write_envelope(writer, {"op": "hello", "node": self.node_id})
+                # Replay local presence so a newly elected hub learns about it
+                for workspace_id, user_id in self._local_members():
+                    _write_envelope(writer, {
+                        "op": "join", "node": self.node_id, "workspace": workspace_id, "user": user_id,
+                    })
+                self._connected.set()
+
+                while True:
+                    self._receive(await _read_envelope(reader))
+            except (asyncio.IncompleteReadError, ConnectionError):
+                logger.warning("Backplane connection to %s lost, reconnecting", self.path)
+            finally:
+                self._connected.clear()
+                self._writer = None
+                self.registry = {}
+                writer.close()
+
+    def _receive(self, envelope: dict):
+        op = envelope["op"]
+        if op == "publish":
+            self._deliver(envelope)
+        elif op == "join":
+            _registry_add(self.registry, envelope["workspace"], envelope["node"], envelope["user"])
+        elif op == "leave":
+            _registry_remove(self.registry, envelope["workspace"], envelope["node"], envelope["user"])
+        elif op == "drop_node":
+            _registry_drop_node(self.registry, envelope["node"])
+        elif op == "snapshot":
+            self.registry = {
+                workspace_id: {node: set(users) for node, users in nodes.items()}
+                for workspace_id, nodes in envelope["registry"].items()
+            }
+
+    def _send(self, envelope: dict):
+        if self._writer is None or not _write_envelope(self._writer, envelope):
+            self.dropped += 1
+
+    def publish(self, workspace_id: str, frame: Frame, exclude_user: Optional[str] = None):
+        self._send({
+            "op": "publish",
+            "workspace": workspace_id,
+            "text": frame.text,
+            "type": frame.type,
+            "sender": frame.sender,
+            "exclude": exclude_user,
+        })
+
+    def join(self, workspace_id: str, user_id: str):
+        self._send({"op": "join", "node": self.node_id, "workspace": workspace_id, "user": user_id})
+
+    def leave(self, workspace_id: str, user_id: str):
+        self._send({"op": "leave", "node": self.node_id, "workspace": workspace_id, "user": user_id})
+
+    async def presence(self, workspace_id: str) -> Dict[str, str]:
+        users = _registry_users(self.registry, workspace_id)
+        for user_id in self.manager.active_connections.get(workspace_id, {}) if self.manager else []:
+            users[user_id] = self.node_id
+        return users
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["path"] = self.path
+        stats["hub"] = self._hub is not None
+        if self._hub:
+            stats["nodes"] = len(self._hub.clients)
+            stats["hub_dropped"] = self._hub.dropped
+        return stats
+
+
+class RedisBackplane(Backplane):
+    """Backplane over Redis pub/sub for multiple hosts; needs the optional redis package"""
+
+    CHANNEL = "checkmark:ws"
+
+    def __init__(self, url: str):
+        super().__init__()
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("CHECKMARK_WS_BACKPLANE=redis requires the redis package") from e
+        self._redis = redis.from_url(url)
+        self._outbox: asyncio.Queue = asyncio.Queue(maxsize=10000)
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(self.CHANNEL)
+        self._tasks = [
+            asyncio.create_task(self._listen(pubsub)),
+            asyncio.create_task(self._drain()),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for workspace_id, user_id in self._local_members():
+            await self._redis.srem(self._presence_key(workspace_id), f"{user_id}@{self.node_id}")
+        await self._redis.aclose()
+
+    @staticmethod
+    def _presence_key(workspace_id: str) -> str:
+        return f"checkmark:presence:{workspace_id}"
+
+    def _enqueue(self, command: tuple):
+        try:
+            self._outbox.put_nowait(command)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _drain(self):
+        while True:
+            command, *args = await self._outbox.get()
+            try:
+                await getattr(self._redis, command)(*args)
+            except Exception as e:
+                logger.error("Redis backplane %s failed: %s", command, e)
+
+    async def _listen(self, pubsub):
+        async for message in pubsub.listen():
+            if message["type"] != "message":
+                continue
+            envelope = loads(message["data"])
+            if envelope["node"] != self.node_id:
+                self._deliver(envelope)
+
+    def publish(self, workspace_id: str, frame: Frame, exclude_user: Optional[str] = None):
+        self._enqueue(("publish", self.CHANNEL, dumps({
+            "node": self.node_id,
+            "workspace": workspace_id,
+            "text": frame.text,
+            "type": frame.type,
+            "sender": frame.sender,
+            "exclude": exclude_user,
+        })))
+
+    def join(self, workspace_id: str, user_id: str):
+        self._enqueue(("sadd", self._presence_key(workspace_id), f"{user_id}@{self.node_id}"))
+
+    def leave(self, workspace_id: str, user_id: str):
+        self._enqueue(("srem", self._presence_key(workspace_id), f"{user_id}@{self.node_id}"))
+
+    async def presence(self, workspace_id: str) -> Dict[str, str]:
+        members = await self._redis.smembers(self._presence_key(workspace_id))
+        users = {}
+        for member in members:
+            user_id, _, node_id = member.decode().rpartition("@")
+            users[user_id] = node_id
+        return users
+
+
+def create_backplane(kind: str, path: str, url: str) -> Backplane:
+    """Build the backplane named by CHECKMARK_WS_BACKPLANE"""
+    if kind == "memory":
+        return InMemoryBackplane()
+    if kind == "ipc":
+        return LocalIPCBackplane(path)
+    if kind == "redis":
+        return RedisBackplane(url)
+    raise ValueError(f"Unknown WebSocket backplane: {kind}")
@@ -0,0 +1,136 @@
+# app/websocket/charts.py
+"""Chart edits over WebSocket, applied to the live chart state (app.chart_state).
+
+chart_patch carries JSON-Patch deltas; every subscriber (the sender included,
+as its acknowledgement) receives {"chartId", "version", "ops"}. A client that
+sees a version other than the one after its last known version has missed a
+patch and should refetch the chart. A patch that cannot be applied is
+answered, to the sender only, with chart_patch_rejected carrying the chart's
+current version.
+
+chart_update replaces a chart's data wholesale; it is applied the same way
+and rebroadcast (to everyone else, as before) with the new version added.
+
+charts_batch is sent once per POST .../charts:batch with everything it
+created, updated and deleted.
+
+refresh_snapshot builds the workspace_snapshot that late joiners receive
+before the replayed tail (see app.websocket.replay).
+"""
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import ValidationError
+
+from app.crud import cached
+from app.crud import chart as chart_crud
+from app.database import open_db
+from app.patch import PatchError
+from app.schemas.chart import Chart, PatchOperation
+
+logger = logging.getLogger(__name__)
+
+
+def _timestamp() -> int:
+    return int(datetime.now().timestamp() * 1000)
+
+
+def chart_patch_message(chart, ops: List[dict], user_id: str) -> dict:
+    return {
+        "type": "chart_patch",
+        "payload": {"chartId": chart.id, "version": chart.version, "ops": ops},
+        "userId": user_id,
+        "workspaceId": chart.workspace_id,
+        "timestamp": _timestamp(),
+    }
+
+
+def charts_batch_message(workspace_id: str, results: list, user_id: str) -> dict:
+    """One notification for a whole batch: created/updated charts in full, deleted ids"""
+    charts = {"created": [], "updated": [], "deleted": []}
+    for op, chart_id, chart in results:
+        if op == "delete":
+            charts["deleted"].append(chart_id)
+        else:
+            key = "created" if op == "create" else "updated"
+            charts[key].append(Chart.model_validate(chart).model_dump(mode="json"))
+    return {
+        "type": "charts_batch",
+        "payload": charts,
+        "userId": user_id,
+        "workspaceId": workspace_id,
+        "timestamp": _timestamp(),
+    }
+
+
+def _rejected_message(workspace_id: str, chart_id: Optional[str], reason: str, version: Optional[int]) -> dict:
+    return {
+        "type": "chart_patch_rejected",
+        "payload": {"chartId": chart_id, "reason": reason, "version": version},
+        "userId": "system",
+        "workspaceId": workspace_id,
+        "timestamp": _timestamp(),
+    }
+
+
+async def _apply(chart_state, connection, workspace_id: str, user_id: str, chart_id, ops, base_version):
+    """The updated LiveChart, or None after telling the sender why not"""
+    try:
+        chart = await chart_state.apply(chart_id, ops, base_version=base_version, workspace_id=workspace_id)
+    except chart_crud.ChartVersionConflict:
+        live = chart_state.get(chart_id)
+        connection.send(_rejected_message(workspace_id, chart_id, "conflict", live.version if live else None))
+        return None
+    except PatchError as e:
+        logger.info("Rejected edit from %s on %s: %s", user_id, chart_id, e)
+        live = chart_state.get(chart_id)
+        connection.send(_rejected_message(workspace_id, chart_id, "invalid", live.version if live else None))
+        return None
+
+    if not chart:
+        connection.send(_rejected_message(workspace_id, chart_id, "not_found", None))
+    return chart
+
+
+async def handle_chart_patch(manager, chart_state, connection, workspace_id: str, user_id: str, message: dict):
+    """Apply a chart_patch message from user_id and fan the result out to the workspace"""
+    payload = message.get("payload") or {}
+    chart_id = payload.get("chartId")
+    try:
+        ops = [PatchOperation.model_validate(op).to_dict() for op in payload.get("ops") or []]
+    except ValidationError:
+        ops = []
+    if not chart_id or not ops:
+        connection.send(_rejected_message(workspace_id, chart_id, "invalid", None))
+        return
+
+    chart = await _apply(chart_state, connection, workspace_id, user_id, chart_id, ops, payload.get("baseVersion"))
+    if chart:
+        await manager.broadcast(workspace_id, chart_patch_message(chart, ops, user_id))
+
+
+async def handle_chart_update(manager, chart_state, connection, workspace_id: str, user_id: str, message: dict):
+    """Apply a whole-data chart_update and relay it with the new version"""
+    payload = message.get("payload") or {}
+    chart_id = payload.get("chartId")
+    if not chart_id or not isinstance(payload.get("data"), dict):
+        connection.send(_rejected_message(workspace_id, chart_id, "invalid", None))
+        return
+
+    ops = [{"op": "replace", "path": "/data", "value": payload["data"]}]
+    chart = await _apply(chart_state, connection, workspace_id, user_id, chart_id, ops, payload.get("baseVersion"))
+    if chart:
+        message["payload"] = {**payload, "version": chart.version}
+        await manager.broadcast(workspace_id, message, exclude_user=user_id)
+
+
+async def refresh_snapshot(manager, chart_state, workspace_id: str):
+    """Store a snapshot of the workspace's charts, live edits included, in the replay log"""
+    async with open_db() as db:
+        charts = await cached.get_charts_by_workspace(db, workspace_id)
+    # No awaits from here on, so the snapshot matches the log's current seq
+    charts = chart_state.overlay(charts)
+    manager.replay.store_snapshot(workspace_id, {
+        "charts": [Chart.model_validate(chart).model_dump(mode="json") for chart in charts],
+    })
@@ -0,0 +1,112 @@
+# app/websocket/compression.py
+"""permessage-deflate (RFC 7692) with configurable window bits, level and a size threshold.
+
+uvicorn negotiates permessage-deflate with fixed parameters. Run it with
+this protocol to apply the ws_deflate_* settings instead:
+
+    uvicorn main:app --ws app.websocket.compression:DeflateWebSocketProtocol
+
+RFC 7692 lets the sender choose per message whether to compress (RSV1), so
+messages shorter than ws_deflate_min_size (cursor_move, presence) go out
+as plain text and cost no compressor time. The compressor keeps its window
+between messages (context takeover), so a chart_update that fits in the
+window compresses against the previous one: with 15 window bits a typical
+7 KB update shrinks to a few hundred bytes, with 12 only by 60%, and level 1
+costs a fraction of level 6 for nearly the same savings (see
+benchmarks/bench_ws_compression.py). Compression runs per connection, so
+its CPU cost scales with fan-out, and each connection holds a compressor of
+about 2 ** (window_bits + 2) + 2 ** (mem_level + 9) bytes.
+"""
+
+from uvicorn.protocols.websockets.websockets_sansio_impl import WebSocketsSansIOProtocol
+from websockets.extensions.permessage_deflate import PerMessageDeflate, ServerPerMessageDeflateFactory
+from websockets.frames import CONT, CTRL_OPCODES, Frame
+
+from app.config import settings
+
+
+class CompressionStats:
+    def __init__(self):
+        self.compressed = 0
+        self.skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "compressed_messages": self.compressed,
+            "skipped_messages": self.skipped,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": self.bytes_out / self.bytes_in if self.bytes_in else None,
+        }
+
+
+stats = CompressionStats()
+
+
+class ThresholdPerMessageDeflate(PerMessageDeflate):
+    """PerMessageDeflate that leaves messages under min_size uncompressed"""
+
+    def __init__(self, min_size: int, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.min_size = min_size
+        self._compressing = False  # whether the message being continued was compressed
+
+    def encode(self, frame: Frame) -> Frame:
+        if frame.opcode in CTRL_OPCODES:
+            return frame
+        if frame.opcode is not CONT:
+            self._compressing = not (frame.fin and len(frame.data) < self.min_size)
+        if not self._compressing:
+            stats.skipped += frame.fin
+            return frame
+
+        encoded = super().encode(frame)
+        stats.compressed += frame.fin
+        stats.bytes_in += len(frame.data)
+        stats.bytes_out += len(encoded.data)
+        return encoded
+
+
+class ThresholdDeflateFactory(ServerPerMessageDeflateFactory):
+    def __init__(self, min_size: int, **kwargs):
+        super().__init__(**kwargs)
+        self.min_size = min_size
+
+    def process_request_params(self, params, accepted_extensions):
+        response, extension = super().process_request_params(params, accepted_extensions)
+        return response, ThresholdPerMessageDeflate(
+            self.min_size,
+            extension.remote_no_context_takeover,
+            extension.local_no_context_takeover,
+            extension.remote_max_window_bits,
+            extension.local_max_window_bits,
+            extension.compress_settings,
+        )
+
+
+def deflate_factory(
+    window_bits: int = settings.ws_deflate_window_bits,
+    level: int = settings.ws_deflate_level,
+    mem_level: int = settings.ws_deflate_mem_level,
+    min_size: int = settings.ws_deflate_min_size,
+) -> ThresholdDeflateFactory:
+    return ThresholdDeflateFactory(
+        min_size,
+        server_max_window_bits=window_bits,
+        client_max_window_bits=window_bits,
+        compress_settings={"level": level, "memLevel": mem_level},
+    )
+
+
+class DeflateWebSocketProtocol(WebSocketsSansIOProtocol):
+    """uvicorn's default WebSocket protocol, with deflate and the largest message from the settings"""
+
+    def connection_made(self, transport):
+        super().connection_made(transport)
+        if self.config.ws_per_message_deflate:
+            self.conn.available_extensions = [deflate_factory()] if settings.ws_deflate else []
+        # Refuse oversized messages while reading them (1009), rather than once they are buffered
+        if settings.ws_max_frame_bytes:
+            self.conn.max_message_size = settings.ws_max_frame_bytes
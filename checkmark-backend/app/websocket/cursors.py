@@ -0,0 +1,75 @@
+# app/websocket/cursors.py
+import asyncio
+import logging
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict
+
+from app.websocket.encoding import Frame, loads
+
+if TYPE_CHECKING:
+    from app.websocket.manager import ConnectionManager
+
+logger = logging.getLogger(__name__)
+
+
+class CursorBatcher:
+    """Coalesces cursor_move frames and sends one cursor_batch per workspace per tick"""
+
+    def __init__(self, manager: "ConnectionManager", tick_hz: float):
+        self.manager = manager
+        self.interval = 1.0 / tick_hz
+        # workspace_id -> user_id -> latest CursorMovePayload
+        self.pending: Dict[str, Dict[str, dict]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def push(self, workspace_id: str, user_id: str, data: str):
+        """Record the latest cursor position from a raw cursor_move frame"""
+        payload = loads(data).get("payload") or {}
+        self.pending.setdefault(workspace_id, {})[user_id] = {
+            "userId": user_id,
+            "cursor": payload.get("cursor"),
+        }
+
+        if workspace_id not in self._tasks:
+            self._tasks[workspace_id] = asyncio.create_task(self._run(workspace_id))
+
+    def forget(self, workspace_id: str, user_id: str):
+        """Drop a pending cursor so it is not sent after the user has left"""
+        cursors = self.pending.get(workspace_id)
+        if cursors:
+            cursors.pop(user_id, None)
+
+    def stop(self, workspace_id: str):
+        self.pending.pop(workspace_id, None)
+        task = self._tasks.pop(workspace_id, None)
+        if task and task is not asyncio.current_task():
+            task.cancel()
+
+    def flush(self, workspace_id: str) -> bool:
+        cursors = self.pending.pop(workspace_id, None)
+        if not cursors:
+            return False
+
+        self.manager.broadcast_frame(workspace_id, Frame.from_message({
+            "type": "cursor_batch",
+            "payload": {"cursors": list(cursors.values())},
+            "userId": "system",
+            "workspaceId": workspace_id,
+            "timestamp": int(datetime.now().timestamp() * 1000),
+        }))
+        return True
+
+    async def _run(self, workspace_id: str):
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                # Idle workspaces release their ticker until the next cursor_move
+                if not self.flush(workspace_id):
+                    break
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Cursor batch error in workspace %s: %s", workspace_id, e)
+        finally:
+            if self._tasks.get(workspace_id) is asyncio.current_task():
+                del self._tasks[workspace_id]
@@ -0,0 +1,66 @@
+# app/websocket/encoding.py
+import json
+import re
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # orjson ships with fastapi[all] but stays optional
+    orjson = None
+
+from app.config import settings
+
+# Cheap look at the leading "type" key the frontend always serialises first
+_TYPE_PREFIX = re.compile(r'\s*\{\s*"type"\s*:\s*"([A-Za-z0-9_]+)"')
+
+
+def _use_orjson() -> bool:
+    if settings.ws_json_encoder == "json":
+        return False
+    if settings.ws_json_encoder == "orjson" and orjson is None:
+        raise RuntimeError("CHECKMARK_WS_JSON_ENCODER=orjson but orjson is not installed")
+    return orjson is not None
+
+
+USE_ORJSON = _use_orjson()
+
+
+def dumps(message: Any) -> str:
+    """Encode a message as compact JSON text"""
+    if USE_ORJSON:
+        try:
+            return orjson.dumps(message).decode()
+        except TypeError:
+            pass  # e.g. integers wider than 64 bits, fall back to stdlib
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads(data: str) -> Any:
+    if USE_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def peek_type(data: str) -> Optional[str]:
+    """Message type from the start of a raw frame, without parsing the body"""
+    match = _TYPE_PREFIX.match(data)
+    return match.group(1) if match else None
+
+
+class Frame:
+    """An outbound message encoded once and shared by every recipient"""
+
+    __slots__ = ("text", "type", "sender")
+
+    def __init__(self, text: str, type: Optional[str] = None, sender: Optional[str] = None):
+        self.text = text
+        self.type = type
+        self.sender = sender
+
+    @classmethod
+    def from_message(cls, message: dict) -> "Frame":
+        message_type = message.get("type")
+        # A client's type may be anything JSON (a list, say); frames key coalescing and metrics on it
+        if message_type is not None and not isinstance(message_type, str):
+            message_type = str(message_type)
+        return cls(dumps(message), message_type, message.get("userId"))
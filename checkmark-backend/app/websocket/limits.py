@@ -0,0 +1,116 @@
+# app/websocket/limits.py
+"""Inbound admission control for the WebSocket endpoint.
+
+Every received frame goes through ConnectionManager.admit() before it is
+parsed (past its type), relayed or handled:
+  - a frame over ws_max_frame_bytes closes the connection (1009)
+  - token buckets per message type, per connection and per workspace,
+    drop frames over the rate. Limits are {"type": [per second, burst]},
+    with "*" shared by every type not listed, so a client cannot mint
+    buckets by making up types
+  - the sender of a dropped frame gets a "throttled" notice, at most one
+    a second, naming the type, the scope (connection | workspace) and how
+    long to back off
+  - each dropped frame spends a strike; a sender that keeps going once
+    its strikes run out is told so and closed (1008)
+
+Connections over ws_max_connections_per_workspace or ws_max_connections
+are accepted, told why and closed (1013), before they cost a snapshot.
+"""
+import time
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+
+from fastapi import status
+
+OTHER_TYPES = "*"
+
+# Minimum seconds between two "throttled" notices to the same connection
+NOTICE_INTERVAL = 1.0
+
+# Why a frame was dropped or a connection closed or refused, with its close code
+REASONS = {
+    "frame_too_large": status.WS_1009_MESSAGE_TOO_BIG,
+    "rate_limit": status.WS_1008_POLICY_VIOLATION,
+    "workspace_full": status.WS_1013_TRY_AGAIN_LATER,
+    "server_full": status.WS_1013_TRY_AGAIN_LATER,
+}
+
+
+class TokenBucket:
+    """rate tokens a second up to burst, refilled lazily when one is taken"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic() if now is None else now
+
+    def take(self, now: float) -> float:
+        """0 if a token was taken, otherwise seconds until one is available"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimits:
+    """Token buckets per key (a connection, a workspace) and limited message type"""
+
+    def __init__(self, limits: Dict[str, Sequence[float]]):
+        # A rate of 0 or less leaves a type unlimited
+        self.limits: Dict[str, Tuple[float, float]] = {
+            message_type: (float(rate), max(float(burst), 1.0))
+            for message_type, (rate, burst) in limits.items()
+            if rate > 0
+        }
+        self._buckets: Dict[Hashable, Dict[str, TokenBucket]] = {}
+
+    def take(self, key: Hashable, message_type: Optional[str], now: float) -> float:
+        """0 if the message may pass, otherwise seconds until it would"""
+        name = message_type if message_type in self.limits else OTHER_TYPES
+        limit = self.limits.get(name)
+        if limit is None:
+            return 0.0
+
+        buckets = self._buckets.get(key)
+        if buckets is None:
+            buckets = self._buckets[key] = {}
+        bucket = buckets.get(name)
+        if bucket is None:
+            bucket = buckets[name] = TokenBucket(*limit, now)
+        return bucket.take(now)
+
+    def forget(self, key: Hashable):
+        self._buckets.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def throttled_message(
+    workspace_id: str,
+    reason: str,
+    message_type: Optional[str] = None,
+    scope: Optional[str] = None,
+    retry_after: float = 0.0,
+    closing: bool = False,
+) -> dict:
+    """The notice sent to a client whose frames are dropped, or before it is closed"""
+    return {
+        "type": "throttled",
+        "payload": {
+            "reason": reason,
+            "messageType": message_type,
+            "scope": scope,
+            "retryAfterMs": int(retry_after * 1000 + 0.5),
+            "closing": closing,
+            "code": REASONS[reason] if closing else None,
+        },
+        "userId": "system",
+        "workspaceId": workspace_id,
+        "timestamp": int(time.time() * 1000),
+    }
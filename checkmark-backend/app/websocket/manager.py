@@ -0,0 +1,389 @@
+# app/websocket/manager.py
+import asyncio
+import enum
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import WebSocket, status
+from starlette.websockets import WebSocketState
+
+from app import metrics
+from app.websocket.backplane import Backplane, InMemoryBackplane
+from app.websocket.cursors import CursorBatcher
+from app.websocket.encoding import Frame
+from app.websocket.limits import NOTICE_INTERVAL, REASONS, RateLimits, TokenBucket, throttled_message
+from app.websocket.replay import ReplayLog
+
+logger = logging.getLogger(__name__)
+
+
+class OverflowPolicy(str, enum.Enum):
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+    DISCONNECT = "disconnect"
+
+
+# Message types where only the latest frame per sender matters
+COALESCIBLE_TYPES = {"cursor_move"}
+
+
+def coalesce_key(frame: Frame) -> Optional[Tuple[str, str]]:
+    """Key identifying frames that supersede each other, or None"""
+    if frame.type in COALESCIBLE_TYPES:
+        return (frame.type, frame.sender)
+    return None
+
+
+# Close code for a connection its user replaced by connecting again (4000-4999: application codes)
+WS_REPLACED = 4000
+
+
+class ClientConnection:
+    """A WebSocket with its own bounded outbound queue and writer task"""
+
+    def __init__(
+        self,
+        manager: "ConnectionManager",
+        websocket: WebSocket,
+        workspace_id: str,
+        user_id: str,
+    ):
+        self.manager = manager
+        self.websocket = websocket
+        self.workspace_id = workspace_id
+        self.user_id = user_id
+        self.queue: Deque[Frame] = deque()
+        self.closed = False
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        # Inbound frames this client may still have dropped before it is closed
+        self.strikes = TokenBucket(manager.throttle_strikes_per_second, manager.throttle_strikes)
+        self.next_notice_at = 0.0
+        self.shed_reason: Optional[str] = None  # set when admission control closes it
+
+    def start(self):
+        self._writer = asyncio.create_task(self._run_writer())
+
+    def stop(self):
+        self.closed = True
+        self.queue.clear()
+        if self._writer and not self._writer.done() and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    async def close(self, code: int, message: Optional[dict] = None, reason: Optional[str] = None):
+        """Stop writing and close; message, if given, is sent right before the close frame"""
+        self.stop()
+        try:
+            if message is not None:
+                await self.websocket.send_text(Frame.from_message(message).text)
+            await self.websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+    def send(self, message: dict) -> bool:
+        """Queue a message addressed only to this client"""
+        return self.enqueue(Frame.from_message(message))
+
+    def enqueue(self, frame: Frame) -> bool:
+        """Queue a frame for this client, applying the overflow policy when full"""
+        if self.closed:
+            return False
+
+        if len(self.queue) >= self.manager.max_queue_size and not self._handle_overflow(frame):
+            return False
+
+        self.queue.append(frame)
+        self._ready.set()
+        return True
+
+    def _handle_overflow(self, frame: Frame) -> bool:
+        policy = self.manager.overflow_policy
+
+        if policy == OverflowPolicy.DISCONNECT:
+            self.manager.record_overflow(OverflowPolicy.DISCONNECT)
+            logger.warning("Disconnecting slow consumer %s in workspace %s", self.user_id, self.workspace_id)
+            # The endpoint sees the close, unregisters it and announces the leave
+            asyncio.create_task(self.close(status.WS_1013_TRY_AGAIN_LATER))
+            return False
+
+        if policy == OverflowPolicy.COALESCE:
+            key = coalesce_key(frame)
+            if key is not None:
+                for queued in self.queue:
+                    if coalesce_key(queued) == key:
+                        self.queue.remove(queued)
+                        self.manager.record_overflow(OverflowPolicy.COALESCE)
+                        return True
+
+        # DROP_OLDEST, and COALESCE when nothing in the queue can be superseded
+        self.queue.popleft()
+        self.manager.record_overflow(OverflowPolicy.DROP_OLDEST)
+        return True
+
+    async def _run_writer(self):
+        try:
+            while True:
+                while not self.queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+
+                frame = self.queue.popleft()
+                await self.websocket.send_text(frame.text)
+                metrics.ws_messages_sent.labels(frame.type or "unknown").inc()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Error sending to %s: %s", self.user_id, e)
+            await self.close(status.WS_1011_INTERNAL_ERROR)
+
+
+class ConnectionManager:
+    def __init__(
+        self,
+        max_queue_size: int = 256,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        cursor_tick_hz: float = 0,
+        backplane: Optional[Backplane] = None,
+        replay_size: int = 0,
+        replay_types: Iterable[str] = (),
+        snapshot_max_age: float = 30.0,
+        replay_idle_seconds: float = 300.0,
+        rate_limits: Optional[Dict[str, Sequence[float]]] = None,
+        workspace_rate_limits: Optional[Dict[str, Sequence[float]]] = None,
+        throttle_strikes: int = 500,
+        throttle_strikes_per_second: float = 50.0,
+        max_frame_bytes: int = 0,
+        max_connections: int = 0,
+        max_connections_per_workspace: int = 0,
+    ):
+        self.active_connections: Dict[str, Dict[str, ClientConnection]] = {}
+        self.backplane = backplane or InMemoryBackplane()
+        self.backplane.bind(self)
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = OverflowPolicy(overflow_policy)
+        # cursor_move is batched per tick when a rate is set, relayed per frame otherwise
+        self.cursor_batcher: Optional[CursorBatcher] = (
+            CursorBatcher(self, cursor_tick_hz) if cursor_tick_hz > 0 else None
+        )
+        self.overflow_counts: Dict[str, int] = {policy.value: 0 for policy in OverflowPolicy}
+        # Sequenced history for late joiners; replay_size 0 turns it off
+        self.replay = ReplayLog(replay_size, replay_types, snapshot_max_age, replay_idle_seconds)
+        # Inbound admission (app.websocket.limits); 0 or no limits turns each one off
+        self.connection_rates = RateLimits(rate_limits or {})
+        self.workspace_rates = RateLimits(workspace_rate_limits or {})
+        self.throttle_strikes = max(throttle_strikes, 1)
+        self.throttle_strikes_per_second = throttle_strikes_per_second
+        self.max_frame_bytes = max_frame_bytes
+        self.max_connections = max_connections
+        self.max_connections_per_workspace = max_connections_per_workspace
+        self.throttled_count = 0
+        self.rejected_counts: Dict[str, int] = dict.fromkeys(REASONS, 0)
+
+    async def start(self):
+        await self.backplane.start()
+
+    async def stop(self):
+        await self.backplane.stop()
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        workspace_id: str,
+        user_id: str,
+        initial_frames: Optional[Callable[[], List[Frame]]] = None,
+    ) -> Optional[ClientConnection]:
+        """Accept and register a client, or None if it was refused for capacity
+
+        initial_frames runs after the last await, right before registration,
+        so what it returns and the broadcasts that follow neither overlap
+        nor leave a gap.
+        """
+        await websocket.accept()
+
+        reason = self.over_capacity(workspace_id, user_id)
+        if reason is not None:
+            await self.refuse(websocket, workspace_id, user_id, reason)
+            return None
+
+        if workspace_id not in self.active_connections:
+            self.active_connections[workspace_id] = {}
+
+        previous = self.active_connections[workspace_id].get(user_id)
+        if previous is not None:
+            # Its receive loop ends with the socket, and no longer speaks for the user
+            asyncio.create_task(previous.close(WS_REPLACED, reason="replaced"))
+
+        connection = ClientConnection(self, websocket, workspace_id, user_id)
+        for frame in initial_frames() if initial_frames else []:
+            connection.enqueue(frame)
+        connection.start()
+        self.active_connections[workspace_id][user_id] = connection
+        self.backplane.join(workspace_id, user_id)
+        logger.info(
+            "User %s connected to workspace %s (%d connections)",
+            user_id, workspace_id, len(self.active_connections[workspace_id]),
+        )
+        return connection
+
+    def disconnect(self, workspace_id: str, user_id: str, connection: Optional[ClientConnection] = None) -> bool:
+        """Unregister user_id's connection (only if it is still connection); whether it was"""
+        if workspace_id in self.active_connections:
+            current = self.active_connections[workspace_id].get(user_id)
+            # Ignore stale disconnects from a connection that was already replaced
+            if current is not None and (connection is None or current is connection):
+                current.stop()
+                del self.active_connections[workspace_id][user_id]
+                self.connection_rates.forget(current)
+                self.backplane.leave(workspace_id, user_id)
+                if self.cursor_batcher:
+                    self.cursor_batcher.forget(workspace_id, user_id)
+                logger.info("User %s disconnected from workspace %s", user_id, workspace_id)
+
+                if not self.active_connections[workspace_id]:
+                    del self.active_connections[workspace_id]
+                    if self.cursor_batcher:
+                        self.cursor_batcher.stop(workspace_id)
+                    self.replay.release(workspace_id)
+                    self.workspace_rates.forget(workspace_id)
+                    logger.info("Workspace %s is now empty", workspace_id)
+                return True
+        return False
+
+    def over_capacity(self, workspace_id: str, user_id: str) -> Optional[str]:
+        """Why a new connection would go over a connection cap, or None
+
+        A user reconnecting to a workspace replaces their connection, so takes no new slot.
+        """
+        connections = self.active_connections.get(workspace_id, {})
+        if user_id in connections:
+            return None
+        if self.max_connections_per_workspace and len(connections) >= self.max_connections_per_workspace:
+            return "workspace_full"
+        if self.max_connections and self.connection_count() >= self.max_connections:
+            return "server_full"
+        return None
+
+    async def refuse(self, websocket: WebSocket, workspace_id: str, user_id: str, reason: str):
+        """Accept (if not yet), say why and close a connection that is not let in"""
+        self.record_rejected(reason)
+        logger.warning("Refusing %s in workspace %s: %s", user_id, workspace_id, reason)
+        try:
+            if websocket.client_state == WebSocketState.CONNECTING:
+                await websocket.accept()
+            await websocket.send_text(Frame.from_message(throttled_message(workspace_id, reason, closing=True)).text)
+            await websocket.close(code=REASONS[reason])
+        except Exception:
+            pass
+
+    def admit(self, connection: ClientConnection, message_type: Optional[str], size: int) -> bool:
+        """Whether to handle a received frame; over a limit it is dropped, or the connection closed"""
+        if connection.closed:
+            return False
+        if self.max_frame_bytes and size > self.max_frame_bytes:
+            self.shed(connection, "frame_too_large", message_type)
+            return False
+
+        now = time.monotonic()
+        scope = "connection"
+        retry_after = self.connection_rates.take(connection, message_type, now)
+        if not retry_after:
+            scope = "workspace"
+            retry_after = self.workspace_rates.take(connection.workspace_id, message_type, now)
+            if not retry_after:
+                return True
+
+        self.throttled_count += 1
+        metrics.ws_throttled_messages.labels(message_type or "unknown", scope).inc()
+        if connection.strikes.take(now):
+            self.shed(connection, "rate_limit", message_type, scope)
+            return False
+        if now >= connection.next_notice_at:
+            connection.next_notice_at = now + NOTICE_INTERVAL
+            connection.send(throttled_message(connection.workspace_id, "rate_limit", message_type, scope, retry_after))
+        return False
+
+    def shed(self, connection: ClientConnection, reason: str, message_type: Optional[str], scope: Optional[str] = None):
+        """Tell a client why and close it; the endpoint sees the disconnect and announces the leave"""
+        self.record_rejected(reason)
+        connection.shed_reason = reason
+        logger.warning(
+            "Closing %s in workspace %s: %s (%s)", connection.user_id, connection.workspace_id, reason, message_type,
+        )
+        notice = throttled_message(connection.workspace_id, reason, message_type, scope, closing=True)
+        asyncio.create_task(connection.close(REASONS[reason], notice))
+
+    def connection_count(self) -> int:
+        return sum(len(connections) for connections in self.active_connections.values())
+
+    async def broadcast(self, workspace_id: str, message: dict, exclude_user: str = None):
+        """Encode a message once and enqueue it for every peer in the workspace"""
+        self.broadcast_frame(workspace_id, Frame.from_message(message), exclude_user)
+
+    async def relay(self, workspace_id: str, text: str, message_type: str, sender: str):
+        """Forward a frame as received, without parsing or re-encoding it"""
+        if message_type == "cursor_move" and self.cursor_batcher:
+            self.cursor_batcher.push(workspace_id, sender, text)
+            return
+
+        self.broadcast_frame(workspace_id, Frame(text, message_type, sender), exclude_user=sender)
+
+    def broadcast_frame(self, workspace_id: str, frame: Frame, exclude_user: str = None):
+        """Deliver a frame to this node's peers and publish it to the other nodes"""
+        self.deliver_local(workspace_id, frame, exclude_user)
+        self.backplane.publish(workspace_id, frame, exclude_user)
+
+    def deliver_local(self, workspace_id: str, frame: Frame, exclude_user: str = None):
+        started = time.perf_counter()
+        frame = self.replay.record(workspace_id, frame)
+        for user_id, connection in list(self.active_connections.get(workspace_id, {}).items()):
+            if user_id == exclude_user:
+                continue
+            connection.enqueue(frame)
+        metrics.ws_fanout_duration.labels().observe(time.perf_counter() - started)
+
+    async def workspace_users(self, workspace_id: str) -> List[str]:
+        """Users connected to a workspace on any node"""
+        users = await self.backplane.presence(workspace_id)
+        users.update(dict.fromkeys(self.active_connections.get(workspace_id, {}), self.backplane.node_id))
+        return list(users)
+
+    def record_overflow(self, policy: OverflowPolicy):
+        self.overflow_counts[policy.value] += 1
+        metrics.ws_dropped_frames.labels(policy.value).inc()
+
+    def record_rejected(self, reason: str):
+        self.rejected_counts[reason] += 1
+        metrics.ws_rejected.labels(reason).inc()
+
+    def collect_metrics(self):
+        """Set the connection and queue gauges from the live connections, before a /metrics render"""
+        metrics.ws_connections.clear()
+        frames = max_depth = 0
+        for workspace_id, connections in self.active_connections.items():
+            metrics.ws_connections.labels(workspace_id).inc(len(connections))
+            for connection in connections.values():
+                frames += len(connection.queue)
+                max_depth = max(max_depth, len(connection.queue))
+        metrics.ws_send_queue_frames.labels().set(frames)
+        metrics.ws_send_queue_max_depth.labels().set(max_depth)
+
+    def stats(self) -> dict:
+        queue_depths = [
+            len(connection.queue)
+            for connections in self.active_connections.values()
+            for connection in connections.values()
+        ]
+        return {
+            "workspaces": len(self.active_connections),
+            "connections": len(queue_depths),
+            "max_queue_size": self.max_queue_size,
+            "max_queue_depth": max(queue_depths, default=0),
+            "overflow_policy": self.overflow_policy.value,
+            "overflow_counts": dict(self.overflow_counts),
+            "throttled_messages": self.throttled_count,
+            "rejected": dict(self.rejected_counts),
+            "backplane": self.backplane.stats(),
+            "replay": self.replay.stats(),
+        }
@@ -0,0 +1,156 @@
+# app/websocket/replay.py
+"""Per-workspace replay log so joining and reconnecting clients catch up in one stream.
+
+State-changing frames (ws_replay_types) get a per-workspace sequence number,
+spliced into the already encoded text as a leading "seq" field, and are kept
+in a bounded ring. A workspace_snapshot (the workspace's charts as of some
+seq) is rebuilt when missing, older than ws_snapshot_max_age_seconds or no
+longer followed by a contiguous tail in the ring.
+
+A client reconnecting with ?lastSeq=&epoch= within the ring gets only the
+frames it missed; anyone else gets the snapshot and the tail after it. The
+epoch changes whenever a log is recreated (restart, idle expiry), so stale
+sequence numbers are never resumed against a different log. Logs are per
+process, like the live chart state.
+"""
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional
+
+from app.websocket.encoding import Frame
+
+
+class WorkspaceLog:
+    def __init__(self, size: int):
+        self.epoch = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self.entries = deque(maxlen=size)  # (seq, Frame)
+        self.snapshot: Optional[Frame] = None
+        self.snapshot_seq = 0
+        self.snapshot_at = 0.0
+        self.idle_since: Optional[float] = None
+
+    @property
+    def first_seq(self) -> int:
+        """Oldest seq still in the ring (seq + 1 when empty)"""
+        return self.entries[0][0] if self.entries else self.seq + 1
+
+    def append(self, frame: Frame) -> Frame:
+        self.seq += 1
+        sequenced = Frame('{"seq":%d,%s' % (self.seq, frame.text[1:]), frame.type, frame.sender)
+        self.entries.append((self.seq, sequenced))
+        return sequenced
+
+    def can_resume(self, last_seq: Optional[int], epoch: Optional[str]) -> bool:
+        return (
+            last_seq is not None
+            and epoch == self.epoch
+            and self.first_seq - 1 <= last_seq <= self.seq
+        )
+
+    def since(self, seq: int) -> List[Frame]:
+        return [frame for entry_seq, frame in self.entries if entry_seq > seq]
+
+    def snapshot_fresh(self, max_age: float) -> bool:
+        return (
+            self.snapshot is not None
+            and time.monotonic() - self.snapshot_at < max_age
+            and self.snapshot_seq >= self.first_seq - 1
+        )
+
+    def set_snapshot(self, payload: dict, workspace_id: str):
+        """Store a snapshot of state as of the current seq; call without awaiting in between"""
+        self.snapshot_seq = self.seq
+        self.snapshot_at = time.monotonic()
+        self.snapshot = Frame.from_message({
+            "type": "workspace_snapshot",
+            "payload": {**payload, "seq": self.seq, "epoch": self.epoch},
+            "userId": "system",
+            "workspaceId": workspace_id,
+            "timestamp": int(time.time() * 1000),
+        })
+
+
+class ReplayLog:
+    def __init__(self, size: int, types, snapshot_max_age: float, idle_seconds: float):
+        self.size = size
+        self.types = set(types)
+        self.snapshot_max_age = snapshot_max_age
+        self.idle_seconds = idle_seconds
+        self.snapshots_built = 0
+        self.resumes = 0
+        self._logs: Dict[str, WorkspaceLog] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def log(self, workspace_id: str) -> WorkspaceLog:
+        log = self._logs.get(workspace_id)
+        if log is None:
+            self._prune()
+            log = self._logs[workspace_id] = WorkspaceLog(self.size)
+        return log
+
+    def record(self, workspace_id: str, frame: Frame) -> Frame:
+        """Sequence and keep frame if it is a replayed type; returns the frame to deliver
+
+        Workspaces nobody joined (recently) have no log: whoever joins next
+        gets a fresh snapshot, which already includes the change.
+        """
+        log = self._logs.get(workspace_id)
+        if log is None or frame.type not in self.types:
+            return frame
+        return log.append(frame)
+
+    def needs_snapshot(self, workspace_id: str, last_seq: Optional[int], epoch: Optional[str]) -> bool:
+        """True when catch_up would send a snapshot that has to be (re)built first"""
+        if not self.enabled:
+            return False
+        log = self.log(workspace_id)
+        return not log.can_resume(last_seq, epoch) and not log.snapshot_fresh(self.snapshot_max_age)
+
+    def store_snapshot(self, workspace_id: str, payload: dict):
+        self.log(workspace_id).set_snapshot(payload, workspace_id)
+        self.snapshots_built += 1
+
+    def catch_up(self, workspace_id: str, last_seq: Optional[int], epoch: Optional[str]) -> List[Frame]:
+        """Frames a joining client needs; call without awaiting before it is registered"""
+        if not self.enabled:
+            return []
+        log = self.log(workspace_id)
+        log.idle_since = None
+        if log.can_resume(last_seq, epoch):
+            self.resumes += 1
+            return log.since(last_seq)
+        if log.snapshot is None:
+            return []
+        # If the ring no longer reaches back to the snapshot the client sees a seq gap
+        return [log.snapshot] + log.since(log.snapshot_seq)
+
+    def position(self, workspace_id: str) -> dict:
+        if not self.enabled:
+            return {}
+        log = self.log(workspace_id)
+        return {"seq": log.seq, "epoch": log.epoch}
+
+    def release(self, workspace_id: str):
+        """The workspace has no local connections left; its log expires after idle_seconds"""
+        log = self._logs.get(workspace_id)
+        if log is not None:
+            log.idle_since = time.monotonic()
+
+    def _prune(self):
+        now = time.monotonic()
+        for workspace_id, log in list(self._logs.items()):
+            if log.idle_since is not None and now - log.idle_since > self.idle_seconds:
+                del self._logs[workspace_id]
+
+    def stats(self) -> dict:
+        return {
+            "workspaces": len(self._logs),
+            "entries": sum(len(log.entries) for log in self._logs.values()),
+            "snapshots_built": self.snapshots_built,
+            "resumes": self.resumes,
+        }
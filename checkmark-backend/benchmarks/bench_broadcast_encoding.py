@@ -0,0 +1,109 @@
+# benchmarks/bench_broadcast_encoding.py
+"""Per-recipient JSON encoding vs encode-once broadcast.
+
+Run from checkmark-backend/:  python -m benchmarks.bench_broadcast_encoding
+"""
+import asyncio
+import json
+import logging
+import time
+
+from app.websocket import ConnectionManager
+from app.websocket import encoding
+
+PEER_COUNTS = [10, 100, 1000]
+ROUNDS = 50
+
+CURSOR_MOVE = {
+    "type": "cursor_move",
+    "payload": {"userId": "user-1", "cursor": {"x": 512, "y": 384}},
+    "userId": "user-1",
+    "workspaceId": "ws-1",
+    "timestamp": 1700000000000,
+}
+
+CHART_UPDATE = {
+    "type": "chart_update",
+    "payload": {
+        "chartId": "chart-1",
+        "data": {"series": [{"name": f"s{i}", "values": list(range(200))} for i in range(5)]},
+    },
+    "userId": "user-1",
+    "workspaceId": "ws-1",
+    "timestamp": 1700000000000,
+}
+
+
+class NullWebSocket:
+    """Stands in for a Starlette WebSocket; encodes like send_json, then discards"""
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, data):
+        json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+    async def send_text(self, data):
+        pass
+
+
+async def per_recipient(peers, message):
+    for websocket in peers:
+        await websocket.send_json(message)
+
+
+async def encode_once(peers, message):
+    text = encoding.dumps(message)
+    for websocket in peers:
+        await websocket.send_text(text)
+
+
+async def raw_relay(peers, text):
+    for websocket in peers:
+        await websocket.send_text(text)
+
+
+async def manager_broadcast(manager, message):
+    await manager.broadcast("ws-1", message)
+    # Let every writer task drain its queue
+    while any(c.queue for c in manager.active_connections["ws-1"].values()):
+        await asyncio.sleep(0)
+
+
+async def timed(fn, *args):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        await fn(*args)
+    return (time.perf_counter() - start) / ROUNDS * 1e6
+
+
+async def main():
+    logging.disable(logging.INFO)
+    encoder = "orjson" if encoding.USE_ORJSON else "json"
+    print(f"encode-once encoder: {encoder}, {ROUNDS} rounds, microseconds per broadcast\n")
+    columns = ["per-recipient", "encode-once", "raw relay", "manager"]
+    print(f"{'message':<14}{'peers':>7}" + "".join(f"{c:>15}" for c in columns))
+
+    for name, message in [("cursor_move", CURSOR_MOVE), ("chart_update", CHART_UPDATE)]:
+        raw_text = json.dumps(message)
+        for count in PEER_COUNTS:
+            peers = [NullWebSocket() for _ in range(count)]
+
+            manager = ConnectionManager(max_queue_size=ROUNDS + 1)
+            for i, websocket in enumerate(peers):
+                await manager.connect(websocket, "ws-1", f"user-{i}")
+
+            results = [
+                await timed(per_recipient, peers, message),
+                await timed(encode_once, peers, message),
+                await timed(raw_relay, peers, raw_text),
+                await timed(manager_broadcast, manager, message),
+            ]
+            print(f"{name:<14}{count:>7}" + "".join(f"{r:>15.1f}" for r in results))
+
+            for i in range(count):
+                manager.disconnect("ws-1", f"user-{i}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
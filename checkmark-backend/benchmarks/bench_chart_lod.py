@@ -0,0 +1,122 @@
+# benchmarks/bench_chart_lod.py
+"""Full vs downsampled (max_points) reads of charts with a million points.
+
+Seeds a line chart (one dataset of --points values over as many labels)
+and a scatter3D chart (--points xyz points), starts the server, then
+reads each one:
+  - full:    GET /api/charts/{id}
+  - cold:    GET /api/charts/{id}?max_points=N, a different N each time so
+             every request downsamples (N, N + 1, ...)
+  - cached:  the same max_points again, served from the LOD cache
+
+and reports latency percentiles and response size per step. Needs numpy
+(pip install -e ".[lod]").
+
+Run from checkmark-backend/:  python -m benchmarks.bench_chart_lod [--points 1000000] [--max-points 2000]
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime
+
+import httpx
+from sqlalchemy import create_engine, insert
+
+from benchmarks.common import percentile, run_server, scratch_dir
+
+
+def seed(engine, points: int):
+    from app.models import Chart, ChartSeries, ChartType, User, Workspace
+    from app.series import split_series
+
+    rng = random.Random(0)
+    walk, value = [], 0.0
+    for _ in range(points):
+        value += rng.gauss(0, 1)
+        walk.append(round(value, 3))
+    charts = {
+        "line": (ChartType.LINE, {
+            "labels": [f"t{n}" for n in range(points)],
+            "datasets": [{"label": "Walk", "data": walk}],
+        }),
+        "scatter3D": (ChartType.SCATTER_3D, {
+            "series": [{"name": "Cloud", "data": [
+                [rng.gauss(0, 1), rng.gauss(0, 1), rng.gauss(0, 1)] for _ in range(points)
+            ]}],
+        }),
+    }
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__).values(
+            id="user-1", name="Bench", email="bench@example.com", created_at=now, updated_at=now,
+        ))
+        conn.execute(insert(Workspace.__table__).values(
+            id="bench", name="LOD", owner_id="user-1", created_at=now, updated_at=now,
+        ))
+        for chart_id, (chart_type, data) in charts.items():
+            layout, series = split_series(data)
+            conn.execute(insert(Chart.__table__).values(
+                id=chart_id, name=chart_id, type=chart_type, workspace_id="bench",
+                config={"title": chart_id}, data=layout, created_by="user-1", created_at=now, updated_at=now,
+            ))
+            conn.execute(insert(ChartSeries.__table__), [
+                {"id": f"{chart_id}-s{n}", "chart_id": chart_id, "position": n,
+                 "dtype": packed.dtype, "shape": packed.shape, "values": packed.values}
+                for n, packed in enumerate(series)
+            ])
+    return list(charts)
+
+
+def timed_gets(client: httpx.Client, urls):
+    """(latencies in seconds, bytes of the last response)"""
+    latencies, size = [], 0
+    for url in urls:
+        started = time.perf_counter()
+        response = client.get(url)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+        size = len(response.content)
+    return latencies, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--max-points", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=10)
+    args = parser.parse_args()
+
+    from app import lod, models  # noqa: F401  (registers the tables)
+    from app.database import Base
+
+    if not lod.available():
+        raise SystemExit('numpy is not installed: pip install -e ".[lod]"')
+
+    with scratch_dir() as cwd:
+        engine = create_engine(f"sqlite:///{os.path.join(cwd, 'checkmark.db')}")
+        Base.metadata.create_all(engine)
+        chart_ids = seed(engine, args.points)
+        engine.dispose()
+
+        print(f"{args.points} points per chart, max_points={args.max_points}, {args.requests} requests per step\n")
+        print(f"{'chart':<11}{'step':<8}{'p50 ms':>9}{'p99 ms':>9}{'KiB':>10}")
+        with run_server(cwd) as base_url, httpx.Client(base_url=base_url, timeout=None) as client:
+            for chart_id in chart_ids:
+                url = f"/api/charts/{chart_id}"
+                steps = [
+                    ("full", [url] * args.requests),
+                    ("cold", [f"{url}?max_points={args.max_points + n}" for n in range(args.requests)]),
+                    ("cached", [f"{url}?max_points={args.max_points}"] * args.requests),
+                ]
+                for step, urls in steps:
+                    latencies, size = timed_gets(client, urls)
+                    print(
+                        f"{chart_id:<11}{step:<8}{percentile(latencies, 50) * 1000:>9.1f}"
+                        f"{percentile(latencies, 99) * 1000:>9.1f}{size / 1024:>10.0f}",
+                        flush=True,
+                    )
+
+
+if __name__ == "__main__":
+    main()
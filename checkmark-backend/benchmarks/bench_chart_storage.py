@@ -0,0 +1,102 @@
+# benchmarks/bench_chart_storage.py
+"""Chart reads with data inline as JSON (legacy rows) vs packed chart_series blobs.
+
+Both layouts live in the same schema: a legacy row is a charts.data holding the
+full data and no series, which is exactly what rows written before the split
+look like. Measures database size, time and peak memory to list metadata (what
+a sidebar needs) and to load full data.
+
+Run from checkmark-backend/:  python -m benchmarks.bench_chart_storage [--points 50000]
+"""
+import argparse
+import os
+import random
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import selectinload, sessionmaker
+
+from benchmarks.common import scratch_dir
+
+
+def make_data(points: int) -> dict:
+    rng = random.Random(points)
+    return {
+        "xAxis": {"name": "x"},
+        "points": [[rng.random(), rng.random(), rng.random()] for _ in range(points)],
+        "series": [{"name": "s", "values": [rng.random() for _ in range(points)]}],
+    }
+
+
+def measure(fn):
+    """(result, milliseconds, peak MiB); timed separately since tracemalloc slows allocation"""
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed * 1000, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--charts", type=int, default=20)
+    parser.add_argument("--points", type=int, default=50000)
+    args = parser.parse_args()
+
+    from app.database import Base
+    from app.models import Chart, ChartType, User, Workspace
+
+    data = make_data(args.points)
+    print(f"{args.charts} charts x {args.points} points")
+    print(f"{'storage':<10}{'db MB':>8}{'list ms':>10}{'list MB':>10}{'load ms':>10}{'load MB':>10}")
+
+    for storage in ("legacy", "series"):
+        with scratch_dir() as cwd:
+            path = os.path.join(cwd, "bench.db")
+            engine = create_engine(f"sqlite:///{path}")
+            Base.metadata.create_all(engine)
+            Session = sessionmaker(bind=engine)
+
+            with Session() as db:
+                db.add(User(id="u", name="u", email="u@example.com"))
+                db.add(Workspace(id="w", name="w", owner_id="u"))
+                db.flush()
+                for i in range(args.charts):
+                    if storage == "legacy":
+                        db.execute(insert(Chart.__table__).values(
+                            id=f"c{i}", name=f"c{i}", type=ChartType.SCATTER_3D,
+                            workspace_id="w", created_by="u", config={}, data=data,
+                        ))
+                    else:
+                        db.add(Chart(
+                            id=f"c{i}", name=f"c{i}", type=ChartType.SCATTER_3D,
+                            workspace_id="w", created_by="u", config={}, data=data,
+                        ))
+                db.commit()
+
+            def list_metadata():
+                with Session() as db:
+                    charts = db.query(Chart).filter(Chart.workspace_id == "w").all()
+                    return [(chart.id, chart.name, chart.type) for chart in charts]
+
+            def load_data():
+                with Session() as db:
+                    charts = db.query(Chart).options(selectinload(Chart.series)).filter(Chart.workspace_id == "w").all()
+                    return [chart.data for chart in charts]
+
+            list_metadata()  # warm up the connection pool and mapper
+            _, list_ms, list_mb = measure(list_metadata)
+            loaded, load_ms, load_mb = measure(load_data)
+            assert loaded[0]["series"][0]["values"] == data["series"][0]["values"]
+            engine.dispose()
+            size_mb = os.path.getsize(path) / 2 ** 20
+
+        print(f"{storage:<10}{size_mb:>8.1f}{list_ms:>10.1f}{list_mb:>10.1f}{load_ms:>10.1f}{load_mb:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
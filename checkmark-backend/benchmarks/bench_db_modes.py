@@ -0,0 +1,55 @@
+# benchmarks/bench_db_modes.py
+"""REST throughput with the sync (threadpool) database path vs CHECKMARK_DB_ASYNC=1.
+
+Run from checkmark-backend/:  python -m benchmarks.bench_db_modes [--concurrency 200]
+"""
+import argparse
+import asyncio
+
+from benchmarks.common import http_load, run_script, run_server, scratch_dir
+
+SEED = """
+import seed_data
+from app.database import SessionLocal, get_engine
+from app.models import Chart, ChartType
+seed_data.seed_database()
+db = SessionLocal(bind=get_engine())
+for i in range({charts}):
+    db.add(Chart(
+        name=f"chart-{{i}}", type=ChartType.LINE, workspace_id="ws-1", created_by="user-1",
+        config={{"title": {{"text": f"chart-{{i}}"}}}},
+        data={{"x": list(range(200)), "y": list(range(200))}},
+    ))
+db.commit()
+"""
+
+
+async def read_mix(client, n):
+    if n % 2:
+        return await client.get("/api/workspaces/ws-1")
+    return await client.get("/api/workspaces/ws-1/charts")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--charts", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{args.concurrency} concurrent clients, {args.duration}s per mode, {args.charts} charts")
+    print(f"{'mode':<8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+
+    for mode, env in [("sync", {"CHECKMARK_DB_ASYNC": "0"}), ("async", {"CHECKMARK_DB_ASYNC": "1"})]:
+        with scratch_dir() as cwd:
+            run_script(SEED.format(charts=args.charts), cwd, env)
+            with run_server(cwd, env) as base_url:
+                result = asyncio.run(http_load(base_url, read_mix, args.concurrency, args.duration))
+        print(
+            f"{mode:<8}{result['rps']:>10.1f}{result['p50_ms']:>10.1f}"
+            f"{result['p99_ms']:>10.1f}{result['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
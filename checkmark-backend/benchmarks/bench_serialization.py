@@ -0,0 +1,91 @@
+# benchmarks/bench_serialization.py
+"""Default (schema validation) vs fast_serialization responses for large workspace and chart reads.
+
+Seeds one workspace with benchmarks.datagen (default 500 members and 100
+charts x 2000 points), then starts the server once per mode and cache
+setting and times sequential requests to:
+  - GET /api/workspaces/{id}          owner, members and their users
+  - GET /api/workspaces/{id}/charts   every chart with its data
+  - GET /api/charts/{id}              one line chart
+
+With the cache off every request reads and encodes; with it on, the
+default path still validates and encodes the cached models per request,
+the fast path sends cached bytes. Also checks both modes return the same
+JSON.
+
+Run from checkmark-backend/:  python -m benchmarks.bench_serialization [--members 500] [--charts 100] [--points 2000]
+"""
+import argparse
+import os
+import time
+
+import httpx
+from sqlalchemy import create_engine
+
+from benchmarks import datagen
+from benchmarks.common import percentile, run_server, scratch_dir
+
+URLS = {
+    "workspace": "/api/workspaces/ws-0",
+    "chart list": "/api/workspaces/ws-0/charts",
+    "chart": "/api/charts/chart-0-0",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--charts", type=int, default=100)
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    from app import models  # noqa: F401  (registers the tables)
+    from app.database import Base
+
+    with scratch_dir() as cwd:
+        engine = create_engine(f"sqlite:///{os.path.join(cwd, 'checkmark.db')}")
+        Base.metadata.create_all(engine)
+        scale = datagen.Scale(
+            users=args.members + 1, workspaces=1, members=args.members, charts=args.charts, points=args.points,
+        )
+        datagen.generate(engine, scale)
+        engine.dispose()
+
+        print(f"1 workspace, {args.members} members, {args.charts} charts x {args.points} points, "
+              f"{args.requests} requests per row\n")
+        print(f"{'read':<12}{'cache':<7}{'mode':<9}{'p50 ms':>9}{'p99 ms':>9}{'req/s':>8}{'KiB':>9}")
+        bodies = {}
+        for cache in ("off", "on"):
+            for mode in ("default", "fast"):
+                env = {
+                    "CHECKMARK_FAST_SERIALIZATION": str(mode == "fast").lower(),
+                    "CHECKMARK_CACHE_ENABLED": str(cache == "on").lower(),
+                    "CHECKMARK_LOG_LEVEL": "WARNING",
+                }
+                with run_server(cwd, env) as base_url, httpx.Client(base_url=base_url, timeout=None) as client:
+                    for name, url in URLS.items():
+                        client.get(url).raise_for_status()  # warm up, and fill the cache
+                        latencies = []
+                        started = time.perf_counter()
+                        for _ in range(args.requests):
+                            request_started = time.perf_counter()
+                            response = client.get(url)
+                            latencies.append(time.perf_counter() - request_started)
+                        elapsed = time.perf_counter() - started
+                        response.raise_for_status()
+                        bodies.setdefault(name, {})[mode] = response.json()
+                        print(
+                            f"{name:<12}{cache:<7}{mode:<9}{percentile(latencies, 50) * 1000:>9.1f}"
+                            f"{percentile(latencies, 99) * 1000:>9.1f}{args.requests / elapsed:>8.1f}"
+                            f"{len(response.content) / 1024:>9.0f}",
+                            flush=True,
+                        )
+            print()
+
+        different = [name for name, by_mode in bodies.items() if by_mode["default"] != by_mode["fast"]]
+        print("responses " + (f"differ: {', '.join(different)}" if different else "match"))
+
+
+if __name__ == "__main__":
+    main()
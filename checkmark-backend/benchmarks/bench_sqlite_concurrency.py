@@ -0,0 +1,106 @@
+# benchmarks/bench_sqlite_concurrency.py
+"""Concurrent chart reads and writes on SQLite: default rollback journal vs tuned PRAGMAs.
+
+Run from checkmark-backend/:  python -m benchmarks.bench_sqlite_concurrency [--writers 8 --readers 16]
+"""
+import argparse
+import os
+import threading
+import time
+from typing import List
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, apply_sqlite_pragmas, engine_options
+from app.models import Chart, ChartType, User, Workspace
+from benchmarks.common import scratch_dir, summarize
+
+PAYLOAD = {"x": list(range(500)), "y": [i * 0.5 for i in range(500)]}
+
+
+def make_engine(path: str, tuned: bool):
+    url = f"sqlite:///{path}"
+    engine = create_engine(url, **engine_options(url))
+    if tuned:
+        apply_sqlite_pragmas(engine)
+    return engine
+
+
+def seed(Session):
+    with Session() as db:
+        db.add(User(id="user-1", name="Bench", email="bench@example.com"))
+        db.add(Workspace(id="ws-1", name="Bench", owner_id="user-1"))
+        for i in range(50):
+            db.add(Chart(name=f"c{i}", type=ChartType.LINE, workspace_id="ws-1", created_by="user-1", data=PAYLOAD))
+        db.commit()
+
+
+def run(tuned: bool, writers: int, readers: int, duration: float) -> dict:
+    with scratch_dir() as cwd:
+        engine = make_engine(os.path.join(cwd, "bench.db"), tuned)
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        seed(Session)
+
+        read_latencies: List[float] = []
+        write_latencies: List[float] = []
+        errors = {"read": 0, "write": 0}
+        deadline = time.perf_counter() + duration
+
+        def writer():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    with Session() as db:
+                        db.add(Chart(name="w", type=ChartType.LINE, workspace_id="ws-1", created_by="user-1", data=PAYLOAD))
+                        db.commit()
+                    write_latencies.append(time.perf_counter() - start)
+                except OperationalError:
+                    errors["write"] += 1
+
+        def reader():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    with Session() as db:
+                        db.query(Chart).filter(Chart.workspace_id == "ws-1").limit(50).all()
+                    read_latencies.append(time.perf_counter() - start)
+                except OperationalError:
+                    errors["read"] += 1
+
+        threads = [threading.Thread(target=writer) for _ in range(writers)]
+        threads += [threading.Thread(target=reader) for _ in range(readers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        engine.dispose()
+
+    return {
+        "read": summarize(read_latencies, elapsed, errors["read"]),
+        "write": summarize(write_latencies, elapsed, errors["write"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.duration}s each")
+    print(f"{'mode':<10}{'op':<7}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'locked':>8}")
+    for label, tuned in [("default", False), ("tuned", True)]:
+        result = run(tuned, args.writers, args.readers, args.duration)
+        for op in ("read", "write"):
+            r = result[op]
+            print(f"{label:<10}{op:<7}{r['rps']:>10.1f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
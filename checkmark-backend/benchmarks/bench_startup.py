@@ -0,0 +1,133 @@
+# benchmarks/bench_startup.py
+"""Worker cold start: app import time and time to the first requests.
+
+Migrates a scratch database once (alembic upgrade head), then for --runs
+cold starts measures:
+  - import      python -c "import main", wall time
+  - first GET   from spawning uvicorn to the first answered GET /
+  - first DB    ... to the first answered GET /api/workspaces/{id}, which
+                is the first request to reach the database
+
+and, from one python -X importtime run, the packages that take longest to
+import (self time, by top-level package), and which optional or heavy
+modules importing the app loaded.
+
+--app-dir points at another checkout of checkmark-backend (e.g. a git
+worktree of an older commit) to measure it against the same database.
+
+Run from checkmark-backend/:  python -m benchmarks.bench_startup [--runs 5] [--app-dir PATH]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.common import BACKEND_DIR, free_port, scratch_dir
+
+# Loaded on first use, if at all, by the current tree
+DEFERRED_MODULES = ["numpy", "alembic", "aiosqlite", "asyncpg", "redis", "uvicorn.protocols.websockets"]
+
+
+def environment(app_dir: str) -> Dict[str, str]:
+    return {**os.environ, "PYTHONPATH": app_dir, "CHECKMARK_LOG_LEVEL": "WARNING"}
+
+
+def python(args: List[str], cwd: str, app_dir: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=cwd, env=environment(app_dir), check=True, capture_output=True, text=True,
+    )
+
+
+def import_seconds(cwd: str, app_dir: str) -> float:
+    started = time.perf_counter()
+    python(["-c", "import main"], cwd, app_dir)
+    return time.perf_counter() - started
+
+
+def first_requests(cwd: str, app_dir: str) -> Dict[str, float]:
+    """Seconds from spawning uvicorn to the first answered GET / and database read"""
+    port = free_port()
+    # One client made up front: a new one per poll would spend the CPU the server starts on
+    client = httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=10)
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=cwd,
+        env=environment(app_dir),
+    )
+    try:
+        while True:
+            try:
+                client.get("/").raise_for_status()
+                break
+            except httpx.TransportError:
+                if process.poll() is not None or time.perf_counter() - started > 60:
+                    raise RuntimeError("uvicorn did not start")
+                time.sleep(0.005)
+        first_get = time.perf_counter() - started
+        client.get("/api/workspaces/bench-missing")
+        return {"first GET": first_get, "first DB": time.perf_counter() - started}
+    finally:
+        client.close()
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def import_profile(cwd: str, app_dir: str):
+    """(self microseconds by top-level package, total microseconds) from -X importtime"""
+    stderr = python(["-X", "importtime", "-c", "import main"], cwd, app_dir).stderr
+    by_package: Dict[str, int] = defaultdict(int)
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        by_package[name.strip().split(".")[0]] += int(self_us)
+        if name.rstrip() == " main":
+            total = int(cumulative_us)
+    return by_package, total
+
+
+def loaded_modules(cwd: str, app_dir: str) -> List[str]:
+    code = f"import main, sys; print(' '.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    return python(["-c", code], cwd, app_dir).stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="packages to list from -X importtime")
+    parser.add_argument("--app-dir", default=BACKEND_DIR, help="checkmark-backend checkout to start")
+    args = parser.parse_args()
+    app_dir = os.path.abspath(args.app_dir)
+
+    with scratch_dir() as cwd:
+        python(["-m", "alembic", "-c", os.path.join(app_dir, "alembic.ini"), "upgrade", "head"], cwd, app_dir)
+
+        by_package, total = import_profile(cwd, app_dir)
+        print(f"{app_dir}\n\n-X importtime: import main {total / 1000:.0f} ms, self time by package:")
+        for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {package:<24}{self_us / 1000:>8.1f} ms")
+        loaded = loaded_modules(cwd, app_dir)
+        print(f"loaded by import: {', '.join(loaded) or 'none'} (of {', '.join(DEFERRED_MODULES)})\n")
+
+        samples: Dict[str, List[float]] = defaultdict(list)
+        for _ in range(args.runs):
+            samples["import"].append(import_seconds(cwd, app_dir))
+            for step, seconds in first_requests(cwd, app_dir).items():
+                samples[step].append(seconds)
+
+        print(f"{'step':<12}{'median ms':>10}{'min ms':>9}{'max ms':>9}   ({args.runs} cold starts)")
+        for step, values in samples.items():
+            print(f"{step:<12}{statistics.median(values) * 1000:>10.0f}{min(values) * 1000:>9.0f}"
+                  f"{max(values) * 1000:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
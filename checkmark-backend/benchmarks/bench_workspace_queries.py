@@ -0,0 +1,187 @@
+# benchmarks/bench_workspace_queries.py
+"""Workspace listing and loading: OR/EXISTS + joinedload vs UNION + selectinload, with and without indexes.
+
+Seeds one SQLite database (default 10k workspaces x 100 charts, 5 members
+each out of 1000 users), then times, with the listing indexes dropped and
+recreated:
+  - list:  workspaces a user owns or is a member of
+  - load:  one workspace with owner and members (the GET /api/workspaces/{id} query)
+
+"legacy" are the queries as they were (members.any() in an OR; members and
+charts joinedloaded together, members x charts rows); "current" are
+crud.workspace's.
+
+The legacy listing without indexes alone takes about a minute per call at
+the default size.
+
+Run from checkmark-backend/:  python -m benchmarks.bench_workspace_queries [--workspaces 10000]
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.orm import joinedload, sessionmaker
+
+from benchmarks.common import scratch_dir
+
+USERS = 1000
+MEMBERS = 5
+ROUNDS = 20
+BUDGET = 5.0
+
+
+def legacy_get_workspace(db, workspace_id):
+    from app.models import Workspace, WorkspaceMember
+    return db.query(Workspace).options(
+        joinedload(Workspace.owner),
+        joinedload(Workspace.members).joinedload(WorkspaceMember.user),
+        joinedload(Workspace.charts)
+    ).filter(Workspace.id == workspace_id).first()
+
+
+def legacy_get_workspaces_by_user(db, user_id):
+    from app.models import Workspace, WorkspaceMember
+    return db.query(Workspace).options(
+        joinedload(Workspace.owner)
+    ).filter(
+        (Workspace.owner_id == user_id) |
+        (Workspace.members.any(WorkspaceMember.user_id == user_id))
+    ).all()
+
+
+def seed(engine, workspaces: int, charts: int):
+    from app.models import Chart, ChartType, User, Workspace, WorkspaceMember, WorkspaceRole
+
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [
+            {"id": f"u{i}", "name": f"User {i}", "email": f"u{i}@example.com", "created_at": now, "updated_at": now}
+            for i in range(USERS)
+        ])
+        for start in range(0, workspaces, 500):
+            workspace_rows, member_rows, chart_rows = [], [], []
+            for w in range(start, min(start + 500, workspaces)):
+                owner = f"u{rng.randrange(USERS)}"
+                workspace_rows.append({
+                    "id": f"w{w}", "name": f"Workspace {w}", "owner_id": owner,
+                    "created_at": now, "updated_at": now,
+                })
+                members = {owner} | {f"u{rng.randrange(USERS)}" for _ in range(MEMBERS - 1)}
+                member_rows += [
+                    {"id": f"w{w}-{user}", "workspace_id": f"w{w}", "user_id": user, "joined_at": now,
+                     "role": WorkspaceRole.OWNER if user == owner else WorkspaceRole.EDITOR}
+                    for user in members
+                ]
+                chart_rows += [
+                    {"id": f"w{w}-c{c}", "name": f"Chart {c}", "type": ChartType.LINE, "workspace_id": f"w{w}",
+                     "created_by": owner, "config": {"title": f"Chart {c}"}, "created_at": now, "updated_at": now}
+                    for c in range(charts)
+                ]
+            conn.execute(insert(Workspace.__table__), workspace_rows)
+            conn.execute(insert(WorkspaceMember.__table__), member_rows)
+            conn.execute(insert(Chart.__table__), chart_rows)
+
+
+def listing_indexes():
+    from app.models import Chart, Workspace, WorkspaceMember
+    wanted = {"ix_workspace_members_user_id_workspace_id", "ix_charts_workspace_id_updated_at_id", "ix_workspaces_owner_id"}
+    return [
+        index
+        for table in (WorkspaceMember.__table__, Chart.__table__, Workspace.__table__)
+        for index in table.indexes
+        if index.name in wanted
+    ]
+
+
+def timed(Session, fn, *args):
+    """(milliseconds per call, result); slow cases stop after BUDGET seconds"""
+    with Session() as db:
+        started = time.perf_counter()
+        result = fn(db, *args)  # warm up
+        if time.perf_counter() - started > BUDGET:
+            return (time.perf_counter() - started) * 1000, result
+        rounds = 0
+        started = time.perf_counter()
+        while rounds < ROUNDS and time.perf_counter() - started < BUDGET:
+            db.expunge_all()
+            result = fn(db, *args)
+            rounds += 1
+        return (time.perf_counter() - started) / rounds * 1000, result
+
+
+def rows_fetched(engine, fn, *args):
+    """(statements, rows) fn has the database execute and hand back"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    with engine.connect() as conn:
+        event.listen(conn, "before_cursor_execute", capture)
+        with sessionmaker(bind=conn)() as db:
+            fn(db, *args)
+        event.remove(conn, "before_cursor_execute", capture)
+        rows = sum(len(conn.exec_driver_sql(statement, parameters).all()) for statement, parameters in statements)
+    return len(statements), rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workspaces", type=int, default=10000)
+    parser.add_argument("--charts", type=int, default=100)
+    args = parser.parse_args()
+
+    from app.crud import workspace as workspace_crud
+    from app.database import Base
+
+    with scratch_dir() as cwd:
+        engine = create_engine(f"sqlite:///{os.path.join(cwd, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        started = time.perf_counter()
+        seed(engine, args.workspaces, args.charts)
+        with engine.connect() as conn:
+            conn.execute(text("ANALYZE"))
+        print(
+            f"{args.workspaces} workspaces x {args.charts} charts, {MEMBERS} members each, {USERS} users "
+            f"(seeded in {time.perf_counter() - started:.0f}s), ms per call over up to {ROUNDS} rounds\n"
+        )
+        Session = sessionmaker(bind=engine)
+
+        # The busiest member, so the listing returns the most workspaces
+        with engine.connect() as conn:
+            user_id = conn.execute(text(
+                "SELECT user_id FROM workspace_members GROUP BY user_id ORDER BY count(*) DESC LIMIT 1"
+            )).scalar()
+        cases = [
+            ("list", "legacy", legacy_get_workspaces_by_user, user_id),
+            ("list", "current", workspace_crud.get_workspaces_by_user, user_id),
+            ("load", "legacy", legacy_get_workspace, "w0"),
+            ("load", "current", workspace_crud.get_workspace, "w0"),
+        ]
+
+        print(f"{'query':<7}{'version':<10}{'indexes':<9}{'ms':>10}{'queries':>9}{'db rows':>9}{'result':>8}")
+        for indexed in (False, True):
+            for index in listing_indexes():
+                if indexed:
+                    index.create(engine, checkfirst=True)
+                else:
+                    index.drop(engine, checkfirst=True)
+            with engine.connect() as conn:
+                conn.execute(text("ANALYZE"))
+            for query, version, fn, arg in cases:
+                ms, result = timed(Session, fn, arg)
+                queries, rows = rows_fetched(engine, fn, arg)
+                size = len(result) if isinstance(result, list) else len(result.members)
+                print(
+                    f"{query:<7}{version:<10}{'yes' if indexed else 'no':<9}{ms:>10.2f}"
+                    f"{queries:>9}{rows:>9}{size:>8}",
+                    flush=True,
+                )
+
+
+if __name__ == "__main__":
+    main()
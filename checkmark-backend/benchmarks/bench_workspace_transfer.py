@@ -0,0 +1,138 @@
+# benchmarks/bench_workspace_transfer.py
+"""Streaming NDJSON export and re-import of a workspace with thousands of large charts.
+
+Seeds one workspace (default 2000 line charts x 10000 points, packed as
+app.series stores them), starts the server, then:
+  - export:  GET /api/workspaces/{id}/export, streamed to a file
+  - import:  POST /api/workspaces/import with that file as a streamed body
+
+and reports time, bytes and the server's peak RSS (VmHWM, Linux only)
+after each step, with SQLite mmap off so the database file's pages do not
+count. Both stay at the startup footprint plus SQLite's page cache
+(sqlite_cache_size, 64 MiB) and a chunk of charts, however many charts
+there are; --reference adds the whole chart list read as one JSON
+response, which holds every chart in memory at once, for comparison.
+
+Run from checkmark-backend/:  python -m benchmarks.bench_workspace_transfer [--charts 2000] [--points 10000]
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime
+
+import httpx
+from sqlalchemy import create_engine, insert
+
+from benchmarks.common import run_server_process, scratch_dir
+
+WORKSPACE_ID = "bench"
+READ_BYTES = 256 * 1024
+
+
+def seed(engine, charts: int, points: int):
+    from app.models import Chart, ChartSeries, ChartType, User, Workspace
+    from app.series import split_series
+
+    rng = random.Random(0)
+    layout, series = split_series({
+        "labels": list(range(points)),
+        "datasets": [{"label": "Series", "data": [round(rng.uniform(0, 1000), 3) for _ in range(points)]}],
+    })
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__).values(
+            id="user-1", name="Bench", email="bench@example.com", created_at=now, updated_at=now,
+        ))
+        conn.execute(insert(Workspace.__table__).values(
+            id=WORKSPACE_ID, name="Transfer", owner_id="user-1", created_at=now, updated_at=now,
+        ))
+        for start in range(0, charts, 200):
+            ids = [f"c{c}" for c in range(start, min(start + 200, charts))]
+            conn.execute(insert(Chart.__table__), [
+                {"id": chart_id, "name": chart_id, "type": ChartType.LINE, "workspace_id": WORKSPACE_ID,
+                 "config": {"title": chart_id}, "data": layout, "created_by": "user-1",
+                 "created_at": now, "updated_at": now}
+                for chart_id in ids
+            ])
+            conn.execute(insert(ChartSeries.__table__), [
+                {"id": f"{chart_id}-s{n}", "chart_id": chart_id, "position": n,
+                 "dtype": packed.dtype, "shape": packed.shape, "values": packed.values}
+                for chart_id in ids
+                for n, packed in enumerate(series)
+            ])
+    return sum(len(packed.values) for packed in series) * charts
+
+
+def rss_mb(pid: int, field: str) -> float:
+    """VmRSS (now) or VmHWM (peak) of a process, in MiB"""
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def file_chunks(path: str):
+    with open(path, "rb") as f:
+        while chunk := f.read(READ_BYTES):
+            yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--charts", type=int, default=2000)
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--reference", action="store_true", help="also read the whole chart list as JSON")
+    args = parser.parse_args()
+
+    from app import models  # noqa: F401  (registers the tables)
+    from app.database import Base
+
+    with scratch_dir() as cwd:
+        engine = create_engine(f"sqlite:///{os.path.join(cwd, 'checkmark.db')}")
+        Base.metadata.create_all(engine)
+        started = time.perf_counter()
+        packed_bytes = seed(engine, args.charts, args.points)
+        engine.dispose()
+        print(
+            f"{args.charts} charts x {args.points} points, {packed_bytes / 2 ** 20:.0f} MiB packed "
+            f"(seeded in {time.perf_counter() - started:.0f}s)\n"
+        )
+
+        export_path = os.path.join(cwd, "export.ndjson")
+        # With mmap the database file pages count towards RSS; turn it off to measure the heap
+        with run_server_process(cwd, {"CHECKMARK_SQLITE_MMAP_SIZE": "0"}) as (base_url, process), httpx.Client(base_url=base_url, timeout=None) as client:
+            print(f"{'step':<10}{'seconds':>9}{'MiB':>9}{'MiB/s':>8}{'peak RSS MiB':>14}")
+            print(f"{'startup':<10}{'':>9}{'':>9}{'':>8}{rss_mb(process.pid, 'VmHWM'):>14.0f}", flush=True)
+
+            started = time.perf_counter()
+            with client.stream("GET", f"/api/workspaces/{WORKSPACE_ID}/export") as response, open(export_path, "wb") as f:
+                response.raise_for_status()
+                for chunk in response.iter_bytes(READ_BYTES):
+                    f.write(chunk)
+            elapsed = time.perf_counter() - started
+            size = os.path.getsize(export_path) / 2 ** 20
+            print(f"{'export':<10}{elapsed:>9.1f}{size:>9.0f}{size / elapsed:>8.0f}{rss_mb(process.pid, 'VmHWM'):>14.0f}", flush=True)
+
+            started = time.perf_counter()
+            response = client.post(
+                "/api/workspaces/import", content=file_chunks(export_path),
+                headers={"Content-Type": "application/x-ndjson"},
+            )
+            response.raise_for_status()
+            elapsed = time.perf_counter() - started
+            imported = response.json()["charts"]
+            print(f"{'import':<10}{elapsed:>9.1f}{size:>9.0f}{size / elapsed:>8.0f}{rss_mb(process.pid, 'VmHWM'):>14.0f}", flush=True)
+            if imported != args.charts:
+                raise SystemExit(f"imported {imported} charts, expected {args.charts}")
+
+            if args.reference:
+                started = time.perf_counter()
+                size = len(client.get(f"/api/workspaces/{WORKSPACE_ID}/charts").content) / 2 ** 20
+                elapsed = time.perf_counter() - started
+                print(f"{'list JSON':<10}{elapsed:>9.1f}{size:>9.0f}{size / elapsed:>8.0f}{rss_mb(process.pid, 'VmHWM'):>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
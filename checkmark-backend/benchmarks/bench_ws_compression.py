@@ -0,0 +1,121 @@
+# benchmarks/bench_ws_compression.py
+"""permessage-deflate CPU cost vs bytes saved for chart_update streams.
+
+Feeds a stream of successive chart_update frames (the same chart with a few
+values changing, as during live editing) through one connection's
+compressor for each level / window-bits combination, then checks that a
+server started with DeflateWebSocketProtocol negotiates the extension.
+
+Run from checkmark-backend/:  python -m benchmarks.bench_ws_compression
+"""
+import asyncio
+import random
+import time
+
+from websockets.asyncio.client import connect
+from websockets.frames import Frame, Opcode
+
+from app.websocket import encoding
+from app.websocket.compression import deflate_factory
+from benchmarks.common import run_script, run_server, scratch_dir
+
+LEVELS = [1, 3, 6, 9]
+WINDOW_BITS = [9, 12, 15]
+MESSAGES = 200
+
+# points per dataset x datasets
+PAYLOADS = {"small": (20, 1), "typical": (200, 3), "large": (2000, 4)}
+
+
+def chart_updates(points: int, datasets: int, count: int):
+    """Encoded chart_update texts for one chart edited count times"""
+    rng = random.Random(points * datasets)
+    data = {
+        "labels": [f"2024-{1 + i // 28 % 12:02d}-{1 + i % 28:02d}" for i in range(points)],
+        "datasets": [
+            {"label": f"Series {d}", "data": [round(rng.uniform(0, 1000), 2) for _ in range(points)]}
+            for d in range(datasets)
+        ],
+    }
+    texts = []
+    for version in range(count):
+        dataset = data["datasets"][version % datasets]
+        dataset["data"][rng.randrange(points)] = round(rng.uniform(0, 1000), 2)
+        texts.append(encoding.dumps({
+            "type": "chart_update",
+            "payload": {"chartId": "chart-1", "data": data, "version": version + 2},
+            "userId": "user-1",
+            "workspaceId": "ws-1",
+            "timestamp": 1700000000000 + version,
+        }))
+    return texts
+
+
+def cursor_moves(count: int):
+    return [encoding.dumps({
+        "type": "cursor_move",
+        "payload": {"userId": "user-1", "cursor": {"x": 500 + i, "y": 300 + i}},
+        "userId": "user-1",
+        "workspaceId": "ws-1",
+        "timestamp": 1700000000000 + i,
+    }) for i in range(count)]
+
+
+def negotiate(factory):
+    _, extension = factory.process_request_params([], [])
+    return extension
+
+
+def compress_stream(texts, level: int, window_bits: int, min_size: int = 0):
+    extension = negotiate(deflate_factory(window_bits=window_bits, level=level, min_size=min_size))
+    frames = [Frame(Opcode.TEXT, text.encode()) for text in texts]
+    bytes_out = 0
+    start = time.perf_counter()
+    for frame in frames:
+        bytes_out += len(extension.encode(frame).data)
+    elapsed = time.perf_counter() - start
+    return elapsed / len(frames) * 1e6, bytes_out
+
+
+def offline():
+    print(f"{MESSAGES} messages per stream, one connection's compressor (context takeover)\n")
+    print(f"{'payload':<10}{'bytes/msg':>10}{'level':>7}{'wbits':>7}{'us/msg':>10}{'out/msg':>10}{'saved':>8}{'MB/s':>9}")
+    for name, (points, datasets) in PAYLOADS.items():
+        texts = chart_updates(points, datasets, MESSAGES)
+        bytes_in = sum(len(text.encode()) for text in texts)
+        for level in LEVELS:
+            for window_bits in WINDOW_BITS:
+                us, bytes_out = compress_stream(texts, level, window_bits)
+                print(
+                    f"{name:<10}{bytes_in // MESSAGES:>10}{level:>7}{window_bits:>7}{us:>10.1f}"
+                    f"{bytes_out // MESSAGES:>10}{1 - bytes_out / bytes_in:>8.0%}"
+                    f"{bytes_in / MESSAGES / us:>9.1f}"
+                )
+        print()
+
+    texts = cursor_moves(MESSAGES)
+    bytes_in = sum(len(text.encode()) for text in texts)
+    print(f"cursor_move, {bytes_in // MESSAGES} bytes/msg")
+    for min_size in (0, 256):
+        us, bytes_out = compress_stream(texts, 6, 12, min_size)
+        print(f"  min_size={min_size:<5} {us:>6.2f} us/msg  {bytes_out // MESSAGES:>4} bytes/msg")
+
+
+async def negotiated_extensions(base_url: str) -> list:
+    url = base_url.replace("http", "ws") + "/ws/ws-1?userId=bench"
+    async with connect(url, compression="deflate") as websocket:
+        await websocket.recv()
+        return [repr(extension) for extension in websocket.protocol.extensions]
+
+
+def online():
+    with scratch_dir() as cwd:
+        run_script("import seed_data; seed_data.seed_database()", cwd)
+        with run_server(cwd) as base_url:
+            extensions = asyncio.run(negotiated_extensions(base_url))
+    print(f"\nnegotiated with the server: {extensions or 'none'}")
+
+
+if __name__ == "__main__":
+    offline()
+    online()
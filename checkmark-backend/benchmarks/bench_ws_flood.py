@@ -0,0 +1,149 @@
+# benchmarks/bench_ws_flood.py
+"""A client flooding cursor_move, with and without inbound admission control.
+
+Starts the server twice: with the rate limits off, then with the
+defaults (app.config ws_rate_limits). Each run has:
+  - a flooder that sends cursor_move to ws-flood as fast as its socket
+    takes them and reconnects whenever it is closed, like a tab stuck in
+    a loop, watched by --peers peers in the same workspace
+  - --clients well-behaved clients in ws-calm sending cursor_move at
+    --hz, timestamped, so each peer measures how late they arrive
+  - a probe timing GET / every 50 ms
+
+and reports how many calm cursors arrived and how late, the probe latency, how many frames the
+flooder got out and how often it was closed, and the server's throttled
+and rejected counts.
+
+Run from checkmark-backend/:  python -m benchmarks.bench_ws_flood [--clients 10] [--hz 20] [--duration 10]
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+import httpx
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed
+
+from benchmarks.common import percentile, run_server, scratch_dir
+
+LIMITS_OFF = {"CHECKMARK_WS_RATE_LIMITS": "{}", "CHECKMARK_WS_WORKSPACE_RATE_LIMITS": "{}"}
+
+
+def cursor(user: str, workspace: str) -> str:
+    return json.dumps({
+        "type": "cursor_move",
+        "payload": {"userId": user, "cursor": {"x": 1, "y": 2, "sentAt": time.perf_counter()}},
+        "userId": user,
+        "workspaceId": workspace,
+        "timestamp": 0,
+    })
+
+
+async def listen(ws, latencies: List[float]):
+    """Record how late timestamped cursors arrive, whether relayed or batched"""
+    async for text in ws:
+        message = json.loads(text)
+        if message["type"] == "cursor_move":
+            cursors = [message["payload"]]
+        elif message["type"] == "cursor_batch":
+            cursors = message["payload"]["cursors"]
+        else:
+            continue
+        now = time.perf_counter()
+        latencies.extend(now - c["cursor"]["sentAt"] for c in cursors if "sentAt" in (c.get("cursor") or {}))
+
+
+async def calm_client(ws_url: str, user: str, hz: float, deadline: float, latencies: List[float]):
+    async with connect(f"{ws_url}/ws/ws-calm?userId={user}") as ws:
+        listener = asyncio.create_task(listen(ws, latencies))
+        while time.perf_counter() < deadline:
+            await ws.send(cursor(user, "ws-calm"))
+            await asyncio.sleep(1 / hz)
+        listener.cancel()
+
+
+async def flooder(ws_url: str, deadline: float, stats: dict):
+    while time.perf_counter() < deadline:
+        try:
+            async with connect(f"{ws_url}/ws/ws-flood?userId=flooder") as ws:
+                while time.perf_counter() < deadline:
+                    await ws.send(cursor("flooder", "ws-flood"))
+                    stats["sent"] += 1
+        except ConnectionClosed:
+            stats["closed"] += 1
+            await asyncio.sleep(0.1)
+
+
+async def watcher(ws_url: str, user: str, deadline: float):
+    async with connect(f"{ws_url}/ws/ws-flood?userId={user}") as ws:
+        while time.perf_counter() < deadline:
+            try:
+                await asyncio.wait_for(ws.recv(), timeout=max(deadline - time.perf_counter(), 0.01))
+            except asyncio.TimeoutError:
+                break
+
+
+async def probe(client: httpx.AsyncClient, deadline: float, latencies: List[float]):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await client.get("/")
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.05)
+
+
+async def drive(base_url: str, args) -> dict:
+    ws_url = base_url.replace("http", "ws", 1)
+    cursor_latencies: List[float] = []
+    probe_latencies: List[float] = []
+    flood = {"sent": 0, "closed": 0}
+    deadline = time.perf_counter() + args.duration
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        await asyncio.gather(
+            flooder(ws_url, deadline, flood),
+            probe(client, deadline, probe_latencies),
+            *(watcher(ws_url, f"watcher-{n}", deadline) for n in range(args.peers)),
+            *(calm_client(ws_url, f"calm-{n}", args.hz, deadline, cursor_latencies) for n in range(args.clients)),
+        )
+        stats = (await client.get("/stats")).json()
+    return {
+        "cursors": len(cursor_latencies),
+        "cursor_p50": percentile(cursor_latencies, 50),
+        "cursor_p99": percentile(cursor_latencies, 99),
+        "probe_p50": percentile(probe_latencies, 50),
+        "probe_p99": percentile(probe_latencies, 99),
+        "flood_rate": flood["sent"] / args.duration,
+        "flood_closed": flood["closed"],
+        "throttled": stats["throttled_messages"],
+        "rejected": sum(stats["rejected"].values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--peers", type=int, default=3, help="peers watching the flooder's workspace")
+    parser.add_argument("--hz", type=float, default=20.0)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"1 flooder + {args.peers} peers, {args.clients} clients at {args.hz:g} Hz, {args.duration:g}s per run\n")
+    print(
+        f"{'limits':<8}{'cursors':>9}{'p50 ms':>8}{'p99 ms':>8}{'GET / p50':>11}{'p99 ms':>8}"
+        f"{'flood/s':>10}{'closed':>8}{'throttled':>11}{'rejected':>10}"
+    )
+    for limits in ("off", "on"):
+        env = {"CHECKMARK_LOG_LEVEL": "WARNING", **(LIMITS_OFF if limits == "off" else {})}
+        with scratch_dir() as cwd, run_server(cwd, env) as base_url:
+            row = asyncio.run(drive(base_url, args))
+        print(
+            f"{limits:<8}{row['cursors']:>9}{row['cursor_p50'] * 1000:>8.1f}{row['cursor_p99'] * 1000:>8.1f}"
+            f"{row['probe_p50'] * 1000:>11.1f}{row['probe_p99'] * 1000:>8.1f}"
+            f"{row['flood_rate']:>10.0f}{row['flood_closed']:>8}{row['throttled']:>11}{row['rejected']:>10}",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# benchmarks/common.py
+"""Helpers shared by the benchmark scripts"""
+import asyncio
+import contextlib
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def scratch_dir() -> Iterator[str]:
+    """Temporary working directory, so ./checkmark.db never touches the real one"""
+    with tempfile.TemporaryDirectory(prefix="checkmark-bench-") as path:
+        yield path
+
+
+def run_script(code: str, cwd: str, env: Optional[Dict[str, str]] = None):
+    """Run Python code against the app in cwd (e.g. to seed its database)"""
+    subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=cwd,
+        env={**os.environ, "PYTHONPATH": BACKEND_DIR, **(env or {})},
+        check=True,
+    )
+
+
+@contextlib.contextmanager
+def run_server_process(
+    cwd: str, env: Optional[Dict[str, str]] = None, workers: int = 1
+) -> Iterator[Tuple[str, subprocess.Popen]]:
+    """Start uvicorn on a free port and yield its base URL and process
+
+    Scratch databases are built with create_all (or seeded through it), so
+    the server creates missing tables instead of checking the schema revision.
+    """
+    port = free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+            "--ws", "app.websocket.compression:DeflateWebSocketProtocol",
+        ],
+        cwd=cwd,
+        env={"CHECKMARK_DB_SCHEMA_STARTUP": "create", **os.environ, "PYTHONPATH": BACKEND_DIR, **(env or {})},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(base_url + "/", timeout=1)
+                break
+            except httpx.TransportError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError("uvicorn did not start")
+                time.sleep(0.1)
+        yield base_url, process
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+@contextlib.contextmanager
+def run_server(cwd: str, env: Optional[Dict[str, str]] = None, workers: int = 1) -> Iterator[str]:
+    """Start uvicorn on a free port and yield its base URL"""
+    with run_server_process(cwd, env, workers) as (base_url, _):
+        yield base_url
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> dict:
+    """Throughput and latency percentiles (milliseconds) for a load run"""
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+async def http_load(
+    base_url: str,
+    make_request: Callable[[httpx.AsyncClient, int], "asyncio.Future"],
+    concurrency: int,
+    duration: float,
+) -> dict:
+    """Hammer the server from `concurrency` workers for `duration` seconds"""
+    latencies: List[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(worker_id: int):
+            nonlocal errors
+            i = 0
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await make_request(client, worker_id * 1_000_000 + i)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+                i += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return summarize(latencies, elapsed, errors)
@@ -0,0 +1,208 @@
+# benchmarks/datagen.py
+"""Synthetic users, workspaces and charts at production scale, for load tests.
+
+Ids are deterministic, so a load driver can address the data from the same
+parameters without reading it back:
+  users       user-{u}                            u < users
+  workspaces  ws-{w}, owned by user-{w % users}   w < workspaces
+  members     owner plus --members other users per workspace
+  charts      chart-{w}-{c}                       c < charts per workspace
+
+Chart types rotate through line, bar, scatter3D and surface, with --points
+values per series (line and bar charts have two datasets, surfaces are
+roughly square matrices). Data is stored packed as app.series does, from a
+handful of templates per type, and inserted with executemany in chunks, so
+thousands of workspaces take seconds.
+
+Run from checkmark-backend/:
+  python -m benchmarks.datagen --db ./checkmark.db [--users 2000] [--workspaces 1000] [--charts 5] [--points 500]
+"""
+import argparse
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator, List, Tuple
+
+from sqlalchemy import create_engine, insert
+
+CHUNK_ROWS = 1000
+TEMPLATES = 8
+CHART_TYPES = ("line", "bar", "scatter3D", "surface")
+
+
+@dataclass
+class Scale:
+    users: int = 2000
+    workspaces: int = 1000
+    members: int = 4
+    charts: int = 5
+    points: int = 500
+    seed: int = 0
+
+
+def user_id(u: int) -> str:
+    return f"user-{u}"
+
+
+def workspace_id(w: int) -> str:
+    return f"ws-{w}"
+
+
+def chart_id(w: int, c: int) -> str:
+    return f"chart-{w}-{c}"
+
+
+def chart_type(c: int) -> str:
+    return CHART_TYPES[c % len(CHART_TYPES)]
+
+
+def members(scale: Scale, w: int) -> List[str]:
+    """Users of a workspace, owner first"""
+    rng = random.Random(scale.seed * 1_000_003 + w)
+    owner = w % scale.users
+    others = rng.sample(range(scale.users), min(scale.members + 1, scale.users))
+    return [user_id(owner)] + [user_id(u) for u in others if u != owner][:scale.members]
+
+
+def chart_data(kind: str, points: int, rng: random.Random) -> dict:
+    """Chart data of one type with points values per series"""
+    if kind in ("line", "bar"):
+        return {
+            "labels": [f"2024-{1 + i // 28 % 12:02d}-{1 + i % 28:02d}" for i in range(points)],
+            "datasets": [
+                {"label": f"Series {d}", "data": [round(rng.uniform(0, 1000), 2) for _ in range(points)]}
+                for d in range(2)
+            ],
+        }
+    if kind == "scatter3D":
+        return {"series": [{"name": "Points", "data": [
+            [round(rng.gauss(0, 1), 4), round(rng.gauss(0, 1), 4), round(rng.gauss(0, 1), 4)]
+            for _ in range(points)
+        ]}]}
+    side = max(4, math.isqrt(points))
+    return {"series": [{"name": "Surface", "data": [
+        [round(math.sin(r / 5) * math.cos(c / 5) + rng.uniform(-0.1, 0.1), 4) for c in range(side)]
+        for r in range(side)
+    ]}]}
+
+
+def _templates(scale: Scale):
+    """kind -> [(layout, packed series)], TEMPLATES of each"""
+    from app.series import split_series
+
+    rng = random.Random(scale.seed)
+    return {
+        kind: [split_series(chart_data(kind, scale.points, rng)) for _ in range(TEMPLATES)]
+        for kind in CHART_TYPES
+    }
+
+
+def _chunks(rows: Iterator[dict]) -> Iterator[List[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_ROWS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def generate(engine, scale: Scale) -> Tuple[int, int]:
+    """Insert the data into an engine's (empty) tables; returns (charts, packed bytes)"""
+    from app.models import Chart, ChartSeries, ChartType, User, Workspace, WorkspaceMember, WorkspaceRole
+
+    templates = _templates(scale)
+    now = datetime.utcnow()
+    packed_bytes = 0
+
+    def user_rows():
+        for u in range(scale.users):
+            yield {"id": user_id(u), "name": f"User {u}", "email": f"user{u}@example.com",
+                   "created_at": now, "updated_at": now}
+
+    def workspace_rows():
+        for w in range(scale.workspaces):
+            yield {"id": workspace_id(w), "name": f"Workspace {w}", "description": f"Synthetic workspace {w}",
+                   "owner_id": user_id(w % scale.users), "created_at": now, "updated_at": now}
+
+    def member_rows():
+        for w in range(scale.workspaces):
+            for n, member in enumerate(members(scale, w)):
+                role = WorkspaceRole.OWNER if n == 0 else (WorkspaceRole.EDITOR if n % 2 else WorkspaceRole.VIEWER)
+                yield {"id": f"member-{w}-{n}", "workspace_id": workspace_id(w), "user_id": member,
+                       "role": role, "joined_at": now}
+
+    def chart_rows():
+        for w in range(scale.workspaces):
+            for c in range(scale.charts):
+                kind = chart_type(c)
+                layout, _ = templates[kind][(w + c) % TEMPLATES]
+                yield {"id": chart_id(w, c), "name": f"{kind} {c}", "type": ChartType(kind),
+                       "workspace_id": workspace_id(w), "config": {"title": {"text": f"{kind} {c}"}},
+                       "data": layout, "created_by": user_id(w % scale.users),
+                       "created_at": now, "updated_at": now}
+
+    def series_rows():
+        nonlocal packed_bytes
+        for w in range(scale.workspaces):
+            for c in range(scale.charts):
+                _, series = templates[chart_type(c)][(w + c) % TEMPLATES]
+                for position, packed in enumerate(series):
+                    packed_bytes += len(packed.values)
+                    yield {"id": f"{chart_id(w, c)}-s{position}", "chart_id": chart_id(w, c),
+                           "position": position, "dtype": packed.dtype, "shape": packed.shape,
+                           "values": packed.values}
+
+    with engine.begin() as conn:
+        for table, rows in [
+            (User.__table__, user_rows()),
+            (Workspace.__table__, workspace_rows()),
+            (WorkspaceMember.__table__, member_rows()),
+            (Chart.__table__, chart_rows()),
+            (ChartSeries.__table__, series_rows()),
+        ]:
+            for chunk in _chunks(rows):
+                conn.execute(insert(table), chunk)
+    return scale.workspaces * scale.charts, packed_bytes
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    defaults = Scale()
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--workspaces", type=int, default=defaults.workspaces)
+    parser.add_argument("--members", type=int, default=defaults.members, help="members per workspace besides the owner")
+    parser.add_argument("--charts", type=int, default=defaults.charts, help="charts per workspace")
+    parser.add_argument("--points", type=int, default=defaults.points, help="values per chart series")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def scale_from(args: argparse.Namespace) -> Scale:
+    return Scale(args.users, args.workspaces, args.members, args.charts, args.points, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="checkmark.db", help="SQLite file to create the tables in and fill")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    from app import models  # noqa: F401  (registers the tables)
+    from app.database import Base
+
+    scale = scale_from(args)
+    engine = create_engine(f"sqlite:///{args.db}")
+    Base.metadata.create_all(engine)
+    started = time.perf_counter()
+    charts, packed_bytes = generate(engine, scale)
+    engine.dispose()
+    print(
+        f"{scale.users} users, {scale.workspaces} workspaces, {charts} charts "
+        f"({packed_bytes / 2 ** 20:.0f} MiB packed) in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
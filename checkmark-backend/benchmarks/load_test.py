@@ -0,0 +1,354 @@
+# benchmarks/load_test.py
+"""Load test: WebSocket collaborators per workspace plus REST traffic, with a latency report.
+
+Seeds a scratch database with benchmarks.datagen and starts the server (or
+targets --base-url, seeded by datagen with the same scale options), then
+for --warmup + --duration seconds runs:
+  - WebSocket: --clients connections to /ws/{workspace_id} in each of the
+    first --ws-workspaces workspaces. Each sends cursor_move at --cursor-hz
+    and a chart_update of the workspace's first line chart at --update-hz.
+    Senders stamp the wall-clock send time into the message, and every peer
+    that receives it records the fan-out delay (cursor moves arrive inside
+    cursor_batch frames, so theirs includes the batching tick).
+  - REST: --rest-concurrency workers looping over a read-heavy mix across
+    all workspaces: list a user's workspaces, get a workspace, list chart
+    metadata, get a chart, rename a chart (PATCH).
+
+Only the --duration window after the warmup is recorded. The report gives
+p50/p99 latency and throughput per REST route, messages sent and received
+and fan-out delay per WebSocket message type, and the driver's own CPU use
+(near 100% means the driver, not the server, is the bottleneck: lower the
+load or split it across processes). --json PATH writes the report as one
+JSON document with the git commit and parameters; --compare PATH prints
+the change against such a report from an earlier commit.
+
+Run from checkmark-backend/:
+  python -m benchmarks.load_test [--ws-workspaces 20] [--clients 10] [--duration 30] [--json out.json]
+  python -m benchmarks.load_test --env CHECKMARK_DB_ASYNC=true --compare out.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+from sqlalchemy import create_engine
+from websockets.asyncio.client import connect
+
+from app.websocket import encoding
+from benchmarks import datagen
+from benchmarks.common import BACKEND_DIR, run_server, scratch_dir, summarize
+
+# (route template, weight)
+REST_MIX = [
+    ("GET /api/workspaces/", 2),
+    ("GET /api/workspaces/{workspace_id}", 2),
+    ("GET /api/workspaces/{workspace_id}/charts?fields", 3),
+    ("GET /api/charts/{chart_id}", 4),
+    ("PATCH /api/charts/{chart_id}", 1),
+]
+
+
+class Recorder:
+    """Samples gathered while recording is on"""
+
+    def __init__(self):
+        self.recording = False
+        self.rest: Dict[str, List[float]] = defaultdict(list)
+        self.rest_errors: Counter = Counter()
+        self.sent: Counter = Counter()
+        self.received: Counter = Counter()
+        self.fanout: Dict[str, List[float]] = defaultdict(list)
+        self.ws_errors = 0
+
+
+class Client:
+    """One WebSocket collaborator: a receiver and two senders on one connection"""
+
+    def __init__(self, args, recorder: Recorder, w: int, user: str, rng: random.Random):
+        self.args = args
+        self.recorder = recorder
+        self.workspace_id = datagen.workspace_id(w)
+        self.chart_id = datagen.chart_id(w, 0)  # chart 0 is a line chart
+        self.user = user
+        self.rng = rng
+        self.websocket = None
+
+    async def connect(self, ws_url: str):
+        self.websocket = await connect(f"{ws_url}/ws/{self.workspace_id}?userId={self.user}", max_size=None)
+        await self.websocket.recv()  # connection_established
+
+    def _message(self, message_type: str, payload: dict) -> str:
+        return encoding.dumps({
+            "type": message_type,
+            "payload": payload,
+            "userId": self.user,
+            "workspaceId": self.workspace_id,
+            "timestamp": int(time.time() * 1000),
+        })
+
+    async def _every(self, hz: float, send):
+        if hz <= 0:
+            return
+        interval = 1.0 / hz
+        loop = asyncio.get_running_loop()
+        next_at = loop.time() + self.rng.uniform(0, interval)
+        while True:
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+            next_at += interval
+            await send()
+
+    async def send_cursors(self):
+        async def send():
+            cursor = {"x": self.rng.randrange(1920), "y": self.rng.randrange(1080), "sentAt": time.time()}
+            await self.websocket.send(self._message("cursor_move", {"userId": self.user, "cursor": cursor}))
+            if self.recorder.recording:
+                self.recorder.sent["cursor_move"] += 1
+
+        await self._every(self.args.cursor_hz, send)
+
+    async def send_updates(self, data: dict):
+        values = data["datasets"][0]["data"]
+
+        async def send():
+            values[self.rng.randrange(len(values))] = round(self.rng.uniform(0, 1000), 2)
+            payload = {"chartId": self.chart_id, "data": data, "sentAt": time.time()}
+            await self.websocket.send(self._message("chart_update", payload))
+            if self.recorder.recording:
+                self.recorder.sent["chart_update"] += 1
+
+        await self._every(self.args.update_hz, send)
+
+    async def receive(self):
+        recorder = self.recorder
+        async for text in self.websocket:
+            now = time.time()
+            message = encoding.loads(text)
+            message_type = message.get("type")
+            if not recorder.recording:
+                continue
+            recorder.received[message_type] += 1
+            payload = message.get("payload") or {}
+            if message_type == "cursor_batch":
+                for cursor in payload.get("cursors") or []:
+                    sent_at = (cursor.get("cursor") or {}).get("sentAt")
+                    if sent_at and cursor.get("userId") != self.user:
+                        recorder.fanout["cursor_move"].append(now - sent_at)
+            elif message_type in ("cursor_move", "chart_update"):
+                cursor = payload.get("cursor") or {}
+                sent_at = payload.get("sentAt") or cursor.get("sentAt")
+                if sent_at:
+                    recorder.fanout[message_type].append(now - sent_at)
+
+    async def run(self, data: dict):
+        try:
+            await asyncio.gather(self.receive(), self.send_cursors(), self.send_updates(data))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.recorder.ws_errors += 1
+
+
+async def rest_worker(client: httpx.AsyncClient, scale: datagen.Scale, recorder: Recorder, rng: random.Random):
+    routes = [route for route, _ in REST_MIX]
+    weights = [weight for _, weight in REST_MIX]
+    while True:
+        route = rng.choices(routes, weights)[0]
+        w = rng.randrange(scale.workspaces)
+        chart_id = datagen.chart_id(w, rng.randrange(scale.charts)) if scale.charts else "missing"
+        if route == "GET /api/workspaces/":
+            request = client.get("/api/workspaces/", params={"user_id": datagen.user_id(rng.randrange(scale.users))})
+        elif route == "GET /api/workspaces/{workspace_id}":
+            request = client.get(f"/api/workspaces/{datagen.workspace_id(w)}")
+        elif route == "GET /api/workspaces/{workspace_id}/charts?fields":
+            request = client.get(
+                f"/api/workspaces/{datagen.workspace_id(w)}/charts", params={"fields": "id,name,type,updated_at"}
+            )
+        elif route == "GET /api/charts/{chart_id}":
+            request = client.get(f"/api/charts/{chart_id}")
+        else:
+            request = client.patch(
+                f"/api/charts/{chart_id}",
+                json={"ops": [{"op": "replace", "path": "/name", "value": f"renamed {rng.randrange(1000)}"}]},
+            )
+        started = time.perf_counter()
+        try:
+            response = await request
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        if recorder.recording:
+            recorder.rest[route].append(time.perf_counter() - started)
+            if failed:
+                recorder.rest_errors[route] += 1
+
+
+async def drive(base_url: str, args, scale: datagen.Scale) -> dict:
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    ws_url = base_url.replace("http", "ws", 1)
+    update_data = datagen.chart_data("line", scale.points, random.Random(args.seed))
+
+    clients = [
+        Client(args, recorder, w, user, random.Random(rng.random()))
+        for w in range(min(args.ws_workspaces, scale.workspaces))
+        for user in (datagen.members(scale, w) + [f"guest-{w}-{n}" for n in range(args.clients)])[:args.clients]
+    ]
+    connect_started = time.perf_counter()
+    results = await asyncio.gather(*(client.connect(ws_url) for client in clients), return_exceptions=True)
+    connect_seconds = time.perf_counter() - connect_started
+    connected = [client for client, result in zip(clients, results) if not isinstance(result, BaseException)]
+
+    limits = httpx.Limits(max_connections=args.rest_concurrency, max_keepalive_connections=args.rest_concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as http:
+        tasks = [asyncio.create_task(client.run(update_data)) for client in connected]
+        tasks += [
+            asyncio.create_task(rest_worker(http, scale, recorder, random.Random(rng.random())))
+            for _ in range(args.rest_concurrency)
+        ]
+        await asyncio.sleep(args.warmup)
+        recorder.recording = True
+        cpu_started, started = time.process_time(), time.perf_counter()
+        await asyncio.sleep(args.duration)
+        recorder.recording = False
+        elapsed = time.perf_counter() - started
+        driver_cpu = (time.process_time() - cpu_started) / elapsed
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.gather(*(client.websocket.close() for client in connected), return_exceptions=True)
+
+    rest = {
+        route: summarize(recorder.rest[route], elapsed, recorder.rest_errors[route])
+        for route, _ in REST_MIX if recorder.rest[route]
+    }
+    rest["all"] = summarize(
+        [latency for latencies in recorder.rest.values() for latency in latencies],
+        elapsed, sum(recorder.rest_errors.values()),
+    )
+    return {
+        "rest": rest,
+        "ws": {
+            "connections": len(connected),
+            "connect_errors": len(clients) - len(connected),
+            "connect_seconds": connect_seconds,
+            "errors": recorder.ws_errors,
+            "sent_per_s": {key: count / elapsed for key, count in sorted(recorder.sent.items())},
+            "received_per_s": {str(key): count / elapsed for key, count in sorted(recorder.received.items(), key=str)},
+            "fanout": {key: summarize(delays, elapsed) for key, delays in sorted(recorder.fanout.items())},
+        },
+        "driver_cpu": driver_cpu,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: dict):
+    ws = report["ws"]
+    print(f"\ncommit {report['commit']}, {report['params']['duration']}s recorded, driver CPU {report['driver_cpu']:.0%}")
+    print(f"\n{'REST route':<56}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for route, result in report["rest"].items():
+        print(f"{route:<56}{result['rps']:>9.1f}{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}{result['errors']:>8}")
+
+    print(f"\nWebSocket: {ws['connections']} connections ({ws['connect_errors']} failed) "
+          f"in {ws['connect_seconds']:.1f}s, {ws['errors']} dropped")
+    print(f"{'message':<20}{'sent/s':>9}{'recv/s':>10}{'fan-out p50 ms':>16}{'p99 ms':>9}")
+    for message_type in sorted(set(ws["sent_per_s"]) | set(ws["received_per_s"])):
+        fanout = ws["fanout"].get(message_type)
+        print(
+            f"{message_type:<20}{ws['sent_per_s'].get(message_type, 0):>9.1f}"
+            f"{ws['received_per_s'].get(message_type, 0):>10.1f}"
+            + (f"{fanout['p50_ms']:>16.1f}{fanout['p99_ms']:>9.1f}" if fanout else "")
+        )
+
+
+def _change(old: float, new: float) -> str:
+    return f"{(new - old) / old:+.0%}" if old else "n/a"
+
+
+def print_comparison(report: dict, baseline: dict):
+    print(f"\nvs {baseline.get('commit')} ({baseline.get('started_at')})")
+    changed = sorted(
+        key for key in set(report["params"]) | set(baseline["params"])
+        if key not in ("json", "compare") and report["params"].get(key) != baseline["params"].get(key)
+    )
+    if changed:
+        print("parameters differ: " + ", ".join(
+            f"{key} {baseline['params'].get(key)} -> {report['params'].get(key)}" for key in changed
+        ))
+    print(f"{'':<56}{'p50 ms':>16}{'':>7}{'p99 ms':>16}")
+    rows = [(f"REST {route}", result, baseline["rest"].get(route)) for route, result in report["rest"].items()]
+    rows += [
+        (f"fan-out {key}", result, baseline["ws"]["fanout"].get(key))
+        for key, result in report["ws"]["fanout"].items()
+    ]
+    for name, new, old in rows:
+        if old is None:
+            continue
+        print(
+            f"{name:<56}{old['p50_ms']:>7.1f} -> {new['p50_ms']:<6.1f}{_change(old['p50_ms'], new['p50_ms']):>7}"
+            f"{old['p99_ms']:>7.1f} -> {new['p99_ms']:<6.1f}{_change(old['p99_ms'], new['p99_ms']):>7}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    datagen.add_arguments(parser)
+    parser.add_argument("--ws-workspaces", type=int, default=20, help="workspaces with WebSocket clients")
+    parser.add_argument("--clients", type=int, default=10, help="WebSocket clients per workspace")
+    parser.add_argument("--cursor-hz", type=float, default=10.0, help="cursor_move per client per second")
+    parser.add_argument("--update-hz", type=float, default=0.5, help="chart_update per client per second")
+    parser.add_argument("--rest-concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="server environment")
+    parser.add_argument("--base-url", help="load an already running server instead of starting one")
+    parser.add_argument("--json", metavar="PATH", help="write the report as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare with a report written by --json")
+    args = parser.parse_args()
+
+    scale = datagen.scale_from(args)
+    # Per-connection INFO lines would cost the server time and bury the report
+    env = {"CHECKMARK_LOG_LEVEL": "WARNING", **dict(item.split("=", 1) for item in args.env)}
+    started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    if args.base_url:
+        results = asyncio.run(drive(args.base_url, args, scale))
+    else:
+        from app import models  # noqa: F401  (registers the tables)
+        from app.database import Base
+
+        with scratch_dir() as cwd:
+            engine = create_engine(f"sqlite:///{os.path.join(cwd, 'checkmark.db')}")
+            Base.metadata.create_all(engine)
+            charts, _ = datagen.generate(engine, scale)
+            engine.dispose()
+            print(f"seeded {scale.users} users, {scale.workspaces} workspaces, {charts} charts", flush=True)
+            with run_server(cwd, env) as base_url:
+                results = asyncio.run(drive(base_url, args, scale))
+
+    report = {"commit": git_commit(), "started_at": started_at, "params": vars(args), **results}
+    print_report(report)
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(report, json.load(f))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,98 @@
 # main.py
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict
-import json
+from fastapi.responses import PlainTextResponse
+from contextlib import asynccontextmanager
 import logging
 from datetime import datetime
+from typing import Optional
 
-from app.database import engine, Base
+from app.cache import read_cache
+from app.chart_state import ChartStateStore
+from app.config import settings
+from app import logs, metrics
+from app import schema
+from app.database import on_engine
 from app.api.workspaces import router as workspaces_router
 from app.api.charts import router as charts_router
+from app.websocket import ConnectionManager, Frame, create_backplane
+from app.websocket.charts import handle_chart_patch, handle_chart_update, refresh_snapshot
+from app.websocket.encoding import loads, peek_type
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logs.configure()
 logger = logging.getLogger(__name__)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# WebSocket Connection Manager
+manager = ConnectionManager(
+    max_queue_size=settings.ws_send_queue_size,
+    overflow_policy=settings.ws_overflow_policy,
+    cursor_tick_hz=settings.ws_cursor_tick_hz,
+    backplane=create_backplane(
+        settings.ws_backplane,
+        path=settings.ws_backplane_path,
+        url=settings.ws_backplane_url,
+    ),
+    replay_size=settings.ws_replay_size,
+    replay_types=settings.ws_replay_types,
+    snapshot_max_age=settings.ws_snapshot_max_age_seconds,
+    replay_idle_seconds=settings.ws_replay_idle_seconds,
+    rate_limits=settings.ws_rate_limits,
+    workspace_rate_limits=settings.ws_workspace_rate_limits,
+    throttle_strikes=settings.ws_throttle_strikes,
+    throttle_strikes_per_second=settings.ws_throttle_strikes_per_second,
+    max_frame_bytes=settings.ws_max_frame_bytes,
+    max_connections=settings.ws_max_connections,
+    max_connections_per_workspace=settings.ws_max_connections_per_workspace,
+)
+
+metrics.registry.on_collect(manager.collect_metrics)
+if settings.metrics_enabled:
+    on_engine(metrics.instrument_engine)
+
+# Received messages are counted per workspace and logged by sample, not one line each
+message_log = logs.MessageLog(
+    logger,
+    sample_rates=settings.log_message_sample_rates,
+    default_sample_rate=settings.log_message_sample_rate,
+    interval=settings.log_message_counts_interval_seconds,
+)
+
+# Charts being edited live, written behind to the database; through it when
+# several workers share a backplane, since each has its own live copies
+chart_state = ChartStateStore(
+    flush_interval=settings.chart_flush_interval_seconds,
+    max_dirty=settings.chart_flush_max_dirty,
+    idle_seconds=settings.chart_idle_seconds,
+    manager=manager,
+    write_through=settings.ws_backplane != "memory",
+)
 
-app = FastAPI(title="Checkmark Collaboration API")
+# Chart edits over WebSocket go through chart_state instead of being relayed
+chart_handlers = {
+    "chart_patch": handle_chart_patch,
+    "chart_update": handle_chart_update,
+}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Migrations run as their own step (app.schema); workers only check the revision
+    await schema.startup()
+    await manager.start()
+    await chart_state.start()
+    await message_log.start()
+    yield
+    # Flush pending edits while subscribers can still be told about conflicts
+    await chart_state.stop()
+    await manager.stop()
+    await message_log.stop()
+
+
+app = FastAPI(title="Checkmark Collaboration API", lifespan=lifespan)
+# Lets REST routes notify WebSocket subscribers and share the live chart state
+app.state.manager = manager
+app.state.chart_state = chart_state
 
 # CORS configuration
 app.add_middleware(
@@ -26,61 +101,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
+if settings.metrics_enabled:
+    app.add_middleware(metrics.MetricsMiddleware)
 
 # Include routers
 app.include_router(workspaces_router)
 app.include_router(charts_router)
 
 
-# WebSocket Connection Manager (same as before)
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, Dict[str, WebSocket]] = {}
-
-    async def connect(self, websocket: WebSocket, workspace_id: str, user_id: str):
-        await websocket.accept()
-        
-        if workspace_id not in self.active_connections:
-            self.active_connections[workspace_id] = {}
-        
-        self.active_connections[workspace_id][user_id] = websocket
-        logger.info(f"User {user_id} connected to workspace {workspace_id}")
-        logger.info(f"Total connections in workspace: {len(self.active_connections[workspace_id])}")
-
-    def disconnect(self, workspace_id: str, user_id: str):
-        if workspace_id in self.active_connections:
-            if user_id in self.active_connections[workspace_id]:
-                del self.active_connections[workspace_id][user_id]
-                logger.info(f"User {user_id} disconnected from workspace {workspace_id}")
-                
-                if not self.active_connections[workspace_id]:
-                    del self.active_connections[workspace_id]
-                    logger.info(f"Workspace {workspace_id} is now empty")
-
-    async def broadcast(self, workspace_id: str, message: dict, exclude_user: str = None):
-        if workspace_id not in self.active_connections:
-            return
-
-        dead_connections = []
-        
-        for user_id, websocket in self.active_connections[workspace_id].items():
-            if user_id == exclude_user:
-                continue
-                
-            try:
-                await websocket.send_json(message)
-            except Exception as e:
-                logger.error(f"Error sending to {user_id}: {e}")
-                dead_connections.append(user_id)
-        
-        for user_id in dead_connections:
-            self.disconnect(workspace_id, user_id)
-
-
-manager = ConnectionManager()
-
-
 @app.get("/")
 async def root():
     return {
@@ -92,8 +122,8 @@ async def root():
 
 @app.get("/workspaces/{workspace_id}/stats")
 async def workspace_stats(workspace_id: str):
-    if workspace_id in manager.active_connections:
-        users = list(manager.active_connections[workspace_id].keys())
+    users = await manager.workspace_users(workspace_id)
+    if users:
         return {
             "workspace_id": workspace_id,
             "connected_users": len(users),
@@ -106,28 +136,99 @@ async def workspace_stats(workspace_id: str):
     }
 
 
+@app.get("/stats")
+async def connection_stats():
+    # Imported here: it is only loaded by uvicorn when serving with its protocol
+    from app.websocket import compression
+
+    return {**manager.stats(), "compression": compression.stats.snapshot()}
+
+
+@app.get("/stats/cache")
+async def cache_stats():
+    return read_cache.stats()
+
+
+@app.get("/stats/charts")
+async def chart_state_stats():
+    return chart_state.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.websocket("/ws/{workspace_id}")
-async def websocket_endpoint(websocket: WebSocket, workspace_id: str, userId: str):
-    await manager.connect(websocket, workspace_id, userId)
-    
-    try:
-        await websocket.send_json({
+async def websocket_endpoint(
+    websocket: WebSocket,
+    workspace_id: str,
+    userId: str,
+    lastSeq: Optional[int] = None,
+    epoch: Optional[str] = None,
+):
+    # Refused before the snapshot below; connect() checks again right before registering
+    reason = manager.over_capacity(workspace_id, userId)
+    if reason is not None:
+        await manager.refuse(websocket, workspace_id, userId, reason)
+        return
+
+    # A reconnect within the replay log only gets what it missed; others get a snapshot first
+    if manager.replay.needs_snapshot(workspace_id, lastSeq, epoch):
+        await refresh_snapshot(manager, chart_state, workspace_id)
+
+    def initial_frames():
+        greeting = Frame.from_message({
             "type": "connection_established",
             "payload": {
                 "userId": userId,
                 "workspaceId": workspace_id,
-                "message": "Connected successfully"
+                "message": "Connected successfully",
+                **manager.replay.position(workspace_id),
             },
             "userId": "system",
             "workspaceId": workspace_id,
             "timestamp": int(datetime.now().timestamp() * 1000)
         })
-        
+        return [greeting] + manager.replay.catch_up(workspace_id, lastSeq, epoch)
+
+    connection = await manager.connect(websocket, workspace_id, userId, initial_frames)
+    if connection is None:
+        return
+
+    try:
+        relay_only_types = set(settings.ws_relay_only_types)
+
         while True:
             data = await websocket.receive_text()
-            message = json.loads(data)
-            
-            logger.info(f"Received {message.get('type')} from {userId} in {workspace_id}")
+            if connection.closed:
+                break  # replaced, or being closed as a slow consumer: its frames go nowhere
+
+            # Over a size or rate limit the frame is dropped, or the connection closed. Frames
+            # whose type does not lead are limited with the unlisted types, before parsing them
+            message_type = peek_type(data)
+            if not manager.admit(connection, message_type, len(data)):
+                if connection.shed_reason is not None:
+                    raise WebSocketDisconnect(code=1000, reason=connection.shed_reason)
+                continue
+
+            # Relay-only frames are forwarded verbatim, skipping parse and re-encode
+            if message_type in relay_only_types:
+                metrics.ws_messages_received.labels(message_type).inc()
+                message_log.received(workspace_id, userId, message_type)
+                await manager.relay(workspace_id, data, message_type, userId)
+                continue
+
+            message = loads(data)
+            # Whatever the client sent as type (a list, say), a string from here on
+            message_type = str(message.get("type"))
+            metrics.ws_messages_received.labels(message_type).inc()
+            message_log.received(workspace_id, userId, message_type)
+
+            handler = chart_handlers.get(message_type)
+            if handler is not None:
+                await handler(manager, chart_state, connection, workspace_id, userId, message)
+                continue
             
             await manager.broadcast(
                 workspace_id=workspace_id,
@@ -136,8 +237,12 @@ async def websocket_endpoint(websocket: WebSocket, workspace_id: str, userId: st
             )
             
     except WebSocketDisconnect:
-        manager.disconnect(workspace_id, userId)
-        
+        pass
+    except Exception as e:
+        logger.error("WebSocket error for %s in %s: %s", userId, workspace_id, e)
+
+    # A connection the user replaced leaves their presence to the new one
+    if manager.disconnect(workspace_id, userId, connection):
         await manager.broadcast(
             workspace_id=workspace_id,
             message={
@@ -148,9 +253,6 @@ async def websocket_endpoint(websocket: WebSocket, workspace_id: str, userId: st
                 "timestamp": int(datetime.now().timestamp() * 1000)
             }
         )
-    except Exception as e:
-        logger.error(f"WebSocket error for {userId} in {workspace_id}: {e}")
-        manager.disconnect(workspace_id, userId)
 
 
 if __name__ == "__main__":
@@ -159,6 +261,7 @@ if __name__ == "__main__":
         "main:app",
         host="0.0.0.0",
         port=8000,
+        ws="app.websocket.compression:DeflateWebSocketProtocol",
         reload=True,
         log_level="info"
     )
\ No newline at end of file
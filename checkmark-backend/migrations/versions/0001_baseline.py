@@ -0,0 +1,78 @@
+"""Baseline schema (users, workspaces, workspace_members, charts)
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+Databases that Base.metadata.create_all() already built have these tables;
+if_not_exists lets the revision run over them as well as over empty ones.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_baseline"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("email", sa.String(255), nullable=False, unique=True),
+        sa.Column("avatar_url", sa.String(500)),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("updated_at", sa.DateTime),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "workspaces",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("name", sa.String(200), nullable=False),
+        sa.Column("description", sa.Text),
+        sa.Column("owner_id", sa.String(36), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("updated_at", sa.DateTime),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "workspace_members",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("workspace_id", sa.String(36), sa.ForeignKey("workspaces.id"), nullable=False),
+        sa.Column("user_id", sa.String(36), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("role", sa.Enum("OWNER", "EDITOR", "VIEWER", name="workspacerole")),
+        sa.Column("joined_at", sa.DateTime),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "charts",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("name", sa.String(200), nullable=False),
+        sa.Column(
+            "type",
+            sa.Enum("SCATTER_3D", "BAR_3D", "SURFACE_3D", "LINE", "BAR", name="charttype"),
+            nullable=False,
+        ),
+        sa.Column("workspace_id", sa.String(36), sa.ForeignKey("workspaces.id"), nullable=False),
+        sa.Column("config", sa.JSON),
+        sa.Column("data", sa.JSON),
+        sa.Column("created_by", sa.String(36), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("updated_at", sa.DateTime),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("charts")
+    op.drop_table("workspace_members")
+    op.drop_table("workspaces")
+    op.drop_table("users")
@@ -0,0 +1,94 @@
+"""Move large numeric arrays out of charts.data into packed chart_series rows
+
+Revision ID: 0002_chart_series
+Revises: 0001_baseline
+Create Date: 2026-10-18 00:00:00
+
+charts.data keeps the layout (everything but the packed arrays, which become
+{"$series": n} placeholders). Rows are converted one at a time so memory stays
+bounded by the largest chart, not the table. Rows that are never migrated keep
+working: a layout with no placeholders is just the full data.
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.series import PackedSeries, join_series, split_series
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_chart_series"
+down_revision: Union[str, Sequence[str], None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+charts = sa.table(
+    "charts",
+    sa.column("id", sa.String),
+    sa.column("data", sa.JSON),
+)
+
+chart_series = sa.table(
+    "chart_series",
+    sa.column("id", sa.String),
+    sa.column("chart_id", sa.String),
+    sa.column("position", sa.Integer),
+    sa.column("dtype", sa.String),
+    sa.column("shape", sa.JSON),
+    sa.column("values", sa.LargeBinary),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "chart_series",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("chart_id", sa.String(36), sa.ForeignKey("charts.id"), nullable=False),
+        sa.Column("position", sa.Integer, nullable=False),
+        sa.Column("dtype", sa.String(8), nullable=False),
+        sa.Column("shape", sa.JSON, nullable=False),
+        sa.Column("values", sa.LargeBinary, nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_chart_series_chart_id", "chart_series", ["chart_id"], if_not_exists=True)
+
+    bind = op.get_bind()
+    chart_ids = bind.execute(sa.select(charts.c.id).where(charts.c.data.isnot(None))).scalars().all()
+    for chart_id in chart_ids:
+        data = bind.execute(sa.select(charts.c.data).where(charts.c.id == chart_id)).scalar_one()
+        layout, packed = split_series(data)
+        if not packed:
+            continue
+        bind.execute(chart_series.insert(), [
+            {
+                "id": str(uuid.uuid4()),
+                "chart_id": chart_id,
+                "position": position,
+                "dtype": series.dtype,
+                "shape": series.shape,
+                "values": series.values,
+            }
+            for position, series in enumerate(packed)
+        ])
+        bind.execute(charts.update().where(charts.c.id == chart_id).values(data=layout))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    chart_ids = bind.execute(sa.select(chart_series.c.chart_id).distinct()).scalars().all()
+    for chart_id in chart_ids:
+        layout = bind.execute(sa.select(charts.c.data).where(charts.c.id == chart_id)).scalar_one()
+        rows = bind.execute(
+            sa.select(chart_series.c.dtype, chart_series.c.shape, chart_series.c["values"])
+            .where(chart_series.c.chart_id == chart_id)
+            .order_by(chart_series.c.position)
+        ).all()
+        series = [PackedSeries(dtype, shape, values) for dtype, shape, values in rows]
+        bind.execute(charts.update().where(charts.c.id == chart_id).values(data=join_series(layout, series)))
+
+    op.drop_index("ix_chart_series_chart_id", "chart_series")
+    op.drop_table("chart_series")
@@ -0,0 +1,30 @@
+"""Add charts.version, bumped on every chart write
+
+Revision ID: 0003_chart_version
+Revises: 0002_chart_series
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_chart_version"
+down_revision: Union[str, Sequence[str], None] = "0002_chart_series"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("charts") as batch_op:
+        batch_op.add_column(sa.Column("version", sa.Integer, nullable=False, server_default="1"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("charts") as batch_op:
+        batch_op.drop_column("version")
@@ -0,0 +1,36 @@
+"""Index the foreign keys that workspace listing and loading filter on
+
+Revision ID: 0004_listing_indexes
+Revises: 0003_chart_version
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_listing_indexes"
+down_revision: Union[str, Sequence[str], None] = "0003_chart_version"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_workspace_members_user_id_workspace_id",
+        "workspace_members",
+        ["user_id", "workspace_id"],
+        if_not_exists=True,
+    )
+    op.create_index("ix_charts_workspace_id", "charts", ["workspace_id"], if_not_exists=True)
+    op.create_index("ix_workspaces_owner_id", "workspaces", ["owner_id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_workspaces_owner_id", "workspaces")
+    op.drop_index("ix_charts_workspace_id", "charts")
+    op.drop_index("ix_workspace_members_user_id_workspace_id", "workspace_members")
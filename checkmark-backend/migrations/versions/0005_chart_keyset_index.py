@@ -0,0 +1,35 @@
+"""Index charts on (workspace_id, updated_at, id) for keyset pages
+
+Revision ID: 0005_chart_keyset_index
+Revises: 0004_listing_indexes
+Create Date: 2026-10-18 00:00:00
+
+Replaces ix_charts_workspace_id, which is a prefix of the new index.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_chart_keyset_index"
+down_revision: Union[str, Sequence[str], None] = "0004_listing_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_charts_workspace_id_updated_at_id",
+        "charts",
+        ["workspace_id", "updated_at", "id"],
+        if_not_exists=True,
+    )
+    op.drop_index("ix_charts_workspace_id", "charts", if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index("ix_charts_workspace_id", "charts", ["workspace_id"], if_not_exists=True)
+    op.drop_index("ix_charts_workspace_id_updated_at_id", "charts")
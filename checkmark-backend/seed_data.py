@@ -1,12 +1,13 @@
 # seed_data.py
-from app.database import SessionLocal, engine, Base
+from app import schema
+from app.database import SessionLocal, get_engine
 from app.models import User, Workspace, WorkspaceMember, WorkspaceRole
 
 def seed_database():
-    # Create tables
-    Base.metadata.create_all(bind=engine)
+    # Migrate the schema (creating the tables on a new database)
+    schema.upgrade()
     
-    db = SessionLocal()
+    db = SessionLocal(bind=get_engine())
     
     try:
         # Check if user already exists
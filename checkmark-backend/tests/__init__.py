@@ -0,0 +1,12 @@
+# tests/__init__.py
+"""API tests, against a scratch SQLite database migrated and seeded once per run.
+
+Run from checkmark-backend/:  python -m unittest discover tests   (or pytest)
+"""
+import os
+import tempfile
+
+# Before anything imports app.config
+_DATABASE_DIR = tempfile.mkdtemp(prefix="checkmark-tests-")
+os.environ["CHECKMARK_DATABASE_URL"] = f"sqlite:///{os.path.join(_DATABASE_DIR, 'checkmark.db')}"
+os.environ.setdefault("CHECKMARK_LOG_LEVEL", "WARNING")
@@ -0,0 +1,36 @@
+# tests/common.py
+"""The app under test, shared by every test module.
+
+main.app's stores (chart_state, manager) are module globals bound to the
+event loop of the first lifespan, so one TestClient serves the whole run.
+"""
+import atexit
+import functools
+
+from fastapi.testclient import TestClient
+
+WORKSPACE_ID = "ws-1"  # seeded by seed_data, owned by user-1
+
+CHART_DATA = {"labels": [1, 2], "datasets": [{"label": "sales", "data": [1.0, 2.0]}]}
+
+
+@functools.cache
+def client() -> TestClient:
+    import seed_data
+
+    seed_data.seed_database()
+
+    import main
+
+    test_client = TestClient(main.app)
+    test_client.__enter__()
+    atexit.register(test_client.__exit__, None, None, None)
+    return test_client
+
+
+def create_chart(name: str = "chart") -> dict:
+    response = client().post(f"/api/workspaces/{WORKSPACE_ID}/charts", json={
+        "name": name, "type": "line", "workspace_id": WORKSPACE_ID, "config": {}, "data": CHART_DATA,
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
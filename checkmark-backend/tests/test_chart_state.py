@@ -0,0 +1,71 @@
+# tests/test_chart_state.py
+import asyncio
+import unittest
+from unittest import mock
+
+from sqlalchemy import exc
+
+from app.chart_state import ChartStateStore
+from app.crud import chart as chart_crud
+from app.patch import PatchError
+from tests.common import client, create_chart
+
+RENAME = [{"op": "replace", "path": "/name", "value": "renamed"}]
+
+
+def write_through_store() -> ChartStateStore:
+    return ChartStateStore(flush_interval=1.0, max_dirty=64, idle_seconds=300.0, write_through=True)
+
+
+class WriteThroughTest(unittest.TestCase):
+    """With a shared backplane an edit is committed before it is acked, or not at all"""
+
+    def setUp(self):
+        self.chart = create_chart()
+
+    def read(self) -> dict:
+        return client().get(f"/api/charts/{self.chart['id']}").json()
+
+    def test_commits_before_returning(self):
+        store = write_through_store()
+        live = asyncio.run(store.apply(self.chart["id"], RENAME))
+        self.assertEqual(live.version, 2)
+        self.assertIsNone(store.get(self.chart["id"]))
+        self.assertEqual((self.read()["name"], self.read()["version"]), ("renamed", 2))
+
+    def test_failed_commit_leaves_nothing_behind(self):
+        store = write_through_store()
+        down = exc.OperationalError("UPDATE charts", {}, Exception("database is locked"))
+        with mock.patch.object(chart_crud, "save_chart_snapshots", side_effect=down):
+            with self.assertRaises(exc.OperationalError):
+                asyncio.run(store.apply(self.chart["id"], RENAME))
+        self.assertIsNone(store.get(self.chart["id"]))
+        self.assertEqual(store.stats()["dirty_charts"], 0)
+        asyncio.run(store.flush())
+        self.assertEqual((self.read()["name"], self.read()["version"]), ("chart", 1))
+
+    def test_refused_row_is_invalid(self):
+        store = write_through_store()
+        with mock.patch.object(chart_crud, "save_chart_snapshots", return_value=([], [self.chart["id"]])):
+            with self.assertRaises(PatchError):
+                asyncio.run(store.apply(self.chart["id"], RENAME))
+        self.assertEqual(store.stats()["rejected"], 1)
+        self.assertEqual(self.read()["version"], 1)
+
+    def test_conflict_between_workers(self):
+        first, second = write_through_store(), write_through_store()
+
+        async def race():
+            # Both load version 1; the second to commit loses
+            stale = await second._load_unheld(self.chart["id"])
+            await first.apply(self.chart["id"], RENAME)
+            with mock.patch.object(second, "_load_unheld", return_value=stale):
+                await second.apply(self.chart["id"], [{"op": "replace", "path": "/name", "value": "lost"}])
+
+        with self.assertRaises(chart_crud.ChartVersionConflict):
+            asyncio.run(race())
+        self.assertEqual((self.read()["name"], self.read()["version"]), ("renamed", 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
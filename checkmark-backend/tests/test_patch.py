@@ -0,0 +1,48 @@
+# tests/test_patch.py
+import unittest
+
+from tests.common import CHART_DATA, WORKSPACE_ID, client, create_chart
+
+
+class RootReplaceTest(unittest.TestCase):
+    """A patch may only leave /config and /data as an object or null"""
+
+    def assert_rejected(self, path: str, value):
+        chart = create_chart()
+        response = client().patch(f"/api/charts/{chart['id']}", json={
+            "ops": [{"op": "replace", "path": path, "value": value}],
+        })
+        self.assertEqual(response.status_code, 422, response.text)
+
+        # Still readable, unchanged, alone and in its workspace's list
+        read = client().get(f"/api/charts/{chart['id']}")
+        self.assertEqual(read.status_code, 200, read.text)
+        self.assertEqual(read.json()["version"], 1)
+        self.assertEqual(read.json()["data"], CHART_DATA)
+        listing = client().get(f"/api/workspaces/{WORKSPACE_ID}/charts")
+        self.assertEqual(listing.status_code, 200, listing.text)
+
+    def test_config_list(self):
+        self.assert_rejected("/config", [1, 2])
+
+    def test_config_string(self):
+        self.assert_rejected("/config", "dark")
+
+    def test_data_list(self):
+        self.assert_rejected("/data", [1, 2])
+
+    def test_data_packed_list(self):
+        # Long enough to be packed into a series, which the layout then refers to
+        self.assert_rejected("/data", [float(n) for n in range(1000)])
+
+    def test_null_allowed(self):
+        chart = create_chart()
+        response = client().patch(f"/api/charts/{chart['id']}", json={
+            "ops": [{"op": "replace", "path": "/config", "value": None}],
+        })
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertIsNone(client().get(f"/api/charts/{chart['id']}").json()["config"])
+
+
+if __name__ == "__main__":
+    unittest.main()
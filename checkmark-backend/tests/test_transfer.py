@@ -0,0 +1,65 @@
+# tests/test_transfer.py
+import base64
+import json
+import struct
+import unittest
+
+from tests.common import client
+
+USER = {"id": "user-1", "name": "John Doe", "email": "john@example.com", "avatar_url": None}
+
+
+def export_body(chart: dict) -> bytes:
+    """A format 1 export of one workspace holding chart"""
+    lines = [
+        {"kind": "workspace", "format": 1, "workspace": {"id": "ws-import", "name": "Imported", "owner_id": "user-1"}},
+        {"kind": "user", "user": USER},
+        {"kind": "chart", "chart": {"name": "imported", "type": "line", "created_by": "user-1", **chart}},
+    ]
+    return "".join(json.dumps(line) + "\n" for line in lines).encode()
+
+
+def packed(values) -> dict:
+    encoded = base64.b64encode(struct.pack(f"<{len(values)}d", *values)).decode()
+    return {"dtype": "<f8", "shape": [len(values)], "values": encoded}
+
+
+class ImportValidationTest(unittest.TestCase):
+    """A chart that would not read back as a Chart fails the whole import"""
+
+    def import_workspace(self, chart: dict):
+        return client().post("/api/workspaces/import", content=export_body(chart))
+
+    def assert_rejected(self, chart: dict):
+        before = client().get("/api/workspaces/").json()
+        response = self.import_workspace(chart)
+        self.assertEqual(response.status_code, 422, response.text)
+        self.assertEqual(client().get("/api/workspaces/").json(), before)
+
+    def test_valid_chart(self):
+        response = self.import_workspace({
+            "config": {}, "layout": {"values": {"$series": 0}}, "series": [packed([1.0, 2.0])],
+        })
+        self.assertEqual(response.status_code, 201, response.text)
+        charts = client().get(f"/api/workspaces/{response.json()['workspace']['id']}/charts")
+        self.assertEqual(charts.status_code, 200, charts.text)
+        self.assertEqual(charts.json()[0]["data"], {"values": [1.0, 2.0]})
+
+    def test_config_list(self):
+        self.assert_rejected({"config": [1, 2], "layout": {}})
+
+    def test_layout_list(self):
+        self.assert_rejected({"config": {}, "layout": [1, 2]})
+
+    def test_layout_bare_series(self):
+        self.assert_rejected({"config": {}, "layout": {"$series": 0}, "series": [packed([1.0, 2.0])]})
+
+    def test_missing_series(self):
+        self.assert_rejected({"config": {}, "layout": {"values": {"$series": 3}}})
+
+    def test_series_ref_not_an_index(self):
+        self.assert_rejected({"config": {}, "layout": {"values": [{"$series": "0"}]}, "series": [packed([1.0])]})
+
+
+if __name__ == "__main__":
+    unittest.main()
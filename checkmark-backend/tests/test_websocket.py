@@ -0,0 +1,63 @@
+# tests/test_websocket.py
+import unittest
+
+from starlette.websockets import WebSocketDisconnect
+
+from app.websocket.manager import WS_REPLACED
+from tests.common import client
+
+WORKSPACE_ID = "ws-3"
+
+
+def receive_until(ws, message_type: str) -> list:
+    """Messages up to and including the first of message_type"""
+    received = []
+    while not received or received[-1]["type"] != message_type:
+        received.append(ws.receive_json())
+    return received
+
+
+def note(user_id: str) -> dict:
+    return {"type": "note", "payload": {}, "userId": user_id, "workspaceId": WORKSPACE_ID, "timestamp": 0}
+
+
+class ReconnectTest(unittest.TestCase):
+    """A user connecting again replaces their connection without leaving"""
+
+    def test_replaced_connection_closes_without_presence_leave(self):
+        with client().websocket_connect(f"/ws/{WORKSPACE_ID}?userId=watcher") as watcher:
+            receive_until(watcher, "connection_established")
+            with client().websocket_connect(f"/ws/{WORKSPACE_ID}?userId=editor") as first:
+                receive_until(first, "connection_established")
+                with client().websocket_connect(f"/ws/{WORKSPACE_ID}?userId=editor") as second:
+                    receive_until(second, "connection_established")
+
+                    with self.assertRaises(WebSocketDisconnect) as closed:
+                        while True:
+                            first.receive_json()
+                    self.assertEqual(closed.exception.code, WS_REPLACED)
+
+                    second.send_json(note("editor"))
+                    heard = receive_until(watcher, "note")
+                    self.assertNotIn("presence_leave", [message["type"] for message in heard])
+
+            # Once the current connection goes, the leave is announced
+            self.assertEqual(receive_until(watcher, "presence_leave")[-1]["payload"]["userId"], "editor")
+
+
+class MessageTypeTest(unittest.TestCase):
+    def test_unhashable_type_is_relayed(self):
+        with client().websocket_connect(f"/ws/{WORKSPACE_ID}?userId=watcher") as watcher:
+            receive_until(watcher, "connection_established")
+            with client().websocket_connect(f"/ws/{WORKSPACE_ID}?userId=sender") as sender:
+                receive_until(sender, "connection_established")
+                sender.send_json({**note("sender"), "type": []})
+                sender.send_json(note("sender"))
+
+                heard = receive_until(watcher, "note")
+                self.assertIn([], [message["type"] for message in heard])
+                self.assertNotIn("presence_leave", [message["type"] for message in heard])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+// lib/api/columnar.ts
+// Decoder for the binary chart form the backend sends for
+// `Accept: application/octet-stream` (see checkmark-backend/app/columnar.py)
+import type { Chart } from '@/types/api';
+
+export const COLUMNAR_MEDIA_TYPE = 'application/octet-stream';
+
+const MAGIC = 'CMKC';
+const SERIES_REF = '$series';
+
+interface SeriesInfo {
+  dtype: '<f8' | '<i8';
+  shape: number[];
+  offset: number;
+  length: number;
+}
+
+interface ColumnarHeader extends Omit<Chart, 'data'> {
+  layout: Record<string, unknown> | null;
+  series: SeriesInfo[];
+}
+
+// Flat series become Float64Array views over the response buffer;
+// [n, k] series become an array of n row views
+function readSeries(buffer: ArrayBuffer, base: number, info: SeriesInfo) {
+  const count = info.length / 8;
+  const values =
+    info.dtype === '<f8'
+      ? new Float64Array(buffer, base + info.offset, count)
+      : Float64Array.from(new BigInt64Array(buffer, base + info.offset, count), Number);
+
+  if (info.shape.length === 1) return values;
+  const width = info.shape[1];
+  const rows: Float64Array[] = [];
+  for (let i = 0; i < count; i += width) rows.push(values.subarray(i, i + width));
+  return rows;
+}
+
+function fillSeries(value: unknown, series: unknown[]): unknown {
+  if (Array.isArray(value)) return value.map((item) => fillSeries(item, series));
+  if (value && typeof value === 'object') {
+    const entries = Object.entries(value);
+    if (entries.length === 1 && entries[0][0] === SERIES_REF) {
+      return series[entries[0][1] as number];
+    }
+    return Object.fromEntries(entries.map(([key, item]) => [key, fillSeries(item, series)]));
+  }
+  return value;
+}
+
+// Little-endian hosts only (every browser platform in practice)
+export function decodeColumnarChart(buffer: ArrayBuffer): Chart {
+  const magic = new TextDecoder().decode(new Uint8Array(buffer, 0, 4));
+  if (magic !== MAGIC) {
+    throw new Error('Not a columnar chart response');
+  }
+
+  const headerLength = new DataView(buffer).getUint32(4, true);
+  const header: ColumnarHeader = JSON.parse(
+    new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength))
+  );
+  const base = 8 + headerLength;
+  const { layout, series: infos, ...chart } = header;
+  const series = infos.map((info) => readSeries(buffer, base, info));
+  return { ...chart, data: fillSeries(layout, series) as Chart['data'] };
+}
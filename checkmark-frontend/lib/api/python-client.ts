@@ -4,11 +4,22 @@ import type {
   WorkspaceList,
   CreateWorkspaceInput,
   UpdateWorkspaceInput,
+  WorkspaceImportResult,
   Chart,
   CreateChartInput,
   UpdateChartInput,
+  PatchChartInput,
+  ChartPatchResult,
+  ChartBatchOperation,
+  ChartBatchResult,
+  ChartListParams,
+  ChartSummary,
+  ChartLODParams,
+  ListPageParams,
+  Page,
   ApiError,
 } from '@/types/api';
+import { COLUMNAR_MEDIA_TYPE, decodeColumnarChart } from './columnar';
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
@@ -49,6 +60,28 @@ async function fetchAPI<T>(
   }
 }
 
+// Fetch one page of a keyset-paginated list; the next page's cursor comes in X-Next-Cursor
+async function fetchPage<T>(endpoint: string, params: Record<string, string | undefined>): Promise<Page<T>> {
+  const query = new URLSearchParams();
+  for (const [key, value] of Object.entries(params)) {
+    if (value !== undefined) {
+      query.set(key, value);
+    }
+  }
+  const separator = endpoint.includes('?') ? '&' : '?';
+  const response = await fetch(`${API_BASE_URL}${endpoint}${separator}${query}`);
+  if (!response.ok) {
+    const error: ApiError = await response.json().catch(() => ({
+      detail: 'Unknown error'
+    }));
+    throw new Error(error.detail || `HTTP ${response.status}`);
+  }
+  return {
+    items: await response.json(),
+    nextCursor: response.headers.get('X-Next-Cursor'),
+  };
+}
+
 // Workspace API calls
 export const workspaceAPI = {
   // Get all workspaces for a user
@@ -56,6 +89,17 @@ export const workspaceAPI = {
     return fetchAPI<WorkspaceList[]>(`/api/workspaces?user_id=${userId}`);
   },
 
+  // Get one page of a user's workspaces, newest first
+  listPage: async (
+    params: ListPageParams = {},
+    userId: string = 'user-1'
+  ): Promise<Page<WorkspaceList>> => {
+    return fetchPage<WorkspaceList>(`/api/workspaces?user_id=${userId}`, {
+      limit: params.limit?.toString(),
+      cursor: params.cursor,
+    });
+  },
+
   // Get single workspace with details
   get: async (workspaceId: string): Promise<Workspace> => {
     return fetchAPI<Workspace>(`/api/workspaces/${workspaceId}`);
@@ -89,6 +133,27 @@ export const workspaceAPI = {
       method: 'DELETE',
     });
   },
+
+  // Export a workspace with its members and charts as NDJSON (one JSON document per line)
+  export: async (workspaceId: string): Promise<Blob> => {
+    const response = await fetch(`${API_BASE_URL}/api/workspaces/${workspaceId}/export`);
+    if (!response.ok) {
+      const error: ApiError = await response.json().catch(() => ({
+        detail: 'Unknown error'
+      }));
+      throw new Error(error.detail || `HTTP ${response.status}`);
+    }
+    return response.blob();
+  },
+
+  // Import an export (e.g. a File from an <input type="file">) as a new workspace
+  import: async (file: Blob): Promise<WorkspaceImportResult> => {
+    return fetchAPI<WorkspaceImportResult>('/api/workspaces/import', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/x-ndjson' },
+      body: file,
+    });
+  },
 };
 
 // Chart API calls
@@ -98,11 +163,46 @@ export const chartAPI = {
     return fetchAPI<Chart[]>(`/api/workspaces/${workspaceId}/charts`);
   },
 
+  // Get one page of a workspace's charts, newest first; with fields, only those are returned
+  listPage: async (
+    workspaceId: string,
+    params: ChartListParams = {}
+  ): Promise<Page<ChartSummary>> => {
+    return fetchPage<ChartSummary>(`/api/workspaces/${workspaceId}/charts`, {
+      limit: params.limit?.toString(),
+      cursor: params.cursor,
+      fields: params.fields?.join(','),
+    });
+  },
+
   // Get single chart
   get: async (chartId: string): Promise<Chart> => {
     return fetchAPI<Chart>(`/api/charts/${chartId}`);
   },
 
+  // Get single chart with its series downsampled for display (needs numpy on the server)
+  getLOD: async (chartId: string, params: ChartLODParams): Promise<Chart> => {
+    const query = new URLSearchParams();
+    if (params.maxPoints !== undefined) {
+      query.set('max_points', params.maxPoints.toString());
+    }
+    if (params.range) {
+      query.set('range', `${params.range[0] ?? ''}:${params.range[1] ?? ''}`);
+    }
+    return fetchAPI<Chart>(`/api/charts/${chartId}?${query}`);
+  },
+
+  // Get single chart with numeric series as typed arrays (binary transport)
+  getColumnar: async (chartId: string): Promise<Chart> => {
+    const response = await fetch(`${API_BASE_URL}/api/charts/${chartId}`, {
+      headers: { Accept: COLUMNAR_MEDIA_TYPE },
+    });
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}`);
+    }
+    return decodeColumnarChart(await response.arrayBuffer());
+  },
+
   // Create new chart
   create: async (
     workspaceId: string, 
@@ -118,6 +218,21 @@ export const chartAPI = {
     );
   },
 
+  // Create, update and delete charts in one transaction; subscribers get one charts_batch
+  batch: async (
+    workspaceId: string,
+    operations: ChartBatchOperation[],
+    userId: string = 'user-1'
+  ): Promise<ChartBatchResult> => {
+    return fetchAPI<ChartBatchResult>(
+      `/api/workspaces/${workspaceId}/charts:batch?user_id=${userId}`,
+      {
+        method: 'POST',
+        body: JSON.stringify({ operations }),
+      }
+    );
+  },
+
   // Update chart
   update: async (chartId: string, data: UpdateChartInput): Promise<Chart> => {
     return fetchAPI<Chart>(`/api/charts/${chartId}`, {
@@ -126,6 +241,14 @@ export const chartAPI = {
     });
   },
 
+  // Apply JSON-Patch operations; subscribers receive them as chart_patch
+  patch: async (chartId: string, data: PatchChartInput): Promise<ChartPatchResult> => {
+    return fetchAPI<ChartPatchResult>(`/api/charts/${chartId}`, {
+      method: 'PATCH',
+      body: JSON.stringify(data),
+    });
+  },
+
   // Delete chart
   delete: async (chartId: string): Promise<null> => {
     return fetchAPI<null>(`/api/charts/${chartId}`, {
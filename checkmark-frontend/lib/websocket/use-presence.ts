@@ -70,6 +70,19 @@ export function usePresence({ workspaceId, currentUser }: UsePresenceOptions) {
           return next;
         });
         break;
+
+      case 'cursor_batch':
+        setUsers((prev) => {
+          const next = new Map(prev);
+          for (const { userId, cursor } of message.payload.cursors) {
+            const user = next.get(userId);
+            if (user) {
+              next.set(userId, { ...user, cursor });
+            }
+          }
+          return next;
+        });
+        break;
     }
   }, []);
 
@@ -2,7 +2,7 @@
 'use client';
 
 import { useEffect, useRef, useState, useCallback } from 'react';
-import { WebSocketMessage } from '@/types/websocket';
+import { SequencedMessage, WebSocketMessage } from '@/types/websocket';
 
 interface UseWebSocketOptions {
   workspaceId: string;
@@ -25,6 +25,9 @@ export function useWebSocket({
   const reconnectTimeoutRef = useRef<NodeJS.Timeout>(null);
   const reconnectAttemptsRef = useRef(0);
   const maxReconnectAttempts = 5;
+  // Replay position, so a reconnect only receives what was missed
+  const lastSeqRef = useRef<number | null>(null);
+  const epochRef = useRef<string | null>(null);
 
   // Store callbacks in refs to avoid stale closures
   const onMessageRef = useRef(onMessage);
@@ -50,7 +53,10 @@ export function useWebSocket({
   const connect = useCallback(() => {
     const attemptConnect = () => {
       try {
-        const wsUrl = `ws://localhost:8000/ws/${workspaceId}?userId=${userId}`;
+        let wsUrl = `ws://localhost:8000/ws/${workspaceId}?userId=${userId}`;
+        if (lastSeqRef.current !== null && epochRef.current) {
+          wsUrl += `&lastSeq=${lastSeqRef.current}&epoch=${epochRef.current}`;
+        }
         
         console.log('Attempting WebSocket connection to:', wsUrl);
         
@@ -66,7 +72,18 @@ export function useWebSocket({
 
         ws.onmessage = (event) => {
           try {
-            const message: WebSocketMessage = JSON.parse(event.data);
+            const message: SequencedMessage = JSON.parse(event.data);
+            if (message.type === 'workspace_snapshot') {
+              lastSeqRef.current = message.payload.seq;
+              epochRef.current = message.payload.epoch;
+            } else if (typeof message.seq === 'number') {
+              lastSeqRef.current = message.seq;
+            } else if (message.type === 'throttled') {
+              console.warn('WebSocket throttled:', message.payload);
+              if (message.payload.closing) {
+                setConnectionError(`Disconnected by the server (${message.payload.reason})`);
+              }
+            }
             onMessageRef.current?.(message);
           } catch (error) {
             console.error('Failed to parse WebSocket message:', error);
@@ -106,6 +123,11 @@ export function useWebSocket({
     attemptConnect();
   }, [workspaceId, userId]);
 
+  useEffect(() => {
+    lastSeqRef.current = null;
+    epochRef.current = null;
+  }, [workspaceId]);
+
   const sendMessage = useCallback((message: Omit<WebSocketMessage, 'timestamp'>) => {
     if (wsRef.current?.readyState === WebSocket.OPEN) {
       const fullMessage: WebSocketMessage = {
@@ -1,3 +1,5 @@
+import type { ChartPatchOperation } from './websocket';
+
 // User types
 export interface User {
   id: string;
@@ -36,6 +38,14 @@ export interface Workspace extends WorkspaceBase {
   charts?: Chart[];
 }
 
+// POST /api/workspaces/import; counts are rows created (users matched by id or email are reused)
+export interface WorkspaceImportResult {
+  workspace: Workspace;
+  users: number;
+  members: number;
+  charts: number;
+}
+
 export interface CreateWorkspaceInput {
   name: string;
   description: string;
@@ -59,6 +69,7 @@ export interface Chart {
   created_by: string;
   created_at: string;
   updated_at: string;
+  version: number;
 }
 
 export interface CreateChartInput {
@@ -76,6 +87,51 @@ export interface UpdateChartInput {
   data?: Record<string, unknown>;
 }
 
+export interface PatchChartInput {
+  ops: ChartPatchOperation[];
+  base_version?: number;
+}
+
+// POST /api/workspaces/{id}/charts:batch, applied all or nothing
+export type ChartBatchOperation =
+  | { op: 'create'; chart: Omit<CreateChartInput, 'workspace_id'> }
+  | { op: 'update'; id: string; chart: UpdateChartInput; base_version?: number }
+  | { op: 'delete'; id: string };
+
+export interface ChartBatchResult {
+  results: { op: ChartBatchOperation['op']; id: string; chart: Chart | null }[]; // in request order
+}
+
+export interface ChartPatchResult {
+  id: string;
+  workspace_id: string;
+  version: number;
+  updated_at: string;
+}
+
+// Keyset pagination (newest first): pass nextCursor back as cursor until it is null
+export interface ListPageParams {
+  limit?: number;
+  cursor?: string;
+}
+
+export interface ChartListParams extends ListPageParams {
+  fields?: (keyof Chart)[]; // e.g. ['name', 'type', 'updated_at'] for metadata only; id is always included
+}
+
+export interface ChartLODParams {
+  maxPoints?: number; // downsample every series to at most this many points (10..100000)
+  range?: [number?, number?]; // positions [start, end) along each series' first axis
+}
+
+// A chart as returned with fields=: id plus the requested fields
+export type ChartSummary = Pick<Chart, 'id'> & Partial<Chart>;
+
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
 // API Response types
 export interface ApiError {
   detail: string;
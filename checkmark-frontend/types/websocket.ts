@@ -1,3 +1,5 @@
+import type { Chart } from './api';
+
 export interface PresenceUser {
   id: string;
   name: string;
@@ -27,9 +29,62 @@ export interface CursorMovePayload {
   };
 }
 
+export interface CursorBatchPayload {
+  cursors: CursorMovePayload[];
+}
+
 export interface ChartUpdatePayload {
   chartId: string;
   data: unknown; // We'll define this better when we add charts
+  version?: number; // set by the server when it relays the update
+  baseVersion?: number;
+}
+
+// JSON-Patch operation; paths are rooted at the chart (/name, /config/..., /data/...)
+export interface ChartPatchOperation {
+  op?: 'add' | 'remove' | 'replace' | 'test'; // defaults to 'replace'
+  path: string;
+  value?: unknown;
+}
+
+// Sent with baseVersion; received with the version the patch produced.
+// A version other than last + 1 means a patch was missed: refetch the chart.
+export interface ChartPatchPayload {
+  chartId: string;
+  ops: ChartPatchOperation[];
+  version?: number;
+  baseVersion?: number;
+}
+
+// Charts as of seq; the replayed frames that follow continue from seq + 1
+export interface WorkspaceSnapshotPayload {
+  seq: number;
+  epoch: string;
+  charts: Chart[];
+}
+
+// Everything one charts:batch request changed; apply by id (a replayed batch may repeat what a snapshot holds)
+export interface ChartsBatchPayload {
+  created: Chart[];
+  updated: Chart[];
+  deleted: string[];
+}
+
+export interface ChartPatchRejectedPayload {
+  chartId: string | null;
+  reason: 'conflict' | 'invalid' | 'not_found';
+  version: number | null;
+}
+
+// Sent when the server drops this client's messages over a rate limit (at most once a second),
+// and right before it closes or refuses the connection (closing, with the close code)
+export interface ThrottledPayload {
+  reason: 'rate_limit' | 'frame_too_large' | 'workspace_full' | 'server_full';
+  messageType: string | null;
+  scope: 'connection' | 'workspace' | null;
+  retryAfterMs: number;
+  closing: boolean;
+  code: number | null;
 }
 
 // Union type for all possible messages
@@ -55,14 +110,60 @@ export type WebSocketMessage =
       workspaceId: string;
       timestamp: number;
     }
+  | {
+      type: 'cursor_batch';
+      payload: CursorBatchPayload;
+      userId: string;
+      workspaceId: string;
+      timestamp: number;
+    }
   | {
       type: 'chart_update';
       payload: ChartUpdatePayload;
       userId: string;
       workspaceId: string;
       timestamp: number;
+    }
+  | {
+      type: 'chart_patch';
+      payload: ChartPatchPayload;
+      userId: string;
+      workspaceId: string;
+      timestamp: number;
+    }
+  | {
+      type: 'chart_patch_rejected';
+      payload: ChartPatchRejectedPayload;
+      userId: string;
+      workspaceId: string;
+      timestamp: number;
+    }
+  | {
+      type: 'charts_batch';
+      payload: ChartsBatchPayload;
+      userId: string;
+      workspaceId: string;
+      timestamp: number;
+    }
+  | {
+      type: 'workspace_snapshot';
+      payload: WorkspaceSnapshotPayload;
+      userId: string;
+      workspaceId: string;
+      timestamp: number;
+    }
+  | {
+      type: 'throttled';
+      payload: ThrottledPayload;
+      userId: string;
+      workspaceId: string;
+      timestamp: number;
     };
 
+// chart_patch, chart_update and charts_batch arrive with a per-workspace sequence number,
+// echoed back as ?lastSeq= (with the epoch) to resume after a reconnect
+export type SequencedMessage = WebSocketMessage & { seq?: number };
+
 export interface PresenceState {
   users: Map<string, PresenceUser>;
   currentUser: PresenceUser | null;